@@ -0,0 +1,164 @@
+### actions.py
+### Author: Liam Callaway
+### Registry of night actions, their resolution order and how they are performed
+
+import abc
+
+import items
+import journal
+
+
+class Action(abc.ABC):
+    """
+    A night action that can be submitted by a player
+    priority: lower numbers are resolved first
+    cooldown: number of nights (including tonight) the action can't be repeated within, None if no cooldown
+    self_target: whether the player can target themself
+    consumes_item: whether performing the action uses up one use of the held item
+    """
+
+    def __init__(self, name, priority = 0, cooldown = None, self_target = True, consumes_item = False):
+        self.name = name
+        self.priority = priority
+        self.cooldown = cooldown
+        self.self_target = self_target
+        self.consumes_item = consumes_item
+
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, self.name)
+
+
+    @abc.abstractmethod
+    def resolve(self, game, player, current_action):
+        """
+        Perform the action for a player who is able to act, returning the result text
+        """
+
+
+class HideAction(Action):
+    """
+    Hide from attacks
+    """
+
+    def resolve(self, game, player, current_action):
+        player.hide()
+        return "Success"
+
+
+class GuardAction(Action):
+    """
+    Brace for attacks
+    """
+
+    def resolve(self, game, player, current_action):
+        player.guard()
+        return "Success"
+
+
+class AttackAction(Action):
+    """
+    Attack another player, Career kills are only available to Careers
+    """
+
+    def __init__(self, name, career_kill = False, **kwargs):
+        super().__init__(name, **kwargs)
+        self.career_kill = career_kill
+
+
+    def resolve(self, game, player, current_action):
+        target = game.get_player_by_name(current_action["Target"])
+        if not target.is_alive:
+            game.journal.info(journal.ACTION, "{} tried to attack {}, but failed as the target is already dead", player.name, target.name, player = player.name, target = target.name)
+            return None
+        if self.career_kill and not player.is_career:
+            game.journal.info(journal.ACTION, "{} tried to perform a Career Kill, but cannot as they are not a Career", player.name, player = player.name)
+            return "Failed: Not Career"
+        return game.resolve_attack(player, target, player.attack(target, career_kill = self.career_kill))
+
+
+class SerumAction(Action):
+    """
+    Drink a held serum for a temporary stat boost
+    """
+
+    def __init__(self, name, consumes_item = True, **kwargs):
+        super().__init__(name, consumes_item = consumes_item, **kwargs)
+
+
+    def resolve(self, game, player, current_action):
+        available_serums = player.get_usable_items(self.name)
+        if available_serums:
+            return player.drink_serum(available_serums[0])
+        else:
+            game.journal.info(journal.ACTION, "{} tried to drink {}, but doesn't own one", player.name, self.name, player = player.name, item = self.name)
+            return "Failed"
+
+
+class ItemAction(Action):
+    """
+    Use a held active item on a target
+    method names the Player method that carries out the item's effect
+    """
+
+    def __init__(self, name, method = None, consumes_item = True, **kwargs):
+        super().__init__(name, consumes_item = consumes_item, **kwargs)
+        self.method = method
+
+
+    def resolve(self, game, player, current_action):
+        target = game.get_player_by_name(current_action["Target"])
+        return player.perform_item_action(target, self.name)
+
+
+    def perform(self, player, target):
+        """
+        Carry out the item's effect once the item has been used
+        Items that can't target their holder are wasted on them
+        """
+        if target is player and not self.self_target:
+            player.game.journal.info(journal.ACTION, "{} tried to {} {} but failed as they cannot target themself", player.name, (self.method or self.name).lower(), target.name, player = player.name, target = target.name)
+            return "Failed: Self Target"
+        if self.method is not None:
+            return getattr(player, self.method)(target)
+
+
+ACTIONS = {}
+
+def register(action):
+    """
+    Add an action to the registry, replacing any action of the same name
+    """
+    ACTIONS[action.name] = action
+    return action
+
+
+def get_action(name):
+    """
+    Retrieve the handler for an action name
+    Unknown names are treated as serums or active item abilities, which fail without a matching item
+    """
+    try:
+        return ACTIONS[name]
+    except KeyError:
+        return SerumAction(name) if name.endswith("Serum") else ItemAction(name)
+
+
+register(HideAction("Hide", priority = 1, cooldown = 4))
+register(GuardAction("Guard", priority = 2, cooldown = 4))
+register(AttackAction("Attack", priority = 3, cooldown = 4))
+register(AttackAction("Kill", career_kill = True, priority = 3))
+
+#Active items, named by their item's ability
+register(ItemAction("Trap", method = "trap", priority = -5, self_target = False))
+register(ItemAction("Heal", method = "heal", priority = -1))
+register(ItemAction("Protect", method = "protect", priority = -1, self_target = False))
+register(ItemAction("Investigate", method = "investigate", priority = -1, self_target = False))
+register(ItemAction("Bomb", method = "bomb", priority = -1))
+register(ItemAction("Poison", method = "poison", priority = -1, self_target = False))
+register(ItemAction("Follow", method = "follow", priority = 5))
+
+#Serums have always resolved at the default priority, keep it that way so old nights replay identically
+for name in items.item_lookup:
+    if name.endswith("Serum"):
+        register(SerumAction(name))
@@ -0,0 +1,284 @@
+### benchmarks.py
+### Author: Liam Callaway
+### Micro-benchmarks for the hot paths of the game engine
+### Run as: python benchmarks.py [name ...]
+
+import contextlib
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from datetime import datetime
+
+import drops
+import items
+import journal
+import mafia
+import montecarlo
+import replay
+import rosters
+
+SCALING_SIZES = (24, 1000, 10000, 100000)
+#Every Cornucopia fight reweights every entrant, so larger rosters only send this many players
+SCALING_CORNUCOPIA_LIMIT = 2000
+SCALING_ITEM_COPIES = 1000 #Most copies of a day's real drops, keeping ItemDrops.csv within csv's field size limit
+SCALING_SELECTIONS = 20 #stat_based_selection calls timed per roster
+SCALING_RESULTS = os.path.join(os.path.dirname(os.path.realpath(__file__)), "scaling_results.jsonl") #Kept beside this file, wherever it is run from
+
+
+def bench_thresholds(rolls = 200000, seed = mafia.SEEDS[0]):
+    """
+    Compare per-roll cost of calculating invnormalcdf against the threshold tables
+    Also confirms both give identical pass/fail outcomes for the same seed
+    """
+    rng = random.Random(seed)
+    lucks = [rng.randint(0, 20) for _ in range(rolls)]
+    deltas = [rng.randint(-20, 20) for _ in range(rolls)]
+    mu, sigma = mafia.LUCK_PARAMS
+    search_mu, search_sigma = mafia.CHECK_PARAMS["Search"][False]
+
+    def direct():
+        rng = random.Random(seed)
+        return [rng.random() >= mafia.invnormalcdf(l, mu, sigma) for l in lucks] + \
+            [rng.random() >= mafia.invnormalcdf(d, search_mu, search_sigma) for d in deltas]
+
+    def tabled():
+        rng = random.Random(seed)
+        return [rng.random() >= mafia.luck_target(l) for l in lucks] + \
+            [rng.random() >= mafia.check_target("Search", d) for d in deltas]
+
+    if direct() != tabled():
+        raise AssertionError("Threshold tables changed roll outcomes")
+
+    before = min(timeit.repeat(direct, number = 1, repeat = 3)) / (2 * rolls)
+    after = min(timeit.repeat(tabled, number = 1, repeat = 3)) / (2 * rolls)
+    print("Thresholds (table v{}): {:.0f}ns per roll before, {:.0f}ns per roll after, outcomes identical".format(
+        mafia.THRESHOLD_TABLE_VERSION, before * 1e9, after * 1e9))
+
+
+def bench_item_bonus(inventory_size = 1000, reads = 20000):
+    """
+    Compare rescanning a large inventory for item bonuses against the cached totals
+    """
+    player = mafia.Player("Benchmark", {0 : "Strength", 1 : "Defence", 2 : "Agility"}, False, game = mafia.Game())
+    rng = random.Random(mafia.SEEDS[0])
+    item_names = sorted(items.item_lookup)
+    for _ in range(inventory_size):
+        player.add_item(items.create_item(rng.choice(item_names)))
+
+    def rescan():
+        return [sum(x.bonuses[stat] for x in player.inventory if x.usage == "Passive") for stat in mafia.ATTRIBUTES]
+
+    def cached():
+        return [player._get_item_bonus(stat) for stat in mafia.ATTRIBUTES]
+
+    if rescan() != cached():
+        raise AssertionError("Cached item bonuses differ from inventory")
+
+    before = min(timeit.repeat(rescan, number = reads // len(mafia.ATTRIBUTES) // 10, repeat = 3)) / (reads // 10)
+    after = min(timeit.repeat(cached, number = reads // len(mafia.ATTRIBUTES), repeat = 3)) / reads
+    print("Item bonus ({} items): {:.0f}ns per read rescanning, {:.0f}ns per read cached".format(inventory_size, before * 1e9, after * 1e9))
+
+
+def bench_journal(checks = 20000):
+    """
+    Compare the cost of combat checks with the journal recording every roll against the journal switched off
+    """
+    game = mafia.Game()
+    game.set_phase(1)
+    players = [mafia.Player("Benchmark {}".format(i), {0 : "Strength", 1 : "Defence", 2 : "Agility"}, False, game = game) for i in range(2)]
+
+    def run():
+        game.rng.seed(mafia.SEEDS[0])
+        return [players[0].attack_check(players[1]) for _ in range(checks)]
+
+    game.journal.sinks = [] #Keep the ring buffer, but don't write anywhere
+    game.journal.set_level(journal.DEBUG)
+    traced = run()
+    before = min(timeit.repeat(run, number = 1, repeat = 3)) / checks
+    game.journal.set_level(journal.OFF)
+    if run() != traced:
+        raise AssertionError("Journal level changed check outcomes")
+    after = min(timeit.repeat(run, number = 1, repeat = 3)) / checks
+    print("Journal: {:.0f}ns per check at DEBUG, {:.0f}ns per check switched off".format(before * 1e9, after * 1e9))
+
+
+def bench_replay(repeat = 3):
+    """
+    Time a full replay of the real game from its input files
+    Also acts as a golden regression test, failing if a phase that used to match the stored results no longer does
+    """
+    def run():
+        r = replay.Replay()
+        checks = r.run()
+        r.close()
+        return checks
+
+    checks = run()
+    matched = [c.name for c in checks if c.matched]
+    lost = [name for name in replay.GOLDEN_MATCHES if name not in matched]
+    if lost:
+        raise AssertionError("Replay no longer matches stored results for {}".format(", ".join(lost)))
+    elapsed = min(timeit.repeat(run, number = 1, repeat = repeat))
+    print("Replay ({} phases): {:.0f}ms, matched {}".format(len(checks), elapsed * 1e3, ", ".join(matched)))
+
+
+def bench_roster(players = 20000, seed = mafia.SEEDS[0]):
+    """
+    Compare creating players one at a time against drawing a whole roster's stats at once
+    Also checks the average of each drawn stat is close to its exact distribution's mean
+    """
+    preferences = {0 : "Strength", 1 : "Defence", 2 : "Agility"}
+
+    def individual():
+        game = mafia.Game()
+        game.rng.seed(seed)
+        return [mafia.Player("Benchmark {}".format(i), preferences, i % 2 == 0, game = game) for i in range(players)]
+
+    def bulk():
+        return rosters.Roster.generate(players, seed = seed)
+
+    roster = bulk()
+    drawn = roster.stats[rosters.np.arange(players)[:, None], roster.preferences]
+    for rank in range(rosters.N_PREFERENCES):
+        for advantage in (False, True):
+            mean, sd = rosters.moments(rosters.starting_stat_distribution(rank, advantage))
+            column = drawn[roster.advantages == advantage, rank]
+            if abs(column.mean() - mean) > 5 * sd / len(column) ** 0.5:
+                raise AssertionError("Bulk stats for preference {} don't match their exact distribution".format(rank + 1))
+
+    before = min(timeit.repeat(individual, number = 1, repeat = 3)) / players
+    after = min(timeit.repeat(bulk, number = 1, repeat = 3)) / players
+    print("Roster ({} players): {:.0f}ns per player individually, {:.0f}ns per player in bulk".format(players, before * 1e9, after * 1e9))
+
+
+class CountingRandom(random.Random):
+    """
+    Random numbers which count how many draws are made, giving the same numbers as random.Random
+    """
+
+    draws = 0
+
+    def random(self):
+        self.draws += 1
+        return super().random()
+
+
+    def getrandbits(self, k):
+        self.draws += 1
+        return super().getrandbits(k)
+
+
+def write_scaling_inputs(players, seed, entrants):
+    """
+    Write a synthetic game's input files to the current directory
+    Responses for every player, item drops scaled up from the real game's and everyone's first night action
+    """
+    rng = random.Random(seed)
+    roster = montecarlo.synthetic_roster(rng, players)
+    montecarlo.write_roster("Responses.csv", roster)
+
+    schedule = drops.load_item_schedule(os.path.join(replay.DATA_DIR, replay.INPUT_FILES["ItemDrops.csv"]))
+    with open("ItemDrops.csv", 'w', newline='') as f:
+        wrt = csv.writer(f)
+        wrt.writerow(["Day", "Items"])
+        for day, names in sorted(schedule.days.items()):
+            copies = min(SCALING_ITEM_COPIES, max(1, (entrants if day == 0 else players) // montecarlo.N_PLAYERS))
+            wrt.writerow([day, " ".join(names * copies)])
+
+    names = [row["Name"] for row in roster]
+    with open("night1.csv", 'w', newline='') as f:
+        wrt = csv.DictWriter(f, ["Player", "Action", "Target"])
+        wrt.writeheader()
+        for name in names:
+            action = rng.choice(["Attack", "Hide", "Guard"])
+            wrt.writerow({"Player" : name, "Action" : action, "Target" : rng.choice(names) if action == "Attack" else ""})
+
+
+def scaling_stages(players, seed = mafia.SEEDS[0], trace = False):
+    """
+    Run each stage of a synthetic game in the current directory, which must hold its input files
+    Returns a record per stage of wall time, random draws and (with trace) peak memory allocated during it
+    """
+    game = mafia.Game("scaling")
+    game.backup_dir = os.getcwd()
+    game.rng = CountingRandom(game.seeds[0])
+    records = []
+
+    def stage(name, size, run):
+        draws = game.rng.draws
+        if trace:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        records.append({"players" : players, "stage" : name, "size" : size, "seconds" : elapsed,
+            "peak_bytes" : tracemalloc.get_traced_memory()[1] - before if trace else None, "draws" : game.rng.draws - draws})
+        return result
+
+    game.set_phase(0)
+    stage("create_players_from_responses", players, lambda: game.create_players_from_responses("Responses.csv"))
+    everyone = game.get_players()
+    careers = random.Random(seed).sample([p.name for p in everyone], max(2, players // 5))
+    game.kingpin = game.get_player_by_name(careers[0])
+    game.kingpin.is_kingpin = True
+    game.set_careers(*careers)
+
+    entrants = everyone[:SCALING_CORNUCOPIA_LIMIT]
+    stage("run_cornucopia", len(entrants), lambda: game.run_cornucopia(entrants))
+    living = game.get_living_players()
+    stage("stat_based_selection", len(living), lambda: [game.stat_based_selection(selection_players = living, selection_stats = ['Luck'], n = min(10, len(living)))
+        for _ in range(SCALING_SELECTIONS)])
+
+    game.set_phase(1)
+    stage("run_game_phase", len(game.get_living_players()), game.run_game_phase)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull): #save_game lists every player
+        stage("save_game", players, game.save_game)
+    stage("load_game", players, lambda: mafia.load_game(game.game_name, directory = game.backup_dir))
+    return records
+
+
+def bench_scaling(sizes = SCALING_SIZES, seed = mafia.SEEDS[0], output = SCALING_RESULTS):
+    """
+    Time each stage of synthetic games with growing rosters, appending the results to a file (JSON lines)
+    Each roster is played twice from the same seed, once timed and once tracing memory, as tracing slows everything down
+    """
+    old_level = mafia.JOURNAL.level
+    run_at = datetime.now().isoformat(timespec = "seconds")
+    mafia.JOURNAL.set_level(journal.OFF)
+    try:
+        for players in sizes:
+            timed = traced = None
+            for trace in (False, True):
+                with tempfile.TemporaryDirectory(prefix = "scaling_") as work_dir, replay.working_directory(work_dir):
+                    write_scaling_inputs(players, seed, min(players, SCALING_CORNUCOPIA_LIMIT))
+                    if trace:
+                        tracemalloc.start()
+                    try:
+                        records = scaling_stages(players, seed, trace)
+                    finally:
+                        tracemalloc.stop()
+                timed, traced = (records, traced) if not trace else (timed, records)
+            if [r["draws"] for r in timed] != [r["draws"] for r in traced]:
+                raise AssertionError("Tracing memory changed the random draws of a {} player game".format(players))
+            with open(output, 'a') as f:
+                for record, traced_record in zip(timed, traced):
+                    record.update(peak_bytes = traced_record["peak_bytes"], seed = seed, run_at = run_at)
+                    f.write(json.dumps(record) + "\n")
+                    print("Scaling ({} players) {}: {:.3f}s, {:.1f}MB peak, {} draws ({} involved)".format(
+                        players, record["stage"], record["seconds"], record["peak_bytes"] / 2 ** 20, record["draws"], record["size"]))
+    finally:
+        mafia.JOURNAL.set_level(old_level)
+
+
+BENCHMARKS = {"thresholds" : bench_thresholds, "item_bonus" : bench_item_bonus, "journal" : bench_journal, "replay" : bench_replay, "roster" : bench_roster, "scaling" : bench_scaling}
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
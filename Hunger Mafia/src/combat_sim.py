@@ -0,0 +1,121 @@
+### combat_sim.py
+### Author: Liam Callaway
+### Vectorised Monte Carlo simulation of night combat, used for balance testing
+
+import numpy as np
+
+import items
+import mafia
+
+STAT_INDEX = {stat : i for i, stat in enumerate(mafia.ATTRIBUTES)}
+
+#Outcome codes, indexes into OUTCOMES (names match CombatOutcome)
+OUTCOMES = ["hidden", "failed", "success", "success_protected", "countered", "countered_protected"]
+HIDDEN, FAILED, SUCCESS, SUCCESS_PROTECTED, COUNTERED, COUNTERED_PROTECTED = range(len(OUTCOMES))
+
+#Temporary bonuses granted by night actions (see Player.hide, Player.guard and Player.attack)
+ACTION_BONUSES = {"Hide" : {'Agility' : 4}, "Guard" : {'Defence' : 2}, "Kill" : {'Strength' : 4}}
+ACTION_BONUSES.update({name : dict(items.create_item(name).bonuses) for name in items.item_lookup if name.endswith("Serum")})
+
+
+def stat_vector(values):
+    """
+    Convert a dictionary of attribute values into a stat vector
+    """
+    return np.array([values.get(stat, 0) for stat in mafia.ATTRIBUTES], dtype = int)
+
+
+def action_bonus_vector(*actions):
+    """
+    Combine the stat bonuses of several night actions (eg. "Hide", "AgilitySerum")
+    """
+    total = np.zeros(len(mafia.ATTRIBUTES), dtype = int)
+    for action in actions:
+        total += stat_vector(ACTION_BONUSES[action])
+    return total
+
+
+def player_vectors(player, phase):
+    """
+    Retrieve a player's base stats and their combined item and action bonuses
+    """
+    bonus = {stat : player._get_item_bonus(stat) + player.action_bonus[phase][stat] for stat in mafia.ATTRIBUTES}
+    return stat_vector(player.stats), stat_vector(bonus)
+
+
+def threshold_lookup(deltas, mu, sigma):
+    """
+    Evaluate invnormalcdf over an array of integer deltas
+    Deltas cover a small range, so the matching threshold table is expanded once per call
+    """
+    deltas = np.asarray(deltas)
+    low, high = int(deltas.min()), int(deltas.max())
+    thresholds = mafia.THRESHOLD_TABLES[(mu, sigma)]
+    table = np.array([thresholds[d] for d in range(low, high + 1)])
+    return table[deltas - low]
+
+
+def simulate_combat(attacker_stats, defender_stats, trials, attacker_bonus = 0, defender_bonus = 0,
+        fatigue = False, search = True, attacker_protected = False, defender_protected = False,
+        params = None, luck_params = None, rng = None):
+    """
+    Simulate many attacks at once, following search_check -> attack_check -> counter_check
+    Stats and bonuses are arrays whose last axis follows ATTRIBUTES, extra leading axes are batched
+    Returns an array of outcome codes with shape (trials,) + batch shape
+    params and luck_params default to mafia.CHECK_PARAMS and mafia.LUCK_PARAMS
+    """
+    rng = np.random.default_rng(rng)
+    params = mafia.CHECK_PARAMS if params is None else params
+    luck_params = mafia.LUCK_PARAMS if luck_params is None else luck_params
+
+    attacker_stats, defender_stats = np.asarray(attacker_stats, dtype = int), np.asarray(defender_stats, dtype = int)
+    attacker_total, defender_total = attacker_stats + attacker_bonus, defender_stats + defender_bonus
+    shape = (trials,) + np.broadcast_shapes(attacker_total.shape, defender_total.shape)[:-1]
+
+    #Luck bonus chance only depends on base Luck, same as Player._apply_luck
+    attacker_luck = threshold_lookup(attacker_stats[..., STAT_INDEX['Luck']], *luck_params)
+    defender_luck = threshold_lookup(defender_stats[..., STAT_INDEX['Luck']], *luck_params)
+
+    def roll_stat(total, luck, stat):
+        return total[..., STAT_INDEX[stat]] + (rng.random(shape) >= luck)
+
+    #Search check
+    if search:
+        delta = roll_stat(attacker_total, attacker_luck, 'Agility') - roll_stat(defender_total, defender_luck, 'Agility')
+        found = rng.random(shape) >= threshold_lookup(delta, *params["Search"][fatigue])
+    else:
+        found = np.ones(shape, dtype = bool)
+
+    #Attack check
+    delta = roll_stat(attacker_total, attacker_luck, 'Strength') - roll_stat(defender_total, defender_luck, 'Defence')
+    attack_roll = rng.random(shape)
+    hit = attack_roll >= threshold_lookup(delta, *params["Attack"][fatigue])
+
+    #Counter check uses the inverse of the attack roll
+    delta = roll_stat(defender_total, defender_luck, 'Strength') - roll_stat(attacker_total, attacker_luck, 'Defence')
+    countered = 1 - attack_roll >= threshold_lookup(delta, *params["Counter"][fatigue])
+
+    outcomes = np.where(hit, np.where(defender_protected, SUCCESS_PROTECTED, SUCCESS),
+        np.where(countered, np.where(attacker_protected, COUNTERED_PROTECTED, COUNTERED), FAILED))
+    return np.where(found, outcomes, HIDDEN).astype(np.int8)
+
+
+def simulate_players(attacker, defender, trials, career_kill = False, search = True, rng = None):
+    """
+    Simulate many attacks between two players using their current stats, items and statuses
+    """
+    phase = attacker.game.current_phase
+    attacker_stats, attacker_bonus = player_vectors(attacker, phase)
+    defender_stats, defender_bonus = player_vectors(defender, phase)
+    if career_kill:
+        attacker_bonus = attacker_bonus + action_bonus_vector("Kill")
+    return simulate_combat(attacker_stats, defender_stats, trials, attacker_bonus, defender_bonus,
+        fatigue = mafia.is_fatigued(phase), search = search,
+        attacker_protected = attacker.is_protected(), defender_protected = defender.is_protected(), rng = rng)
+
+
+def outcome_rates(outcomes):
+    """
+    Summarise simulated outcome codes as the rate of each outcome across trials
+    """
+    return {name : (outcomes == code).mean(axis = 0) for code, name in enumerate(OUTCOMES)}
@@ -0,0 +1,32 @@
+### conftest.py
+### Author: Liam Callaway
+### Shared pytest fixtures for building small games
+
+import pytest
+
+import mafia
+
+PREFERENCES = {0 : "Strength", 1 : "Defence", 2 : "Agility"}
+
+
+@pytest.fixture
+def make_player():
+    """
+    Create a player in a game, without adding them to its players
+    """
+    def make(name, game):
+        return mafia.Player(name, PREFERENCES, False, game = game)
+    return make
+
+
+@pytest.fixture
+def make_game(make_player):
+    """
+    Create a game with a player for each name, given ids and districts in order
+    """
+    def make(*names, name = "game"):
+        game = mafia.Game(name)
+        for player_name in names:
+            game.add_player(make_player(player_name, game))
+        return game
+    return make
@@ -0,0 +1,57 @@
+### drops.py
+### Author: Liam Callaway
+### Loads the schedule of item drops (Cornucopia, sponsor gifts and the Feast) from csv
+
+import csv
+import os
+
+import items
+
+
+class ItemSchedule:
+    """
+    Item drops for each day, parsed once from an ItemDrops csv
+    Day 0 is the Cornucopia and Day -1 is the Feast
+    """
+
+    def __init__(self, path):
+        """
+        Parse and validate every entry in the schedule
+        Fails on unknown items or repeated days rather than part way through a night
+        """
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self.days = {}
+        with open(path) as f:
+            for line_number, line in enumerate(csv.DictReader(f), 2):
+                try:
+                    day = int(line["Day"])
+                except ValueError:
+                    raise ValueError("{} line {}: Invalid Day {}".format(path, line_number, line["Day"]))
+                if day in self.days: #Should only be one entry per day
+                    raise ValueError("{} line {}: More than one entry for Day {}".format(path, line_number, day))
+                item_names = line["Items"].split()
+                for name in item_names:
+                    if name not in items.item_lookup:
+                        raise ValueError("{} line {}: Unknown item {} for Day {}".format(path, line_number, name, day))
+                self.days[day] = item_names
+
+
+    def create_items(self, day):
+        """
+        Create new items for a day's drop
+        """
+        return [items.create_item(name) for name in self.days.get(day, [])]
+
+
+_schedules = {}
+
+def load_item_schedule(path):
+    """
+    Retrieve the schedule for a file, only parsing it again if it has been modified
+    """
+    key = os.path.abspath(path)
+    schedule = _schedules.get(key)
+    if schedule is None or schedule.mtime != os.path.getmtime(path):
+        schedule = _schedules[key] = ItemSchedule(path)
+    return schedule
@@ -0,0 +1,102 @@
+### effects.py
+### Author: Liam Callaway
+### Delayed effects (eg. poison) which resolve on a later night
+
+import heapq
+from collections import defaultdict
+
+
+class Effect:
+    """
+    A delayed effect on a player, applied on one night and resolving on another
+    """
+
+    def __init__(self, kind, player, phase, night):
+        self.kind = kind
+        self.player = player
+        self.phase = phase
+        self.night = night
+        self.cancelled = False
+
+
+    def __repr__(self):
+        return "{} on {} (Night {} -> Night {})".format(self.kind, self.player.name, self.phase, self.night)
+
+
+class EffectQueue:
+    """
+    Priority queue of delayed effects, keyed by the night they resolve
+    Effects due on the same night resolve in order of their order key (eg. player id)
+    Cancelled effects are dropped when they reach the front of the queue
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.scheduled = defaultdict(list)
+        self.count = 0
+
+
+    def __len__(self):
+        return sum(len(effects) for effects in self.scheduled.values())
+
+
+    def schedule(self, kind, player, phase, night, order = 0):
+        """
+        Schedule an effect on a player to resolve on a given night
+        """
+        effect = Effect(kind, player, phase, night)
+        heapq.heappush(self.heap, (night, order, self.count, effect))
+        self.count += 1
+        self.scheduled[kind, player].append(effect)
+        return effect
+
+
+    def entries(self):
+        """
+        Effects still waiting to resolve, in the order they were scheduled, as (kind, player name, phase, night, order)
+        """
+        entries = sorted((count, effect.kind, effect.player.name, effect.phase, night, order) for night, order, count, effect in self.heap if not effect.cancelled)
+        return [entry[1:] for entry in entries]
+
+
+    def pending(self, kind, player):
+        """
+        Retrieve the effects of a kind still waiting to resolve on a player
+        """
+        return list(self.scheduled.get((kind, player), []))
+
+
+    def cancel(self, kind, player, before = None):
+        """
+        Cancel pending effects of a kind on a player, optionally only those applied before a phase
+        Returns the cancelled effects
+        """
+        effects = self.scheduled.get((kind, player), [])
+        cancelled = [e for e in effects if before is None or e.phase < before]
+        for effect in cancelled:
+            effect.cancelled = True
+        self._forget(kind, player, [e for e in effects if not e.cancelled])
+        return cancelled
+
+
+    def pop_due(self, night):
+        """
+        Remove and return every effect due on or before a night, in resolution order
+        """
+        due = []
+        while self.heap and self.heap[0][0] <= night:
+            effect = heapq.heappop(self.heap)[-1]
+            if not effect.cancelled:
+                self._forget(effect.kind, effect.player, [e for e in self.scheduled[effect.kind, effect.player] if e is not effect])
+                due.append(effect)
+        return due
+
+
+    def _forget(self, kind, player, remaining):
+        """
+        Update the effects still pending on a player
+        """
+        if remaining:
+            self.scheduled[kind, player] = remaining
+        else:
+            self.scheduled.pop((kind, player), None)
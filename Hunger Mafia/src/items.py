@@ -130,4 +130,4 @@ def create_item(item_name):
     return item_lookup[item_name]()
 
 #Reflection is cool yo
-item_lookup = {name:obj for name, obj in inspect.getmembers(sys.modules[__name__], inspect.isclass)}
+item_lookup = {name:obj for name, obj in inspect.getmembers(sys.modules[__name__], inspect.isclass) if issubclass(obj, Item) and obj is not Item}
@@ -0,0 +1,162 @@
+### journal.py
+### Author: Liam Callaway
+### Structured journal of game events (rolls, actions, deaths, items, statuses), written to pluggable sinks
+
+import json
+import sys
+from collections import deque
+
+DEBUG = 10 #Individual rolls and stat calculations
+INFO = 20 #Narration of the game, as seen in Log.txt
+WARNING = 30
+OFF = 100
+
+#Event kinds
+ROLL = "roll"
+ACTION = "action"
+DEATH = "death"
+ITEM = "item"
+STATUS = "status"
+COMBAT = "combat"
+GAME = "game"
+
+
+class Event:
+    """
+    A single journal entry
+    The message is formatted when the event is created, so it reflects the game at that point
+    """
+
+    __slots__ = ("phase", "level", "kind", "message", "fields")
+
+    def __init__(self, phase, level, kind, message, fields):
+        self.phase = phase
+        self.level = level
+        self.kind = kind
+        self.message = message
+        self.fields = fields
+
+
+    def __repr__(self):
+        return "[{} {}] {}".format(self.phase, self.kind, self.message)
+
+
+    def get_dict(self):
+        d = {"phase" : self.phase, "level" : self.level, "kind" : self.kind, "message" : self.message}
+        d.update(self.fields)
+        return d
+
+
+class ConsoleSink:
+    """
+    Write each event's message as a line of text, matching the format of Log.txt
+    """
+
+    def __init__(self, stream = None):
+        self.stream = stream
+
+
+    def write(self, event):
+        print(event.message, file = self.stream or sys.stdout)
+
+
+    def close(self):
+        pass
+
+
+class JsonlSink:
+    """
+    Write each event as a line of json
+    """
+
+    def __init__(self, path, mode = 'a'):
+        self.path = path
+        self.file = open(path, mode)
+
+
+    def write(self, event):
+        self.file.write(json.dumps(event.get_dict(), default = str) + "\n")
+
+
+    def close(self):
+        self.file.close()
+
+
+class Journal:
+    """
+    Records events at or above a level into a ring buffer of recent events and any attached sinks
+    Events below the level are dropped before their message is formatted, so callers pass the message and its arguments unformatted
+    """
+
+    def __init__(self, level = DEBUG, size = 1000):
+        self.level = level
+        self.recent = deque(maxlen = size)
+        self.sinks = []
+        self.phase = 0
+
+
+    def enabled(self, level):
+        return level >= self.level
+
+
+    def set_level(self, level):
+        self.level = level
+
+
+    def fork(self):
+        """
+        A new journal writing to the same sinks at the same level, with its own phase and recent events
+        Each game journals through its own fork, so games running side by side don't mix their events
+        """
+        forked = Journal(self.level, self.recent.maxlen)
+        forked.sinks = list(self.sinks)
+        return forked
+
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+
+    def remove_sink(self, sink):
+        self.sinks.remove(sink)
+        sink.close()
+
+
+    def log(self, level, kind, message, *args, **fields):
+        """
+        Record an event, message is formatted with args like str.format
+        fields are extra structured data kept with the event (eg. player, target, item)
+        """
+        if level < self.level:
+            return
+        event = Event(self.phase, level, kind, message.format(*args) if args else message, fields)
+        self.recent.append(event)
+        for sink in self.sinks:
+            sink.write(event)
+
+
+    def debug(self, kind, message, *args, **fields):
+        if DEBUG >= self.level:
+            self.log(DEBUG, kind, message, *args, **fields)
+
+
+    def info(self, kind, message, *args, **fields):
+        if INFO >= self.level:
+            self.log(INFO, kind, message, *args, **fields)
+
+
+    def warning(self, kind, message, *args, **fields):
+        if WARNING >= self.level:
+            self.log(WARNING, kind, message, *args, **fields)
+
+
+    def events(self, kind = None):
+        """
+        Retrieve the recent events, optionally only those of one kind
+        """
+        return [e for e in self.recent if kind is None or e.kind == kind]
+
+
+JOURNAL = Journal()
+JOURNAL.add_sink(ConsoleSink())
@@ -0,0 +1,198 @@
+### lynch.py
+### Author: Liam Callaway
+### Lynch schedule and day vote tallies, used to decide who is lynched each day
+
+import csv
+import os
+import re
+from collections import defaultdict
+
+
+class LynchSchedule:
+    """
+    Manually decided lynches for each day, parsed once from a lynches csv
+    """
+
+    def __init__(self, path):
+        """
+        Parse every entry in the schedule, failing on repeated days
+        """
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self.days = {}
+        with open(path) as f:
+            for line_number, line in enumerate(csv.DictReader(f), 2):
+                day = int(line["Day"])
+                if day in self.days: #Multiple lynches?
+                    raise ValueError("{} line {}: Invalid number of Lynched players for Day {}".format(path, line_number, day))
+                self.days[day] = line["Name"]
+
+
+    def get(self, day):
+        """
+        Retrieve the name of the player to be lynched on a day, None if no lynch
+        """
+        return self.days.get(day)
+
+
+_schedules = {}
+
+def load_lynch_schedule(path):
+    """
+    Retrieve the schedule for a file, only parsing it again if it has been modified
+    """
+    key = os.path.abspath(path)
+    schedule = _schedules.get(key)
+    if schedule is None or schedule.mtime != os.path.getmtime(path):
+        schedule = _schedules[key] = LynchSchedule(path)
+    return schedule
+
+
+def match_name(raw, names):
+    """
+    Match a hand typed name (eg. "maddie mackey", "Terry ", "Michael Cui (2/11/9/8)") to a player name
+    Returns None for abstaining, fails if no single player matches
+    """
+    cleaned = re.sub(r"\(.*?\)", "", raw).strip().lower()
+    if not cleaned or cleaned == "abstain":
+        return None
+    exact = [n for n in names if n.lower() == cleaned]
+    if exact:
+        return exact[0]
+    partial = [n for n in names if n.lower().startswith(cleaned)]
+    if len(partial) == 1:
+        return partial[0]
+    raise ValueError("Unable to match vote '{}' to a single player ({} matches)".format(raw, len(partial)))
+
+
+class DayTally:
+    """
+    Running vote counts for a single day
+    Each voter has at most one vote, and the leading count is kept up to date as votes change
+    """
+
+    def __init__(self):
+        self.votes = {}
+        self.counts = defaultdict(int)
+        self.by_count = defaultdict(set)
+        self.top = 0
+
+
+    def _move(self, target, change):
+        """
+        Change a target's count by one vote and update the leading count
+        """
+        count = self.counts[target]
+        self.by_count[count].discard(target)
+        count = self.counts[target] = count + change
+        if count:
+            self.by_count[count].add(target)
+        else:
+            del self.counts[target]
+        if count > self.top:
+            self.top = count
+        elif not self.by_count[self.top]:
+            self.top -= 1
+
+
+    def vote(self, voter, target):
+        """
+        Record a voter's vote, replacing any earlier vote (target None abstains)
+        """
+        self.unvote(voter)
+        self.votes[voter] = target
+        if target is not None:
+            self._move(target, 1)
+
+
+    def unvote(self, voter):
+        """
+        Withdraw a voter's vote, if they have one
+        """
+        target = self.votes.pop(voter, None)
+        if target is not None:
+            self._move(target, -1)
+
+
+    def leaders(self):
+        """
+        Retrieve the players with the most votes
+        """
+        return sorted(self.by_count[self.top]) if self.top else []
+
+
+class VoteTally:
+    """
+    Vote tallies for each day, fed from vote logs or form response exports
+    """
+
+    def __init__(self):
+        self.days = defaultdict(DayTally)
+
+
+    def __contains__(self, day):
+        return day in self.days
+
+
+    def vote(self, day, voter, target):
+        """
+        Record a vote (target None abstains)
+        """
+        self.days[day].vote(voter, target)
+
+
+    def unvote(self, day, voter):
+        """
+        Withdraw a vote
+        """
+        self.days[day].unvote(voter)
+
+
+    def leaders(self, day):
+        """
+        Retrieve the players with the most votes on a day
+        """
+        return self.days[day].leaders() if day in self.days else []
+
+
+    def is_tie(self, day):
+        """
+        Check if the lead is shared between multiple players
+        """
+        return len(self.leaders(day)) > 1
+
+
+    def result(self, day):
+        """
+        Retrieve the player to be lynched, None if there were no votes
+        Fails if the vote is tied, as ties must be broken first
+        """
+        leaders = self.leaders(day)
+        if len(leaders) > 1:
+            raise ValueError("Day {} vote is tied between {}".format(day, ", ".join(leaders)))
+        return leaders[0] if leaders else None
+
+
+    def ingest_vote_log(self, path, player_names):
+        """
+        Stream votes from a csv log with Day, Voter and Vote columns, in the order they were cast
+        Votes may be written as in the vote thread, eg. "VOTE: James Curran", "UNVOTE: James Curran", "VOTE: ABSTAIN"
+        """
+        with open(path) as f:
+            for line in csv.DictReader(f):
+                day, voter, vote = int(line["Day"]), line["Voter"].strip(), line["Vote"].strip()
+                if vote.upper().startswith("UNVOTE"):
+                    self.unvote(day, voter)
+                else:
+                    vote = re.sub(r"^VOTE\s*:", "", vote, flags = re.IGNORECASE)
+                    self.vote(day, voter, match_name(vote, player_names))
+
+
+    def ingest_form_responses(self, path, day, player_names):
+        """
+        Stream votes from a csv export of a vote form (eg. Mafia Day 9 Tie-Breaker (Responses))
+        Later responses from the same person replace their earlier ones
+        """
+        with open(path) as f:
+            for line in csv.DictReader(f):
+                self.vote(day, line["Who are you?"].strip(), match_name(line["Who do you wish to vote for?"], player_names))
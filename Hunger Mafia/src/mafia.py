@@ -9,13 +9,25 @@ import math
 import csv
 import pickle
 import inspect
+import actions
+import drops
+import effects
 import items
+import lynch
+import results
+import sampling
+import scheduler
+import snapshots
+import statuses
+import storage
 import sys
+import uuid
 
 from datetime import datetime
 import os
 
 from collections import defaultdict
+from journal import JOURNAL, ROLL, ACTION, DEATH, ITEM, STATUS, COMBAT, GAME
 
 ### 3 Prime numbers were crowdsourced from the FB group:
 ###     2, 2, 11
@@ -60,7 +72,22 @@ SEEDS = [2151912510308904607,
 ### Posted https://www.facebook.com/groups/mafiatalk/permalink/1426539054053211/
 
 ATTRIBUTES = ["Strength", "Defence", "Agility", "Luck"]
-TRACE = True
+TRACE = True #Journal the stats used in each combat check (only formatted when the journal is at DEBUG level)
+DEBUG_CACHES = False #Verify cached values against a full recalculation on every read
+POISON_DELAY = 3 #Nights until a poisoned player dies
+BACKUP_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "backup") #Where games are saved
+MAX_PAIRING_ATTEMPTS = 10000 #Redraws allowed when pairing combatants with the original raffle
+STAT_POINTS = 20 #Starting stat points allocated at random
+RESPONSE_POINTS = 7 #Bonus points shared between a player's three preferred stats
+RESPONSE_BONUSES = {True : [2,1,0], False : [1,0,0]} #Extra points for preferred stats, by whether the player earned the advantage
+
+### Distribution parameters (mu, sigma) used for each roll
+### Checks have a normal and a fatigue mode (phases after FATIGUE_PHASE)
+LUCK_PARAMS = (7, 3)
+FATIGUE_PHASE = 7
+CHECK_PARAMS = {"Search" : {False : (-1, 4), True : (-4, 4)},
+    "Attack" : {False : (0, 4), True : (-1, 4)},
+    "Counter" : {False : (3, 4), True : (2, 4)}}
 
 def invnormalcdf(x, mu = 0, sigma = 1):
     """
@@ -70,6 +97,112 @@ def invnormalcdf(x, mu = 0, sigma = 1):
     return 1 - ((1.0 + math.erf(z / math.sqrt(2.0)))/2)
 
 
+### Rolls only ever compare small integer deltas, so thresholds are precomputed per (mu, sigma)
+### Bump the version whenever the way tables are generated changes
+THRESHOLD_TABLE_VERSION = 1
+THRESHOLD_TABLE_RANGE = range(-40, 41)
+
+
+class ThresholdTable(dict):
+    """
+    Lookup table of invnormalcdf values over integer deltas for one (mu, sigma)
+    Deltas outside the table fall back to calculating invnormalcdf directly
+    """
+
+    version = THRESHOLD_TABLE_VERSION
+
+    def __init__(self, mu, sigma, deltas = THRESHOLD_TABLE_RANGE):
+        """
+        Precompute the threshold for every delta in range
+        """
+        super().__init__((d, invnormalcdf(d, mu, sigma)) for d in deltas)
+        self.mu = mu
+        self.sigma = sigma
+
+
+    def __missing__(self, delta):
+        """
+        Calculate thresholds for deltas outside the table
+        """
+        return invnormalcdf(delta, self.mu, self.sigma)
+
+
+class ThresholdTables(dict):
+    """
+    Collection of threshold tables, keyed by (mu, sigma) and created on first use
+    """
+
+    def __missing__(self, params):
+        """
+        Create the table for a new (mu, sigma)
+        """
+        table = self[params] = ThresholdTable(*params)
+        return table
+
+
+THRESHOLD_TABLES = ThresholdTables()
+
+
+def is_fatigued(phase):
+    """
+    Check if a phase is played in fatigue mode
+    """
+    return phase > FATIGUE_PHASE
+
+
+def check_target(check, delta, fatigue = False):
+    """
+    Calculate the target a roll must reach to pass a Search, Attack or Counter check
+    """
+    return THRESHOLD_TABLES[CHECK_PARAMS[check][fatigue]][delta]
+
+
+def luck_target(luck):
+    """
+    Calculate the target a luck roll must reach to award the Luck bonus
+    """
+    return THRESHOLD_TABLES[LUCK_PARAMS][luck]
+
+
+def delta_distribution(first, second):
+    """
+    Combine two stat distributions into a distribution of their difference
+    """
+    result = defaultdict(float)
+    for v1, p1 in first.items():
+        for v2, p2 in second.items():
+            result[v1 - v2] += p1 * p2
+    return result
+
+
+def battle_win_chance(first_odds, second_odds, first_lives, second_lives):
+    """
+    Calculate the chance the first attacker wins a final battle
+    Odds are (success, failed, countered) tuples from Player.check_odds for each attacker
+    Solves the absorbing Markov chain over (first lives, second lives, turn)
+    """
+    first_success, first_failed, first_countered = first_odds
+    second_success, second_failed, second_countered = second_odds
+    stalemate = 1 - first_failed * second_failed
+    if stalemate <= 0:
+        raise ValueError("Final battle can never end, neither player can lose a life")
+
+    #Chance the first attacker eventually wins, from the first and second player's turn
+    first_turn = {}
+    second_turn = {}
+    for a in range(first_lives + 1):
+        for b in range(second_lives + 1):
+            if a == 0 or b == 0:
+                first_turn[a, b] = second_turn[a, b] = 1.0 if b == 0 and a > 0 else 0.0
+                continue
+            #Outcomes that change lives, failed attacks just pass the turn
+            x = first_success * second_turn[a, b - 1] + first_countered * second_turn[a - 1, b]
+            y = second_success * first_turn[a - 1, b] + second_countered * first_turn[a, b - 1]
+            first_turn[a, b] = (x + first_failed * y) / stalemate
+            second_turn[a, b] = y + second_failed * first_turn[a, b]
+    return first_turn[first_lives, second_lives]
+
+
 def pickle_obj(path, obj):
     """
     Pickle an object to a filepath
@@ -86,12 +219,12 @@ def unpickle_obj(path):
         return pickle.load(f)
 
 
-def print_roll_results(name, target, roll):
+def print_roll_results(name, target, roll, journal = JOURNAL):
     """
-    Print a readable summary of a roll outcome
+    Journal a readable summary of a roll outcome
     """
     result = "Pass" if roll >= target else "Fail"
-    print("{} Check. Target: {}, Roll: {}, Result: {}".format(name, target, roll, result))
+    journal.debug(ROLL, "{} Check. Target: {}, Roll: {}, Result: {}", name, target, roll, result, check = name, threshold = target, roll = roll)
 
 
 def getBlankDD():
@@ -107,30 +240,75 @@ class Player:
     """
 
 
-    def __init__(self, name, preferences, advantage):
+    def __init__(self, name, preferences, advantage, game, stats = None):
         """
         Create a player based on their stat preferences
+        The game provides the current phase, random numbers and delayed effects
+        Starting stats already drawn (eg. by rosters.generate_stats) can be given instead of allocating them here
         """
+        self.game = game
         self.name = name
         self.preferences = preferences
         self.inventory = []
-        self.status = defaultdict(list)
+        self.item_bonus = defaultdict(int)
+        self.status = statuses.StatusStore()
         self.actions = defaultdict(list)
+        self.last_used = {}
         self.action_bonus = defaultdict(getBlankDD)
-        self.response_bonus = [2,1,0] if advantage else [1,0,0]
+        self.response_bonus = list(RESPONSE_BONUSES[bool(advantage)])
         self.is_kingpin = False
         self.is_career = False
         self.is_alive = True
-        self.stats = self._initialise_stats()
+        self.stats = dict(stats) if stats is not None else self._initialise_stats()
         self.id = None
         self.district = None
         self.death_text = None
+        self.death_phase = None
 
 
     def __repr__(self):
         return self.name
 
 
+    def __setstate__(self, state):
+        """
+        Restore a pickled player, rebuilding caches missing from older saves
+        """
+        self.__dict__.update(state)
+        if "item_bonus" not in state:
+            self._rebuild_item_bonus()
+        if "last_used" not in state:
+            self.last_used = {}
+            for phase in sorted(self.actions):
+                for action, target in self.actions[phase]:
+                    self.last_used[action] = phase
+        self.__dict__.pop("effects", None) #Now held by the game
+        if "game" not in state:
+            self.game = None #Restored by Game
+        if "death_phase" not in state:
+            self.death_phase = None
+        if not isinstance(self.status, statuses.StatusStore):
+            self.status = statuses.StatusStore.from_lists(self.status)
+
+
+    def __setattr__(self, key, value):
+        """
+        Set an attribute, noting the player has changed since the game's last snapshot
+        """
+        object.__setattr__(self, key, value)
+        self.changed()
+
+
+    def changed(self):
+        """
+        Note the player has changed since the game's last snapshot, so the next one saves them (see snapshots.py)
+        Assigning an attribute does this already, changes in place (eg. to the inventory or statuses) call it directly
+        """
+        changes = getattr(self.__dict__.get("game"), "changes", None) #None while the game is being unpickled
+        if changes is not None and "name" in self.__dict__:
+            changes.add(("player", self.name))
+
+
     def __str__(self):
         return "{}: {}, District: {}{}.\n\tStrength: {Strength}, Defence: {Defence}, Agility: {Agility}, Luck: {Luck}".format(self.name, ("Living" if self.is_alive else "Dead"), self.district, (", Career" if self.is_career else ""), **self.stats) + ("\n\tHolding: {}".format(self.inventory) if self.inventory else "")
 
@@ -147,8 +325,8 @@ class Player:
         Perform the initial stat allocation
         """
         calculated_stats = {a:0 for a in ATTRIBUTES}
-        for _ in range(20):  #Randomly allocate 20 stat points
-            calculated_stats[random.choice(ATTRIBUTES)] += 1
+        for _ in range(STAT_POINTS):  #Randomly allocate 20 stat points
+            calculated_stats[self.game.rng.choice(ATTRIBUTES)] += 1
         bonuses = self._calculate_response_bonuses()
         for b in bonuses: #Apply the remaining 8-10 response points
             calculated_stats[b] += bonuses[b]
@@ -160,8 +338,8 @@ class Player:
         Calculate the additional stat bonuses
         """
         bonuses = [0,0,0]
-        for _ in range(7):
-            bonuses[random.choice(range(3))] += 1
+        for _ in range(RESPONSE_POINTS):
+            bonuses[self.game.rng.choice(range(3))] += 1
         #Combine randomised bonuses with response bonus
         bonuses = [sum(x) for x in zip(sorted(bonuses, reverse=True), self.response_bonus)]
         #Assign bonuses in order of preference
@@ -172,36 +350,78 @@ class Player:
         """
         Perform a "luck roll" to see if Luck bonus is awarded
         """
-        return 1 if random.random() >= invnormalcdf(self.stats['Luck'],7,3) else 0
+        return 1 if self.game.rng.random() >= luck_target(self.stats['Luck']) else 0
 
 
     def _get_item_bonus(self,stat):
         """
         Sum all passive item boosts to a particular stat
+        Totals are kept up to date as items enter and leave the inventory
+        """
+        if DEBUG_CACHES:
+            self._check_item_bonus()
+        return self.item_bonus[stat]
+
+
+    def _update_item_bonus(self, item, sign):
+        """
+        Add (sign = 1) or remove (sign = -1) an item's passive boosts from the totals
+        """
+        if item.usage == "Passive":
+            for stat, bonus in item.bonuses.items():
+                self.item_bonus[stat] += sign * bonus
+
+
+    def _rebuild_item_bonus(self):
+        """
+        Recalculate passive item boost totals from scratch
+        """
+        self.item_bonus = defaultdict(int)
+        for item in self.inventory:
+            self._update_item_bonus(item, 1)
+
+
+    def _check_item_bonus(self):
         """
-        result = sum(x.bonuses[stat] for x in self.inventory if x.usage == "Passive")
-        return result if result is not None else 0
+        Confirm the cached passive item boosts match the inventory
+        """
+        for stat in ATTRIBUTES:
+            expected = sum(x.bonuses[stat] for x in self.inventory if x.usage == "Passive")
+            if self.item_bonus[stat] != expected:
+                raise RuntimeError("{} has cached {} item bonus {}, but inventory gives {}".format(self.name, stat, self.item_bonus[stat], expected))
 
 
     def get_stat(self,stat, debug = False):
         """
         Retrieve value for a player's stat based on various factors
         """
-        factors = self.stats[stat], self._apply_luck(), self.action_bonus[CURRENT_PHASE][stat], self._get_item_bonus(stat)
+        factors = self.stats[stat], self._apply_luck(), self.action_bonus[self.game.current_phase][stat], self._get_item_bonus(stat)
         calculated_stat = sum(factors)
         if debug:
-            print("{} has a {} stat of {}, ({})".format(self.name, stat, calculated_stat, factors))
+            self.game.journal.debug(ROLL, "{} has a {} stat of {}, ({})", self.name, stat, calculated_stat, factors, player = self.name, stat = stat, value = calculated_stat)
         return calculated_stat
 
 
+    def stat_distribution(self, stat):
+        """
+        Calculate every value get_stat could return and its probability
+        Only the luck roll is random, so there are at most two values
+        """
+        base = self.stats[stat] + self.action_bonus[self.game.current_phase][stat] + self._get_item_bonus(stat)
+        luck_chance = 1 - luck_target(self.stats['Luck'])
+        return {base : 1 - luck_chance, base + 1 : luck_chance}
+
+
     def record_action(self, action, target = None):
         """
         Save a record of a player's night action choice
         """
         if target is None:
             target = self
-        self.actions[CURRENT_PHASE].append((action, target))
-        print("Recording action {} {} {}".format(self.name, action, target.name))
+        self.actions[self.game.current_phase].append((action, target))
+        self.last_used[action] = self.game.current_phase
+        self.changed() #Also covers the action bonuses the action goes on to change
+        self.game.journal.info(ACTION, "Recording action {} {} {}", self.name, action, target.name, player = self.name, action = action, target = target.name)
 
 
     def held_bombs(self):
@@ -216,7 +436,9 @@ class Player:
         Set a player as dead and use a held grenade
         """
         self.is_alive = False
-        print("{} is now dead".format(self.name))
+        self.death_phase = self.game.current_phase
+        self.game.player_died(self)
+        self.game.journal.info(DEATH, "{} is now dead", self.name, player = self.name)
         if killer is not None:
             grenades = self.held_bombs()
             if grenades:
@@ -236,6 +458,27 @@ class Player:
         Add an item to player's inventory
         """
         self.inventory.append(item)
+        self._update_item_bonus(item, 1)
+        self.changed()
+
+
+    def remove_item(self, item):
+        """
+        Remove an item from player's inventory
+        """
+        self.inventory.remove(item)
+        self._update_item_bonus(item, -1)
+        self.changed()
+
+
+    def clear_inventory(self):
+        """
+        Remove every item from player's inventory, returning the removed items
+        """
+        removed = self.inventory
+        self.inventory = []
+        self.item_bonus = defaultdict(int)
+        return removed
 
 
     def use_item(self, item):
@@ -243,51 +486,65 @@ class Player:
         Use a held item if possible, destroy it afterwards
         """
         if not item.uses:
-            print("{} tried to use {}, but failed as it has no more uses: {}".format(player.name, item.name, item.uses))
+            self.game.journal.info(ITEM, "{} tried to use {}, but failed as it has no more uses: {}", self.name, item.name, item.uses, player = self.name, item = item.name)
         else:
             item.use()
-            print ("{} used {}, remaining uses: {}".format(self.name, item.name, item.uses))
+            self.changed()
+            self.game.journal.info(ITEM, "{} used {}, remaining uses: {}", self.name, item.name, item.uses, player = self.name, item = item.name)
             if not item.uses:
-                print("{} is destroyed".format(item.name))
-                self.inventory.remove(item)
+                self.game.journal.info(ITEM, "{} is destroyed", item.name, item = item.name)
+                self.remove_item(item)
 
 
     def apply_status(self, status):
         """
         Apply a status affect to player
+        Poison also schedules the player's death
         """
-        self.status[CURRENT_PHASE].append(status)
+        self.status.add(self.game.current_phase, status)
+        self.changed()
+        if status == "Poisoned" and self.game.current_phase > 0:
+            self.game.effects.schedule("Poison", self, self.game.current_phase, self.game.current_phase + POISON_DELAY, order = self.id or 0)
+            self.game.changed("effects")
 
     def poison_death_check(self):
         """
         Check if was poisoned more than 3 nights ago (inclusive)
         """
-        if CURRENT_PHASE < 3:
-            return False
-        return any("Poisoned" in self.status[i] for i in range(1, CURRENT_PHASE - 2))
+        return any(e.night <= self.game.current_phase for e in self.game.effects.pending("Poison", self))
 
     def heal_poison(self):
         """
         Completely remove poison status from player
+        Poison applied tonight is too fresh to be cured
         """
-        for i in range(1, CURRENT_PHASE):
-            if "Poisoned" in self.status[i]:
-                print("{} was poisoned on Night {}".format(self.name, CURRENT_PHASE))
-                self.status[i] = [x for x in self.status[i] if x != "Poisoned"]
-                print("{} has been healed of Poisoning.".format(self.name))
+        cured = self.game.effects.cancel("Poison", self, before = self.game.current_phase)
+        if cured:
+            self.changed()
+            self.game.changed("effects")
+        for i in sorted({e.phase for e in cured}):
+            self.game.journal.info(STATUS, "{} was poisoned on Night {}", self.name, self.game.current_phase, player = self.name, status = "Poisoned")
+            self.status.discard(i, "Poisoned")
+            self.game.journal.info(STATUS, "{} has been healed of Poisoning.", self.name, player = self.name, status = "Poisoned")
 
 
-    def action_on_cooldown(self, action):
+    def is_on_cooldown(self, action, window = 4):
+        """
+        Check if an action has been performed within the last window nights (including tonight), without journalling
+        """
+        last = self.last_used.get(action)
+        return last is not None and 0 < last <= self.game.current_phase and self.game.current_phase - last < window
+
+
+    def action_on_cooldown(self, action, window = 4):
         """
         Check if an action is on cooldown and canot be performed
-        Based on if it has been performed within the last 4 nights
-        """
-        for i in range(CURRENT_PHASE - 3, CURRENT_PHASE + 1):
-            if i > 0:
-                if self.actions[i]:
-                    if any(m[0] == action for m in self.actions[i]):
-                        print("{} has used {} on Night {}".format(self.name, action, i))
-                        return True
+        Based on if it has been performed within the last window nights (including tonight)
+        """
+        if self.is_on_cooldown(action, window):
+            last = self.last_used[action]
+            self.game.journal.info(ACTION, "{} has used {} on Night {}", self.name, action, last, player = self.name, action = action)
+            return True
         return False
 
 
@@ -296,14 +553,14 @@ class Player:
         Check if able to use an action
         Trapped or dead players cannot do anything
         """
-        return "Trapped" not in self.status[CURRENT_PHASE] and self.is_alive
+        return not self.status.has(self.game.current_phase, "Trapped") and self.is_alive
 
 
     def is_protected(self):
         """
         Check if player has been protected tonight
         """
-        return "Protected" in self.status[CURRENT_PHASE]
+        return self.status.has(self.game.current_phase, "Protected")
 
 
     def perform_item_action(self, target, action):
@@ -314,24 +571,13 @@ class Player:
         if available_items:
             selected_item = available_items[0]
             if target.is_alive:
-                self.use_item(selected_item)
+                handler = actions.get_action(action)
+                if handler.consumes_item:
+                    self.use_item(selected_item)
                 self.record_action(action, target)
-                if action == "Investigate":
-                    return self.investigate(target)
-                elif action == "Follow":
-                    return self.follow(target)
-                elif action == "Protect":
-                    return self.protect(target)
-                elif action == "Heal":
-                    return self.heal(target)
-                elif action == "Trap":
-                    return self.trap(target)
-                elif action == "Poison":
-                    return self.poison(target)
-                elif action == "Bomb":
-                    return self.bomb(target)
+                return handler.perform(self, target)
             else:
-                print("Target {} is already dead".format(target.name))
+                self.game.journal.info(ACTION, "Target {} is already dead", target.name, target = target.name)
                 return "Failed - Target Dead"
 
 
@@ -340,15 +586,11 @@ class Player:
         Investigate a target player to learn their alignment and stats (Telescope)
         """
         if target.is_alive:
-            if target != self:
-                print("{} successfully investigates {} and learns they are {}, and their stats are {}".format(self.name, target.name, "Career" if target.is_career else "Tribute" , target.stats))
-                #Stats are sent to player in PM, do not actually need to be recorded in game
-                return "Success: {}".format("Career" if target.is_career else "Tribute")
-            else: #Can't investigate self
-                print("{} tried to investigate {} but failed as they cannot protect themself".format(self.name, target.name))
-                return "Failed: Self Target"
+            self.game.journal.info(ACTION, "{} successfully investigates {} and learns they are {}, and their stats are {}", self.name, target.name, "Career" if target.is_career else "Tribute" , target.stats, player = self.name, target = target.name)
+            #Stats are sent to player in PM, do not actually need to be recorded in game
+            return "Success: {}".format("Career" if target.is_career else "Tribute")
         else: #Can't investigate dead player
-            print("{} tried to investigates {} but failed as the target is already dead".format(self.name, target.name))
+            self.game.journal.info(ACTION, "{} tried to investigates {} but failed as the target is already dead", self.name, target.name, player = self.name, target = target.name)
             return "Failed: Target already dead"
 
     def follow(self, target):
@@ -356,11 +598,11 @@ class Player:
         Follow a target player to observe their night actions (Scout Drone)
         """
         #As follow can still happen on a player that died this night, need to check when they died
-        if target.is_alive or "Night {}".format(CURRENT_PHASE) in target.death_text:
-            print("{} successfully follows {} and learns they performed {}".format(self.name, target.name, target.actions[CURRENT_PHASE]))
-            return "Success: {}".format(target.actions[CURRENT_PHASE])
+        if target.is_alive or "Night {}".format(self.game.current_phase) in target.death_text:
+            self.game.journal.info(ACTION, "{} successfully follows {} and learns they performed {}", self.name, target.name, target.actions[self.game.current_phase], player = self.name, target = target.name)
+            return "Success: {}".format(target.actions[self.game.current_phase])
         else:
-            print("{} tried to investigates {} but failed as the target is already dead".format(self.name, target.name))
+            self.game.journal.info(ACTION, "{} tried to investigates {} but failed as the target is already dead", self.name, target.name, player = self.name, target = target.name)
             return "Failed: Target already dead"
 
 
@@ -369,16 +611,12 @@ class Player:
         Protect a player from being killed and heal them of poison (MedPack)
         """
         if target.is_alive:
-            if target != self:
-                target.apply_status("Protected")
-                target.heal_poison()
-                print("{} successfully protected {}".format(self.name, target.name))
-                return "Success"
-            else: #Can't protect self
-                print("{} tried to protect {} but failed as they cannot protect themself".format(self.name, target.name))
-                return "Failed: Self Target"
+            target.apply_status("Protected")
+            target.heal_poison()
+            self.game.journal.info(ACTION, "{} successfully protected {}", self.name, target.name, player = self.name, target = target.name)
+            return "Success"
         else: #Can't revive the dead
-            print("{} tried to protect {} but failed as the target is already dead".format(self.name, target.name))
+            self.game.journal.info(ACTION, "{} tried to protect {} but failed as the target is already dead", self.name, target.name, player = self.name, target = target.name)
             return "Failed: Target already dead"
 
 
@@ -390,10 +628,10 @@ class Player:
         if target.is_alive:
             target.apply_status("Protected")
             target.heal_poison()
-            print("{} successfully healed {}".format(self.name, target.name))
+            self.game.journal.info(ACTION, "{} successfully healed {}", self.name, target.name, player = self.name, target = target.name)
             return "Success"
         else: #Can't revive the dead
-            print("{} tried to protect {} but failed as the target is already dead".format(self.name, target.name))
+            self.game.journal.info(ACTION, "{} tried to protect {} but failed as the target is already dead", self.name, target.name, player = self.name, target = target.name)
             return "Failed: Target already dead"
 
 
@@ -402,15 +640,11 @@ class Player:
         Trap a player to prevent them from performing any actions (Trap & Trap Kit)
         """
         if target.is_alive:
-            if target != self:
-                target.apply_status("Trapped")
-                print("{} successfully trapped {}".format(self.name, target.name))
-                return "Success"
-            else:
-                print("{} tried to trap {} but failed as they cannot protect themself".format(self.name, target.name))
-                return "Failed: Self Target"
+            target.apply_status("Trapped")
+            self.game.journal.info(ACTION, "{} successfully trapped {}", self.name, target.name, player = self.name, target = target.name)
+            return "Success"
         else:
-            print("{} tried to trap {} but failed as the target is already dead".format(self.name, target.name))
+            self.game.journal.info(ACTION, "{} tried to trap {} but failed as the target is already dead", self.name, target.name, player = self.name, target = target.name)
             return "Failed: Target already dead"
 
 
@@ -419,15 +653,11 @@ class Player:
         Infect a player with poison so they will die in 3 nights (Poison Dart)
         """
         if target.is_alive:
-            if target != self:
-                target.apply_status("Poisoned")
-                print("{} successfully poisoned {}".format(self.name, target.name))
-                return "Success"
-            else:
-                print("{} tried to poison {} but failed as they cannot poison themself".format(self.name, target.name))
-                return "Failed: Self Target"
+            target.apply_status("Poisoned")
+            self.game.journal.info(ACTION, "{} successfully poisoned {}", self.name, target.name, player = self.name, target = target.name)
+            return "Success"
         else:
-            print("{} tried to poison {} but failed as the target is already dead".format(self.name, target.name))
+            self.game.journal.info(ACTION, "{} tried to poison {} but failed as the target is already dead", self.name, target.name, player = self.name, target = target.name)
             return "Failed: Target already dead"
 
 
@@ -438,19 +668,19 @@ class Player:
         """
         if self._apply_luck(): #Luck can lower the threshold
             threshold -= 0.2
-        roll = random.random()
+        roll = self.game.rng.random()
         result = roll >= threshold
-        print("{} tries to bomb {}. Threshold: {}, roll: {}".format(self.name, target.name, threshold, roll))
+        self.game.journal.info(COMBAT, "{} tries to bomb {}. Threshold: {}, roll: {}", self.name, target.name, threshold, roll, player = self.name, target = target.name)
         if result: #Target was exploded
             target.set_dead(killer = self)
-            print("{} has been killed in an explosion".format(target.name))
-            target.death_text = "Killed by a bomb from {} on Night {}".format(self.name, CURRENT_PHASE)
+            self.game.journal.info(DEATH, "{} has been killed in an explosion", target.name, player = target.name, killer = self.name)
+            target.death_text = "Killed by a bomb from {} on Night {}".format(self.name, self.game.current_phase)
             if target.inventory:
-                print("The following items were destroyed {}".format(target.inventory))
-                target.inventory = []
+                self.game.journal.info(ITEM, "The following items were destroyed {}", target.inventory, player = target.name)
+                target.clear_inventory()
             return "Success"
         else: #Target dodged
-            print("{} has dodged an explosion".format(target.name))
+            self.game.journal.info(COMBAT, "{} has dodged an explosion", target.name, player = self.name, target = target.name)
             return "Failed: Dodged"
 
 
@@ -460,9 +690,10 @@ class Player:
         """
         self.record_action('Drink ' + serum.name)
         for stat in serum.bonuses:
-            self.action_bonus[CURRENT_PHASE][stat] += serum.bonuses[stat]
-        self.use_item(serum)
-        print("{} successfully drinks {}".format(self.name, serum.name))
+            self.action_bonus[self.game.current_phase][stat] += serum.bonuses[stat]
+        if actions.get_action(serum.ability).consumes_item:
+            self.use_item(serum)
+        self.game.journal.info(ACTION, "{} successfully drinks {}", self.name, serum.name, player = self.name, item = serum.name)
 
 
     def hide(self):
@@ -470,8 +701,8 @@ class Player:
         Hide from attacks to gain a large boost to Agility
         """
         self.record_action('Hide')
-        self.action_bonus[CURRENT_PHASE]['Agility'] += 4
-        print("{} successfully hides".format(self.name))
+        self.action_bonus[self.game.current_phase]['Agility'] += 4
+        self.game.journal.info(ACTION, "{} successfully hides", self.name, player = self.name)
 
 
     def guard(self):
@@ -479,8 +710,8 @@ class Player:
         Brace for attacks to gain a boost to Degence
         """
         self.record_action('Guard')
-        self.action_bonus[CURRENT_PHASE]['Defence'] += 2
-        print("{} successfully guards".format(self.name))
+        self.action_bonus[self.game.current_phase]['Defence'] += 2
+        self.game.journal.info(ACTION, "{} successfully guards", self.name, player = self.name)
 
 
     def attack(self, other, career_kill = False):
@@ -489,24 +720,24 @@ class Player:
         """
         if career_kill: #Career kill has a significant strength boost
             self.record_action("Kill", other)
-            self.action_bonus[CURRENT_PHASE]['Strength'] += 4
-            print("{} attempts a Career kill on {}".format(self.name, other.name))
+            self.action_bonus[self.game.current_phase]['Strength'] += 4
+            self.game.journal.info(COMBAT, "{} attempts a Career kill on {}", self.name, other.name, player = self.name, target = other.name)
         else:
             self.record_action("Attack", other)
-            print("{} attempts an attack on {}".format(self.name, other.name))
+            self.game.journal.info(COMBAT, "{} attempts an attack on {}", self.name, other.name, player = self.name, target = other.name)
 
         #Perform the search roll
         search_result = self.search_check(other)
         if not search_result: #Can't be found
-            print( "Attack Failed, {} could not locate {}".format(self.name, other.name))
+            self.game.journal.info(COMBAT, "Attack Failed, {} could not locate {}", self.name, other.name, player = self.name, target = other.name)
             if career_kill:
-                self.action_bonus[CURRENT_PHASE]['Strength'] -= 4 #remove the bonus
+                self.action_bonus[self.game.current_phase]['Strength'] -= 4 #remove the bonus
             return CombatOutcome.hidden
         else:
             #Engage in combat
             combat_result = self.combat(other)
             if career_kill:
-                self.action_bonus[CURRENT_PHASE]['Strength'] -= 4 #remove the bonus
+                self.action_bonus[self.game.current_phase]['Strength'] -= 4 #remove the bonus
             return combat_result
 
 
@@ -520,13 +751,11 @@ class Player:
         a2 = other.get_stat('Agility', TRACE)
         agility_delta = a1 - a2
 
-        if CURRENT_PHASE > 7: #Fatigue Mode
-            target = invnormalcdf(agility_delta,-4,4) #Strongly biased
-        else:
-            target = invnormalcdf(agility_delta,-1,4)
+        #Fatigue Mode is strongly biased
+        target = check_target("Search", agility_delta, is_fatigued(self.game.current_phase))
 
-        roll = random.random()
-        print_roll_results("Search", target, roll)
+        roll = self.game.rng.random()
+        print_roll_results("Search", target, roll, self.game.journal)
         return roll >= target
 
 
@@ -538,22 +767,22 @@ class Player:
         attack_result = self.attack_check(other)
         if attack_result == CombatOutcome.success:
             if other.is_protected(): #Opponent saved by protection
-                print( "Attack Prevented, {} tried to kill {}, but failed as target is protected".format(self.name, other.name))
+                self.game.journal.info(COMBAT, "Attack Prevented, {} tried to kill {}, but failed as target is protected", self.name, other.name, player = self.name, target = other.name)
                 return CombatOutcome.success_protected
             else: #Successfully killed
                 other.set_dead(killer = self)
-                other.death_text = "Killed by {} on Night {}".format(self.name, CURRENT_PHASE)
-                print( "Attack Succeeded, {} killed {}".format(self.name, other.name))
+                other.death_text = "Killed by {} on Night {}".format(self.name, self.game.current_phase)
+                self.game.journal.info(COMBAT, "Attack Succeeded, {} killed {}", self.name, other.name, player = self.name, target = other.name)
         elif attack_result == CombatOutcome.failed: #Opponent blocked but no counter
-            print( "Attack Failed, {} defended against {}".format(other.name, self.name))
+            self.game.journal.info(COMBAT, "Attack Failed, {} defended against {}", other.name, self.name, player = self.name, target = other.name)
         elif attack_result == CombatOutcome.countered:
             if self.is_protected(): #Counterattack prevented by protection
-                print( "Counter Prevented, {} was countered by {}, but survived as they are protected".format(self.name, other.name))
+                self.game.journal.info(COMBAT, "Counter Prevented, {} was countered by {}, but survived as they are protected", self.name, other.name, player = self.name, target = other.name)
                 return CombatOutcome.countered_protected
             else: #Killed in a counter attack :(
                 self.set_dead(killer = other)
-                other.death_text = "Counter killed by {} on Night {}".format(other.name, CURRENT_PHASE)
-                print( "Attack Failed, {} was counter killed by {}".format(self.name, other.name))
+                other.death_text = "Counter killed by {} on Night {}".format(other.name, self.game.current_phase)
+                self.game.journal.info(COMBAT, "Attack Failed, {} was counter killed by {}", self.name, other.name, player = self.name, target = other.name)
         return attack_result
 
 
@@ -567,13 +796,11 @@ class Player:
         d2 = other.get_stat('Defence', TRACE)
         combat_delta = s1 - d2
 
-        if CURRENT_PHASE > 7: #Fatigue Mode
-            target = invnormalcdf(combat_delta,-1,4) #Slightly biased
-        else:
-            target = invnormalcdf(combat_delta,0,4)
+        #Fatigue Mode is slightly biased
+        target = check_target("Attack", combat_delta, is_fatigued(self.game.current_phase))
 
-        roll = random.random()
-        print_roll_results("Attack", target, roll)
+        roll = self.game.rng.random()
+        print_roll_results("Attack", target, roll, self.game.journal)
         result =  roll >= target
         if result:
             return CombatOutcome.success
@@ -592,27 +819,75 @@ class Player:
         s2 = other.get_stat('Strength', TRACE)
         combat_delta = s2 - d1
 
-        if CURRENT_PHASE > 7: #Fatigue mode
-            target = invnormalcdf(combat_delta,2,4) #Slightly less biased
-        else:
-            target = invnormalcdf(combat_delta,3,4)
-        print_roll_results("Counter", target, roll)
+        #Fatigue mode is slightly less biased
+        target = check_target("Counter", combat_delta, is_fatigued(self.game.current_phase))
+        print_roll_results("Counter", target, roll, self.game.journal)
         result = roll >= target
         return result
 
 
+    def check_odds(self, other):
+        """
+        Calculate the exact chance of each attack_check result against an opponent
+        Enumerates the luck rolls of every stat involved
+        Returns (success, failed, countered) probabilities
+        """
+        fatigue = is_fatigued(self.game.current_phase)
+        attack_deltas = delta_distribution(self.stat_distribution('Strength'), other.stat_distribution('Defence'))
+        counter_deltas = delta_distribution(other.stat_distribution('Strength'), self.stat_distribution('Defence'))
+
+        success = failed = countered = 0.0
+        for attack_delta, attack_p in attack_deltas.items():
+            attack_target = check_target("Attack", attack_delta, fatigue)
+            success += attack_p * (1 - attack_target)
+            #A failed roll is uniform below the attack target, the counter uses its inverse
+            for counter_delta, counter_p in counter_deltas.items():
+                counter_target = check_target("Counter", counter_delta, fatigue)
+                counter_chance = min(attack_target, max(0.0, 1 - counter_target))
+                countered += attack_p * counter_p * counter_chance
+                failed += attack_p * counter_p * (attack_target - counter_chance)
+        return success, failed, countered
+
+
+    def combat_odds(self, other, career_kill = False, search = True):
+        """
+        Calculate the exact chance of each CombatOutcome when attacking an opponent
+        Mirrors attack (search = True) or combat (search = False) without rolling
+        Returns a dictionary keyed by the CombatOutcome names
+        """
+        if career_kill:
+            self.action_bonus[self.game.current_phase]['Strength'] += 4
+        try:
+            if search:
+                search_deltas = delta_distribution(self.stat_distribution('Agility'), other.stat_distribution('Agility'))
+                found = sum(p * (1 - check_target("Search", delta, is_fatigued(self.game.current_phase))) for delta, p in search_deltas.items())
+            else:
+                found = 1.0
+            success, failed, countered = self.check_odds(other)
+        finally:
+            if career_kill:
+                self.action_bonus[self.game.current_phase]['Strength'] -= 4 #remove the bonus
+
+        odds = {"hidden" : 1 - found, "failed" : found * failed,
+            "success" : 0.0, "success_protected" : 0.0,
+            "countered" : 0.0, "countered_protected" : 0.0}
+        odds["success_protected" if other.is_protected() else "success"] = found * success
+        odds["countered_protected" if self.is_protected() else "countered"] = found * countered
+        return odds
+
+
     def raid(self, other):
         """
         Raid an item from opponent after killing them
         Randomly select an item from their inventory and add to player's
         """
         if other.inventory:
-            raided_item = random.choice(other.inventory)
+            raided_item = self.game.rng.choice(other.inventory)
             self.add_item(raided_item)
-            other.inventory.remove(raided_item)
-            print("Player: {} raided a {} from {}".format(self.name, raided_item.name, other.name))
+            other.remove_item(raided_item)
+            self.game.journal.info(ITEM, "Player: {} raided a {} from {}", self.name, raided_item.name, other.name, player = self.name, item = raided_item.name, target = other.name)
         else:
-            print("Player: {} attempted to raid from {}, but was unsuccessful as they were not carrying anything".format(self.name, other.name))
+            self.game.journal.info(ITEM, "Player: {} attempted to raid from {}, but was unsuccessful as they were not carrying anything", self.name, other.name, player = self.name, target = other.name)
 
 #An "Enum" of CombatOutcome results
 class CombatOutcome:
@@ -632,29 +907,121 @@ class Game:
     Simulate and process night actions and player interactions
     """
 
+    #Reproduce the original raffle draws in stat_based_selection so old games replay identically
+    legacy_draws = True
+    #Optional SQLite database saved alongside the pickles, see open_store
+    store = None
+    #Where save_game writes the pickle, backups and database
+    backup_dir = BACKUP_DIR
+    #How often timestamped backups are written in full, and how many are kept
+    snapshot_policy = snapshots.RetentionPolicy()
+    #Seed for each phase, the last is used for the Feast (simulated games use their own)
+    seeds = SEEDS
+    #Phase the Feast is held on, None for no Feast
+    feast_phase = 9
+    #Attributes never saved with the game
+    unsaved = ("store", "journal", "_ordered", "_living", "changes", "last_snapshot")
+
     def __init__(self, name = "game"):
         """
         Create a new game object with required properties
         """
+        self.changes = set() #("player", name) and ("game", attribute) changed since the last snapshot, see changed
+        self.last_snapshot = None #Path of the snapshot the game was last saved to or loaded from
         self.current_phase = 0
         self.game_name = name
+        self.game_id = uuid.uuid4().hex #Tells snapshots of different games with the same name apart
         self.players = {}
         self.kingpin = None
+        self._ordered = [] #Players in id order, kept alongside players (see index_players)
+        self._living = {} #Living players in id order, removed as they die
         self.careers = []
         self.night_actions = {}
-        self.action_priotities = {"Serum" : -10, "Trap" : -5, "Heal" : -1, "Protect" : -1, "Investigate" : -1, "Bomb" : - 1, "Poison" : -1, "Hide" : 1, "Guard" : 2, "Attack" : 3, "Kill": 3, "Follow" : 5}
-        self.cooldown_actions = {"Attack", "Guard", "Hide"} #This actions have a cooldown
         self.dropped_items = []
+        self.effects = effects.EffectQueue()
+        self.votes = lynch.VoteTally()
+        self.results = results.ResultsSink(name)
+        self.rng = random.Random(self.seeds[self.current_phase])
+        self.journal = JOURNAL.fork() #Events of this game only, at the phase this game is in
+
+
+    def __setstate__(self, state):
+        """
+        Restore a pickled game, rebuilding state missing from older saves
+        """
+        self.__dict__.update(state)
+        self.index_players()
+        for player in self.get_players():
+            player.game = self
+        if "rng" not in state:
+            #Older saves used the global random module, seeded each phase
+            self.rng = random.Random(self.seeds[self.current_phase])
+        if "effects" not in state:
+            #Older saves only recorded poison as a status
+            self.effects = effects.EffectQueue()
+            for player in self.get_players():
+                for phase in player.status.phases():
+                    if player.status.has(phase, "Poisoned") and phase > 0:
+                        self.effects.schedule("Poison", player, phase, phase + POISON_DELAY, order = player.id or 0)
+        if "votes" not in state:
+            self.votes = lynch.VoteTally()
+        if "results" not in state:
+            self.results = results.ResultsSink(self.game_name)
+        if "game_id" not in state:
+            self.game_id = uuid.uuid4().hex
+        self.journal = JOURNAL.fork()
+        self.journal.phase = self.current_phase
+        self.changes = set()
+        self.last_snapshot = None
+
+
+    def __getstate__(self):
+        """
+        Pickle everything except the database connection, journal, player indexes and snapshot bookkeeping
+        """
+        state = dict(self.__dict__)
+        for key in self.unsaved:
+            state.pop(key, None)
+        return state
+
+
+    def __setattr__(self, key, value):
+        """
+        Set an attribute, noting it has changed since the last snapshot
+        """
+        object.__setattr__(self, key, value)
+        if key not in self.unsaved and "changes" in self.__dict__:
+            self.changes.add(("game", key))
+
+
+    def changed(self, *keys):
+        """
+        Note attributes changed in place since the last snapshot, so the next one saves them (see snapshots.py)
+        Assigning an attribute does this already
+        """
+        self.changes.update(("game", key) for key in keys)
+
+
+    def open_store(self, path = None):
+        """
+        Also save the game to an SQLite database (defaults to backup/<game name>.db)
+        Each save then writes only the players that changed, along with the phase's results
+        """
+        if path is None:
+            path = os.path.join(self.backup_dir, "{}.db".format(self.game_name))
+        self.store = storage.GameStore(path)
+        self.results.listeners.append(self.store.add_results)
+        return self.store
 
 
     def set_phase(self, phase):
         """
-        Set the current game phase and update random seed
+        Set the current game phase and reseed the game's random numbers
         """
-        if phase >= len(SEEDS):
+        if phase >= len(self.seeds):
             raise ValueError("Phase number too high - Not enough Seeds")
-        self.current_phase = phase
-        random.seed(SEEDS[self.current_phase])
+        self.current_phase = self.journal.phase = phase
+        self.rng.seed(self.seeds[self.current_phase])
 
 
     def get_action_priority(self, action):
@@ -663,7 +1030,7 @@ class Game:
         Defaults to 0
         Lower numbers go first
         """
-        return self.action_priotities[action] if action in self.action_priotities else 0
+        return actions.get_action(action).priority
 
 
     def get_players_from_csv(self, path):
@@ -677,18 +1044,71 @@ class Game:
             return retrieved_players
 
 
+    def index_players(self):
+        """
+        Rebuild the id ordered and living player indexes from players
+        Only needed after changing players directly, add_player, rename_player and deaths keep them up to date
+        """
+        self._ordered = sorted(self.players.values(), key = lambda x: (x.id is None, x.id or 0)) #Players without an id go last
+        self._living = dict.fromkeys(p for p in self._ordered if p.is_alive)
+
+
+    def add_player(self, player):
+        """
+        Add a player to the game, keeping the player indexes in id order
+        Players without an id are given the next one (and a district, as create_players_from_responses does)
+        """
+        if len(self._ordered) != len(self.players):
+            self.index_players()
+        last = self._ordered[-1].id if self._ordered else -1
+        if player.id is None and last is not None:
+            player.id = last + 1
+            if player.district is None:
+                player.district = (player.id // 2) + 1
+        replacing = player.name in self.players
+        self.players[player.name] = player
+        player.game = self
+        if not replacing and player.id is not None and last is not None and last <= player.id:
+            self._ordered.append(player)
+            if player.is_alive:
+                self._living[player] = None
+        else:
+            self.index_players()
+
+
+    def rename_player(self, old, new):
+        """
+        Change a player's name, keeping their place in the id order (eg. when a player is replaced)
+        """
+        player = self.players.pop(old)
+        player.changed() #Under the old name, so snapshots drop it
+        player.name = new
+        self.players[new] = player
+
+
+    def player_died(self, player):
+        """
+        Remove a player from the living players (called by Player.set_dead)
+        """
+        self._living.pop(player, None)
+
+
     def get_players(self):
         """
         Retrieve useful representation of players
         """
-        return sorted(list(self.players.values()), key = lambda x: x.id)
+        if len(self._ordered) != len(self.players): #Players were added directly
+            self.index_players()
+        return list(self._ordered)
 
 
     def get_living_players(self):
         """
         Retrieve list of all living players
         """
-        return [p for p in self.get_players() if p.is_alive]
+        if len(self._ordered) != len(self.players):
+            self.index_players()
+        return list(self._living)
 
 
     def get_player_by_name(self, name):
@@ -712,6 +1132,7 @@ class Game:
             cur_player = self.get_player_by_name(name)
             cur_player.is_career = True
             self.careers.append(cur_player)
+        self.changed("careers")
 
 
     def create_players_from_responses(self, path):
@@ -730,39 +1151,27 @@ class Game:
                     if n in '012':
                         current_preferences[int(n)] = stat
                 #Create the new player
-                p = Player(current_info['Name'], current_preferences, True if line['Bonus'] == 'T' else False)
+                p = Player(current_info['Name'], current_preferences, True if line['Bonus'] == 'T' else False, game = self)
                 #Set ID and district
                 p.id = i
                 p.district = (i // 2) + 1
                 #Store player
-                self.players[p.name] = p
+                self.add_player(p)
 
 
     def create_days_items(self, day):
         """
         Create items to be distributed as sponsor gifts
-        Items to be created are read from csv file
-        """
-        with open("ItemDrops.csv") as f:
-            lines = list(csv.DictReader(f))
-
-        #Get current items
-        line = [l for l in lines if l["Day"] == str(day)]
-        if len(line) > 1: #Should only be one entry per day
-            raise ValueError("More than one entry for Day {}".format(day))
-        elif len(line) == 1:
-            line = line[0] #Get first (and only) entry
-            new_items = [items.create_item(s) for s in line["Items"].split()]
-            return new_items
-        else:
-            return [] #No items for you
+        Items to be created are read from csv file (parsed once, and again only if it changes)
+        """
+        return drops.load_item_schedule("ItemDrops.csv").create_items(day)
 
     def distribute_sponsor_items(self, day):
         """
         Determine who gets each of the day's sponsor items
         """
         sponsor_items = self.create_days_items(day)
-        random.shuffle(sponsor_items)
+        self.rng.shuffle(sponsor_items)
         recipients = self.stat_based_selection(selection_players = self.get_living_players(), selection_stats = ['Luck'], positive = True, n = len(sponsor_items))
         self.assign_items_to_players(recipients, sponsor_items, day)
 
@@ -770,17 +1179,14 @@ class Game:
     def assign_items_to_players(self, recipients, items, day):
         """
         Add sponsor items to selecter players' inventory
-        Record the results as csv, but always saves to the same file *facepalm*
-        It should really append...
+        Record the results, appending to Item_Assignments.csv
         """
-        with open("Item_Assignments.csv", 'w', newline='') as f: #TODO Append...
-            wrt = csv.DictWriter(f, ["Player", "Item"])
-            wrt.writeheader()
-            for index, item in enumerate(items):
-                #Give one item to each player
-                recipients[index].add_item(item)
-                print("{} retrieved {}". format(recipients[index].name, item.name))
-                wrt.writerow({"Player": recipients[index].name, "Item": item.name})
+        wrt = self.results.writer("Sponsor", day, "Item_Assignments.csv", ["Player", "Item"], mode = 'a')
+        for index, item in enumerate(items):
+            #Give one item to each player
+            recipients[index].add_item(item)
+            self.journal.info(ITEM, "{} retrieved {}", recipients[index].name, item.name, player = recipients[index].name, item = item.name)
+            wrt.writerow({"Player": recipients[index].name, "Item": item.name, "Action": "receives", "Target": item.name})
 
 
     def run_cornucopia(self, cornucopia_players):
@@ -789,76 +1195,56 @@ class Game:
         Players receive items based on combined Luck & Agility
         Afterwards, some players engage in combat
         """
-        print("Running Cornucopia:", cornucopia_players)
-        with open("Cornucopia_results.csv", 'w', newline='') as f:
-            wrt = csv.DictWriter(f, ["Player", "Action", "Target", "Result"])
-            wrt.writeheader()
+        self.journal.info(GAME, "Running Cornucopia: {}", cornucopia_players)
+        wrt = self.results.writer("Cornucopia", 0, "Cornucopia_results.csv", ["Player", "Action", "Target", "Result"])
 
-            #Create cornucopia items
-            available = self.create_days_items(0)
-            random.shuffle(available)
-
-            #Sort based on combined Luck + Agility
-            ranked_players = sorted(cornucopia_players, reverse = True, key = lambda x : x.stats['Luck'] + x.stats['Agility'])
-
-            #Assign items to highet ranked players
-            for index, item in enumerate(available):
-                ranked_players[index].add_item(item)
-                print("{} retrieved {}". format(ranked_players[index].name, item.name))
-                wrt.writerow({"Player": ranked_players[index].name, "Action": "receives", "Target": item.name })
-
-            ### Run cornucopia combat
-
-            #Determine number of combats
-            n_combats = len(cornucopia_players) // 7
-
-            for c in range(n_combats):
-                #Randomly pick two players to fight, lower Luck & Agility more likely to fight
-                p1, p2 = self.stat_based_selection(selection_players = cornucopia_players, selection_stats = ['Luck', 'Agility'], positive = False, n = 2)
-                while p1.is_career and p2.is_career:  #Careers shouldnd't fight each other
-                    p1, p2 = self.stat_based_selection(selection_players = cornucopia_players, selection_stats = ['Luck', 'Agility'], positive = False, n = 2)
-                p1a, p2a = p1.get_stat('Agility'), p2.get_stat("Agility")
-
-                #Faster player goes on the attack (generally better even if you have low strength)
-                if p1a > p2a:
-                    attacking = p1
-                    defending = p2
-                #break ties based on when you submitted
-                elif p1a == p2a:
-                    if cornucopia_players.index(p1) > cornucopia_players.index(p2):
-                        attacking = p1
-                        defencing = p2
-                    else:
-                        attacking = p2
-                        defending = p1
-                else:
-                    attacking = p2
-                    defending = p1
-
-                print("Cornucopia Combat {} vs {}".format(attacking.name, defending.name))
-
-                #Run combat and evaluate outcome
-                combat_res = attacking.combat(defending)
-
-                if combat_res == CombatOutcome.success:
-                    attacking.raid(defending)
-                    self.player_item_drop(defending)
-                    outcome = "Success"
-                elif combat_res == CombatOutcome.countered:
-                    defending.raid(attacking)
-                    self.player_item_drop(attacking)
-                    outcome = "Countered"
-                elif combat_res == CombatOutcome.failed:
-                    outcome = "Failed"
-
-                wrt.writerow({"Player": attacking.name, "Action": "attacks", "Target": defending.name, "Result": outcome })
+        #Create cornucopia items
+        available = self.create_days_items(0)
+        self.rng.shuffle(available)
+
+        #Sort based on combined Luck + Agility
+        ranked_players = sorted(cornucopia_players, reverse = True, key = lambda x : x.stats['Luck'] + x.stats['Agility'])
+
+        #Assign items to highet ranked players
+        for index, item in enumerate(available):
+            ranked_players[index].add_item(item)
+            self.journal.info(ITEM, "{} retrieved {}", ranked_players[index].name, item.name, player = ranked_players[index].name, item = item.name)
+            wrt.writerow({"Player": ranked_players[index].name, "Action": "receives", "Target": item.name })
+
+        ### Run cornucopia combat
+
+        #Determine number of combats
+        n_combats = len(cornucopia_players) // 7
+
+        for c in range(n_combats):
+            attacking, defending = self.select_combatants(cornucopia_players)
+
+            self.journal.info(COMBAT, "Cornucopia Combat {} vs {}", attacking.name, defending.name, player = attacking.name, target = defending.name)
+
+            #Run combat and evaluate outcome
+            combat_res = attacking.combat(defending)
+
+            if combat_res == CombatOutcome.success:
+                attacking.raid(defending)
+                self.player_item_drop(defending)
+                outcome = "Success"
+            elif combat_res == CombatOutcome.countered:
+                defending.raid(attacking)
+                self.player_item_drop(attacking)
+                outcome = "Countered"
+            elif combat_res == CombatOutcome.failed:
+                outcome = "Failed"
+
+            wrt.writerow({"Player": attacking.name, "Action": "attacks", "Target": defending.name, "Result": outcome })
+
+        self.results.flush()
 
     def run_feast(self, feast_players):
         """
         Simulate Feast events
         Similar process to Cornucopia, item assignments and then combat
         """
-        random.seed(SEEDS[-1]) #Feast uses different seed to night
+        self.rng.seed(self.seeds[-1]) #Feast uses different seed to night
 
         #Create special feast items
         new_items = self.create_days_items(-1)
@@ -866,77 +1252,57 @@ class Game:
         #Determine who gets the new (powerful) items based on Luck & Agility
         players_retrieving_item = self.stat_based_selection(selection_players = feast_players, selection_stats = ['Luck', 'Agility'], positive = True, n = len(new_items))
 
-        with open("Feast_results.csv", 'w', newline='') as f:
-            wrt = csv.DictWriter(f, ["Player", "Action", "Target", "Result"])
-            wrt.writeheader()
+        wrt = self.results.writer("Feast", self.current_phase, "Feast_results.csv", ["Player", "Action", "Target", "Result"])
+
+        #Assign the new items
+        for index, item in enumerate(new_items):
+            players_retrieving_item[index].add_item(item)
+            self.journal.info(ITEM, "{} retrieved new item {}", players_retrieving_item[index].name, item.name, player = players_retrieving_item[index].name, item = item.name)
+            wrt.writerow({"Player": players_retrieving_item[index].name, "Action": "receives", "Target": item.name })
+
+        #Now determine who gets the remainder of the dropped items
+        ranked_players = self.stat_based_selection(selection_players = feast_players, selection_stats = ['Luck', 'Agility'], positive = True, n = len(feast_players))
+        while self.dropped_items:
+            if not ranked_players: #Regenerate player list of more items than players
+                ranked_players = self.stat_based_selection(selection_players = feast_players, selection_stats = ['Luck', 'Agility'], positive = True, n = len(feast_players))
+            #Assign next item to next player
+            cur_player = ranked_players.pop(0)
+            cur_item = self.dropped_items.pop()
+            self.changed("dropped_items")
+            cur_player.add_item(cur_item)
+
+            self.journal.info(ITEM, "{} retrieved {}", cur_player.name, cur_item.name, player = cur_player.name, item = cur_item.name)
+            wrt.writerow({"Player": cur_player.name, "Action": "receives", "Target": cur_item.name })
+
+        ###FEAST COMBAT
 
-            #Assign the new items
-            for index, item in enumerate(new_items):
-                players_retrieving_item[index].add_item(item)
-                print("{} retrieved new item {}". format(players_retrieving_item[index].name, item.name))
-                wrt.writerow({"Player": players_retrieving_item[index].name, "Action": "receives", "Target": item.name })
-
-            #Now determine who gets the remainder of the dropped items
-            ranked_players = self.stat_based_selection(selection_players = feast_players, selection_stats = ['Luck', 'Agility'], positive = True, n = len(feast_players))
-            while self.dropped_items:
-                if not ranked_players: #Regenerate player list of more items than players
-                    ranked_players = self.stat_based_selection(selection_players = feast_players, selection_stats = ['Luck', 'Agility'], positive = True, n = len(feast_players))
-                #Assign next item to next player
-                cur_player = ranked_players.pop(0)
-                cur_item = self.dropped_items.pop()
-                cur_player.add_item(cur_item)
-
-                print("{} retrieved {}". format(cur_player.name, cur_item.name))
-                wrt.writerow({"Player": cur_player.name, "Action": "receives", "Target": cur_item.name })
-
-            ###FEAST COMBAT
-
-            n_combats = 2 #Constant as late game
-            has_fought = set()
-            #This is the same as Cornucopia
-            for c in range(n_combats):
-                p1, p2 = self.stat_based_selection(selection_players = feast_players, selection_stats = ['Luck', 'Agility'], positive = False, n = 2)
-                while p1.is_career and p2.is_career or p1 in has_fought or p2 in has_fought:  #Careers shouldnd't fight each other, and one fight per person
-                    p1, p2 = self.stat_based_selection(selection_players = feast_players, selection_stats = ['Luck', 'Agility'], positive = False, n = 2)
-                has_fought.add(p1)
-                has_fought.add(p2)
-                p1a, p2a = p1.get_stat('Agility'), p2.get_stat("Agility")
-
-                #Faster player goes on the attack (generally better even if you have low strength)
-                if p1a > p2a:
-                    attacking = p1
-                    defending = p2
-                #break ties based on when you submitted
-                elif p1a == p2a:
-                    if feast_players.index(p1) > feast_players.index(p2):
-                        attacking = p1
-                        defencing = p2
-                    else:
-                        attacking = p2
-                        defending = p1
-                else:
-                    attacking = p2
-                    defending = p1
-
-                print("Cornucopia Combat {} vs {}".format(attacking.name, defending.name))
-
-
-                combat_res = attacking.combat(defending)
-
-                if combat_res == CombatOutcome.success:
-                    attacking.raid(defending)
-                    self.player_item_drop(defending)
-                    outcome = "Success"
-                elif combat_res == CombatOutcome.countered:
-                    defending.raid(attacking)
-                    self.player_item_drop(attacking)
-                    outcome = "Countered"
-                elif combat_res == CombatOutcome.failed:
-                    outcome = "Failed"
-
-                wrt.writerow({"Player": attacking.name, "Action": "attacks", "Target": defending.name, "Result": outcome })
-
-        random.seed(SEEDS[self.current_phase]) #Restore the seed to normal
+        n_combats = 2 #Constant as late game
+        has_fought = set()
+        #This is the same as Cornucopia
+        for c in range(n_combats):
+            attacking, defending = self.select_combatants(feast_players, exclude = has_fought) #One fight per person
+            has_fought.add(attacking)
+            has_fought.add(defending)
+
+            self.journal.info(COMBAT, "Cornucopia Combat {} vs {}", attacking.name, defending.name, player = attacking.name, target = defending.name)
+
+
+            combat_res = attacking.combat(defending)
+
+            if combat_res == CombatOutcome.success:
+                attacking.raid(defending)
+                self.player_item_drop(defending)
+                outcome = "Success"
+            elif combat_res == CombatOutcome.countered:
+                defending.raid(attacking)
+                self.player_item_drop(attacking)
+                outcome = "Countered"
+            elif combat_res == CombatOutcome.failed:
+                outcome = "Failed"
+
+            wrt.writerow({"Player": attacking.name, "Action": "attacks", "Target": defending.name, "Result": outcome })
+
+        self.rng.seed(self.seeds[self.current_phase]) #Restore the seed to normal
 
 
     def final_battle(self, player1, player2, lives = 3):
@@ -948,6 +1314,9 @@ class Game:
 
         player1.battle_lives = player2.battle_lives = lives
 
+        odds = self.final_battle_odds(player1, player2, lives)
+        self.journal.info(COMBAT, "Final battle odds: {} {:.1%}, {} {:.1%}", player1.name, odds[player1], player2.name, odds[player2])
+
         #Determine who attacks first
         p1a = player1.get_stat("Agility")
         p2a = player2.get_stat("Agility")
@@ -957,7 +1326,7 @@ class Game:
             first, second = player2, player1
         elif p1a == p2a: #Randomly assign if Agility is equal
             players = [player1, player2]
-            random.shuffle(players)
+            self.rng.shuffle(players)
             first, second = players
 
         #Perform the combat rounds
@@ -975,83 +1344,132 @@ class Game:
                     first.battle_lives -= 1
                 elif attack_result == CombatOutcome.countered:
                     second.battle_lives -= 1
-            print("Round {}, {} lives: {}, {} lives: {}".format(cur_round, player1.name, player1.battle_lives, player2.name, player2.battle_lives))
+            self.journal.info(COMBAT, "Round {}, {} lives: {}, {} lives: {}", cur_round, player1.name, player1.battle_lives, player2.name, player2.battle_lives)
             cur_round += 1
 
         #Check if someone has won yet
         if player1.battle_lives > 0:
-            print("{} Wins the Hunger Games!!!".format(player1.name))
+            self.journal.info(GAME, "{} Wins the Hunger Games!!!", player1.name)
             player2.set_dead();
         elif player2.battle_lives > 0:
-            print("{} Wins the Hunger Games!!!".format(player2.name))
+            self.journal.info(GAME, "{} Wins the Hunger Games!!!", player2.name)
             player1.set_dead();
 
 
-    def stat_based_selection(self, selection_players, selection_stats, positive = True, n = 1, unique = True):
+    def final_battle_odds(self, player1, player2, lives = 3):
         """
-        Randomly select a player from a group, with odds proportional to stat(s)
-        Creates a pool of names, similar to a raffle, with multiple entries per player
-        Higher stats means more entries into the pool
-        Then a name is randomly chosen from the pool
-        Setting positive = False will invert stats (low stats more likely chosen)
+        Calculate the exact chance of each player winning the final battle
+        Accounts for who attacks first, which is decided by an Agility roll
+        Returns a dictionary of win chances keyed by player
         """
+        player1_odds, player2_odds = player1.check_odds(player2), player2.check_odds(player1)
+        player1_wins_first = battle_win_chance(player1_odds, player2_odds, lives, lives)
+        player2_wins_first = battle_win_chance(player2_odds, player1_odds, lives, lives)
+
+        #Chance player1 attacks first, ties are decided by a coin flip
+        agility_deltas = delta_distribution(player1.stat_distribution("Agility"), player2.stat_distribution("Agility"))
+        player1_first = sum(p for delta, p in agility_deltas.items() if delta > 0) + agility_deltas[0] / 2
+
+        player1_chance = player1_first * player1_wins_first + (1 - player1_first) * (1 - player2_wins_first)
+        return {player1 : player1_chance, player2 : 1 - player1_chance}
 
-        if n > len(selection_players) and unique:
-            raise ValueError("Unable to select {} unique players from {}".format(n, len(selection_players)))
 
-        distribution = []
+    def _selection_weights(self, selection_players, selection_stats, positive = True):
+        """
+        Raffle entries for each living player, by their combined stats (inverted if not positive)
+        """
         living_selected = [p for p in selection_players if p.is_alive] #Only want to choose living players
-        #This is an easy but memory inefficient way of doing a weighted distribution
-        #The numbers will be small enough that it won't be a problem
         player_scores = {player : 0 for player in living_selected}
         for player in player_scores:
             for stat in selection_stats:
                 player_scores[player] += player.get_stat(stat)
 
-        #Create the distribution pool
-        if positive:
-            distribution = [player for player in living_selected for i in range(player_scores[player])]
+        #Weight each player by their number of raffle entries
+        if positive or not player_scores:
+            weights = [player_scores[player] for player in living_selected]
         else:
             invert = max(player_scores[i] for i in player_scores) + min(player_scores[i] for i in player_scores)
-            distribution = [player for player in living_selected for i in range(invert - player_scores[player])]
-
-        #Select n players from the pool
-        selected = set()
-        ranked_players = []
-        if unique:
-            while len(selected) < n:
-                chosen = random.choice(distribution)
-                if chosen not in selected:
-                    selected.add(chosen)
-                    ranked_players.append(chosen)
-                distribution.remove(chosen)
+            weights = [invert - player_scores[player] for player in living_selected]
+        return living_selected, weights
+
+
+    def stat_based_selection(self, selection_players, selection_stats, positive = True, n = 1, unique = True, legacy = None):
+        """
+        Randomly select a player from a group, with odds proportional to stat(s)
+        Works like a raffle, with one entry per stat point per player
+        Higher stats means more entries into the pool
+        Then a name is randomly chosen from the pool
+        Setting positive = False will invert stats (low stats more likely chosen)
+        Setting legacy = True reproduces the original raffle draws (defaults to legacy_draws)
+        """
+
+        if n > len(selection_players) and unique:
+            raise ValueError("Unable to select {} unique players from {}".format(n, len(selection_players)))
+
+        living_selected, weights = self._selection_weights(selection_players, selection_stats, positive)
+        sampler = sampling.WeightedSampler(living_selected, weights, rng = self.rng)
+        if self.legacy_draws if legacy is None else legacy:
+            return sampler.legacy_sample(n, unique)
+        return sampler.sample(n, unique)
+
+
+    def select_combatants(self, selection_players, exclude = (), legacy = None):
+        """
+        Pick two players to fight at the Cornucopia or Feast, lower Luck & Agility more likely to fight
+        Careers never fight each other, and excluded players (eg. who have already fought) aren't picked
+        The faster player attacks, ties go to whoever submitted later
+        Returns (attacking, defending), raising ValueError if no valid pair exists
+        """
+        candidates = [p for p in selection_players if p.is_alive and p not in exclude]
+        if len(candidates) < 2 or all(p.is_career for p in candidates):
+            raise ValueError("No valid pairing among {}".format([p.name for p in candidates]))
+
+        if self.legacy_draws if legacy is None else legacy:
+            #Original draws: redraw from every player until the pair is valid
+            for _ in range(MAX_PAIRING_ATTEMPTS):
+                p1, p2 = self.stat_based_selection(selection_players = selection_players, selection_stats = ['Luck', 'Agility'], positive = False, n = 2, legacy = True)
+                if not (p1.is_career and p2.is_career or p1 in exclude or p2 in exclude):
+                    break
+            else:
+                raise ValueError("No valid pairing found in {} draws among {}".format(MAX_PAIRING_ATTEMPTS, [p.name for p in candidates]))
         else:
-            ranked_players = random.sample(distribution, n)
+            #Same odds as redrawing, excluded players keep their entries but are never drawn
+            living_selected, weights = self._selection_weights(selection_players, ['Luck', 'Agility'], positive = False)
+            sampler = sampling.WeightedSampler(living_selected, weights, rng = self.rng)
+            p1, p2 = sampler.sample_pair(["Career" if p.is_career else None for p in living_selected],
+                excluded = [i for i, p in enumerate(living_selected) if p in exclude])
 
-        return ranked_players
+        p1a, p2a = p1.get_stat('Agility'), p2.get_stat("Agility")
+        #Faster player goes on the attack (generally better even if you have low strength)
+        #break ties based on when you submitted
+        if p1a > p2a or p1a == p2a and selection_players.index(p1) > selection_players.index(p2):
+            return p1, p2
+        return p2, p1
 
 
     def save_game(self):
         """
-        Save game object to pickle file and create a timestamped backup
+        Save a timestamped snapshot of the game, holding only what changed since the previous one (see snapshots.py)
+        The latest snapshot replaces the full <game name>.dat pickle older games were saved to
         """
+        self.results.flush()
         self.print_players()
         t = datetime.now()
-        cwd = os.path.dirname(os.path.realpath(__file__))
-        sdir = "backup"
         if self.game_name != "game":
-            write_player_file("Players.csv", [p.get_dict() for p in self.get_players()])
-            write_player_file(os.path.join(cwd,sdir,"players_{}-{}-{}-{}.csv".format(t.month, t.day, t.hour, t.minute)), [p.get_dict() for p in self.get_players()])
-        pickle_obj(os.path.join(cwd,sdir,'{}.dat'.format(self.game_name)), self)
-        pickle_obj(os.path.join(cwd,sdir,'{}_{}-{}-{}-{}.dat'.format(self.game_name, t.month, t.day, t.hour, t.minute)), self)
+            self.write_player_file("Players.csv", [p.get_dict() for p in self.get_players()])
+            self.write_player_file(os.path.join(self.backup_dir,"players_{}-{}-{}-{}.csv".format(t.month, t.day, t.hour, t.minute)), [p.get_dict() for p in self.get_players()])
+        snapshots.get_snapshot_store(self.backup_dir, self.game_name, self.snapshot_policy).save(self, t)
+        if self.store is not None:
+            self.store.save_phase(self)
 
 
+    @staticmethod
     def write_player_file(path, player_dicts):
         """
         Write player data to a CSV file
         """
         with open(path, 'w', newline='') as f:
-            wrt = csv.DictWriter(f, ["Name"] + ATTRIBUTES)
+            wrt = csv.DictWriter(f, ["Name"] + ATTRIBUTES + ["Holding"])
             wrt.writeheader()
             wrt.writerows(player_dicts)
 
@@ -1064,19 +1482,20 @@ class Game:
             print(p)
 
 
-    def initial_setup(self):
+    def initial_setup(self, save = True):
         """
         Perform initial game Setup
         Creates players from response CSV, and sets the kingpin
         """
-        print("~~~Initial Setup~~~")
+        self.journal.info(GAME, "~~~Initial Setup~~~")
         self.create_players_from_responses("Responses.csv")
         #self.set_ids_and_districts("saved_players.csv") #Shouldn't need this anymore
-        self.kingpin = random.choice(self.get_players())
+        self.kingpin = self.rng.choice(self.get_players())
         self.kingpin.is_kingpin = True
         self.kingpin.is_career = True
-        print("Kingpin is:", self.kingpin.name)
-        self.save_game()
+        self.journal.info(GAME, "Kingpin is: {}", self.kingpin.name)
+        if save:
+            self.save_game()
 
 
     #This is done in create_players_from_responses now
@@ -1094,93 +1513,126 @@ class Game:
         Run the pregame
         (In this case, just cornucopia, but other things may be needed)
         """
-        print("~~~Pregame~~~")
+        self.journal.info(GAME, "~~~Pregame~~~")
         self.run_cornucopia(self.get_players_from_csv("Cornucopia.csv"))
 
 
-    def run_game_phase(self, phase = None):
+    def read_night_actions(self, phase):
+        """
+        Read all submitted night actions for a phase from CSV
+        """
+        with open("night{}.csv".format(phase)) as f:
+            rdr = csv.DictReader(f)
+            return [dict({"Line" : i}, **line) for i, line in enumerate(rdr)]
+
+
+    def plan_night(self, phase = None):
+        """
+        Read a night's actions and resolve the order they will be performed in
+        Rolls each player's Agility, so pass the plan on to run_game_phase rather than planning twice
+        """
+        if phase is None:
+            phase = self.current_phase
+        return scheduler.plan_night(self, self.read_night_actions(phase), phase)
+
+
+    def run_game_phase(self, phase = None, plan = None):
         """
         Run a game phase (both night and day)
         Lynches a player from lynch file
-        Reads and runs night actions, saving results
+        Reads and runs night actions (or a plan from plan_night), saving results
         Distributes sponsors
         """
         if phase is None:
             phase = self.current_phase
 
         #Day Phase
-        print("~~~Day {}~~~".format(phase))
+        self.journal.info(GAME, "~~~Day {}~~~", phase)
         self.lynch_player_from_file()
 
-        if phase == 9: #Feast occurs here
-            print("~~~Feast ~~~")
+        if phase == self.feast_phase: #Feast occurs here
+            self.journal.info(GAME, "~~~Feast ~~~")
             self.run_feast(self.get_players_from_csv("Feast.csv"))
 
         #Night Phase
-        print("~~~Night {}~~~".format(phase))
+        self.journal.info(GAME, "~~~Night {}~~~", phase)
         cur_living = self.get_living_players()
 
         if len(cur_living) == 2: #Final two
-            print("THE FINAL SHOWDOWN!")
+            self.journal.info(GAME, "THE FINAL SHOWDOWN!")
             self.final_battle(*cur_living)
         elif len(cur_living) == 1: #Game Over
-            print("{} Wins the Hunger Games!".format(cur_living[0].name))
+            self.journal.info(GAME, "{} Wins the Hunger Games!", cur_living[0].name)
         else: #Normal night
-            self.current_phase = phase
-            self.night_actions[self.current_phase] = []
-
-            #Read all submitted night actions from CSV
-            current_actions = self.night_actions[self.current_phase]
-            with open("night{}.csv".format(self.current_phase)) as f:
-                    rdr = csv.DictReader(f)
-                    for i, line in enumerate(rdr):
-                            current_actions.append(dict({"Line" : i}, **line))
+            self.current_phase = self.journal.phase = phase
 
-            #Sort actions by priority, then agility, then submission time
-            current_actions.sort(key = lambda x: x["Line"])
-            current_actions.sort(key = lambda x: self.get_player_by_name(x["Player"]).get_stat("Agility"), reverse = True)
-            current_actions.sort(key = lambda x: self.get_action_priority(x["Action"]))
+            #Order actions by priority, then agility, then submission time
+            if plan is None:
+                plan = self.plan_night(self.current_phase)
+            current_actions = self.night_actions[self.current_phase] = list(plan)
+            self.changed("night_actions")
 
             #Perform each action
             for a in current_actions:
                     a['Result'] = self.perform_action(a)
 
             #Check if anyone dies from poison
-            for player in [p for p in self.get_players() if p.is_alive]:
-                    if player.poison_death_check():
-                            player.set_dead()
-                            player.death_text = "Killed by poison on Night {}".format(CURRENT_PHASE)
-                            print("{} has died of Posioning!".format(player.name))
+            for effect in self.effects.pop_due(self.current_phase):
+                    self.resolve_effect(effect)
+            self.changed("effects")
 
             #Write out night results
-            with open("night{}_results.csv".format(self.current_phase), 'w', newline='') as f:
-                    wrt = csv.DictWriter(f, ["Line", "Player", "Action", "Target", "Result"])
-                    wrt.writeheader()
-                    wrt.writerows(current_actions)
+            wrt = self.results.writer("Night", self.current_phase, "night{}_results.csv".format(self.current_phase), ["Line", "Player", "Action", "Target", "Result"])
+            wrt.writerows(current_actions)
 
             #Perform sponsor giveaways
             self.distribute_sponsor_items(self.current_phase)
 
+        self.results.flush()
+
+
+    def resolve_effect(self, effect):
+        """
+        Apply a delayed effect which has come due
+        """
+        player = effect.player
+        if effect.kind == "Poison" and player.is_alive:
+            player.set_dead()
+            player.death_text = "Killed by poison on Night {}".format(self.current_phase)
+            self.journal.info(DEATH, "{} has died of Posioning!", player.name, player = player.name)
+
+
+    def ingest_votes(self, path, day = None):
+        """
+        Add votes to the day tallies
+        With a day, path is a form response export for that day, otherwise a vote log (see lynch.VoteTally)
+        """
+        if day is None:
+            self.votes.ingest_vote_log(path, list(self.players))
+        else:
+            self.votes.ingest_form_responses(path, day, list(self.players))
+        self.changed("votes")
+
 
     def lynch_player_from_file(self, day = None):
         """
         Initiated lynching by reading player listed in CSV file
-        Would be nice if this could be scraped from vote scripts instead of csv
+        Days missing from the file are decided by the ingested vote tally instead
         """
-        #TODO Scrape vote script instead
         if day is None:
             day = self.current_phase
 
-        with open("lynches.csv") as f:
-            rdr = csv.DictReader(f)
-            #Read who should be lynched
-            lynched_name = [line["Name"] for line in rdr if line["Day"] == str(day)]
-            if len(lynched_name) > 1: #Multiple lynches?
-                raise ValueError("Invalid number of Lynched players for Day {}: {}".format(day, len(lynched_name)))
-            elif len(lynched_name) == 0: #No lynch
-                print("No Lynch Target for Day {}".format(day))
-            else: #Perform the lynching
-                self.lynch_player(lynched_name[0])
+        #Read who should be lynched, manual entries take precedence (eg. after a tie breaker)
+        lynched_name = None
+        if os.path.exists("lynches.csv"):
+            lynched_name = lynch.load_lynch_schedule("lynches.csv").get(day)
+        if lynched_name is None and day in self.votes:
+            lynched_name = self.votes.result(day)
+
+        if lynched_name is None: #No lynch
+            self.journal.info(GAME, "No Lynch Target for Day {}", day)
+        else: #Perform the lynching
+            self.lynch_player(lynched_name)
 
 
     def lynch_player(self, player_name):
@@ -1192,10 +1644,10 @@ class Game:
         if player.is_alive:
             player.set_dead()
             self.player_item_drop(player)
-            player.death_text = "Lynched Day {}".format(CURRENT_PHASE)
-            print("{} Has been Lynched on Day {}".format(player_name, CURRENT_PHASE))
+            player.death_text = "Lynched Day {}".format(self.current_phase)
+            self.journal.info(DEATH, "{} Has been Lynched on Day {}", player_name, self.current_phase, player = player_name)
         else: #Can't lynch a dead guy
-            print("{} cannot be lynched as they are already dead".format(player_name))
+            self.journal.info(GAME, "{} cannot be lynched as they are already dead", player_name)
 
     def player_item_drop(self, player):
         """
@@ -1203,9 +1655,9 @@ class Game:
         Adds dropped items into a pool for later reuse (eg. in Feast)
         """
         self.dropped_items += player.inventory
-        print("{} dropped {}".format(player.name, player.inventory))
-        print("Total dropped items: {}".format(self.dropped_items))
-        player.inventory = []
+        self.journal.info(ITEM, "{} dropped {}", player.name, player.inventory, player = player.name)
+        self.journal.info(ITEM, "Total dropped items: {}", self.dropped_items)
+        player.clear_inventory()
 
 
     def assign_dropped_item(self, player, item = None):
@@ -1215,12 +1667,13 @@ class Game:
         if item not in self.dropped_items:
             raise ValueError("Item has not been dropped")
         if item is None: #Item choice will usually be random
-            selected_item = random.choice(self.dropped_items)
+            selected_item = self.rng.choice(self.dropped_items)
         else: #But we might want to be able to specify it
             selected_item = item
 
         player.add_item(selected_item)
         self.dropped_items.remove(item)
+        self.changed("dropped_items")
 
 
     def perform_action(self, current_action):
@@ -1228,89 +1681,110 @@ class Game:
         Validate, perform and resolve a night action
         """
         player, action = self.get_player_by_name(current_action["Player"]), current_action["Action"]
+        handler = actions.get_action(action)
 
         if not player.can_perform_any_action(): #Player is preventing from performing an action somehow
-            print("{} tried to {} but cannot as they are {}".format(player.name, action, "Dead" if not player.is_alive else "Trapped"))
+            self.journal.info(ACTION, "{} tried to {} but cannot as they are {}", player.name, action, "Dead" if not player.is_alive else "Trapped", player = player.name, action = action)
             return "Failed: {}".format("Player Dead" if not player.is_alive else "Player Trapped")
 
-        elif action in self.cooldown_actions and player.action_on_cooldown(action): #Action is on cooldown, can't be used tonight
-                print("{} tried to {} but cannot it is on Cooldown {}".format(player.name, action, player.actions))
+        elif handler.cooldown and player.action_on_cooldown(action, handler.cooldown): #Action is on cooldown, can't be used tonight
+                self.journal.info(ACTION, "{} tried to {} but cannot it is on Cooldown {}", player.name, action, player.actions, player = player.name, action = action)
                 return "Failed: Cooldown"
 
         else: #Player is able to perform an action
+            return handler.resolve(self, player, current_action)
 
-            if action == "Hide":
-                player.hide()
-                return "Success"
-
-            elif action == "Guard":
-                player.guard()
-                return "Success"
-
-            elif action == "Attack" or action == "Kill":
-                target = self.get_player_by_name(current_action["Target"])
-
-                if not target.is_alive:
-                    print("{} tried to attack {}, but failed as the target is already dead".format(player.name, target.name))
 
-                else:
-                    if action == "Attack":
-                        attack_action_res = player.attack(target)
-                    elif action == "Kill":
-                        if player.is_career:
-                            attack_action_res = player.attack(target, career_kill = True)
-                        else:
-                            print("{} tried to perform a Career Kill, but cannot as they are not a Career".format(player.name))
-                            return "Failed: Not Career"
-
-                    if attack_action_res == CombatOutcome.success:
-                        player.raid(target)
-                        self.player_item_drop(target)
-                        return "Success"
-
-                    elif attack_action_res == CombatOutcome.countered:
-                        target.raid(player)
-                        self.player_item_drop(player)
-                        return "Countered"
+    def resolve_attack(self, player, target, attack_action_res):
+        """
+        Apply the aftermath of an attack and describe its result
+        """
+        if attack_action_res == CombatOutcome.success:
+            player.raid(target)
+            self.player_item_drop(target)
+            return "Success"
 
-                    elif attack_action_res == CombatOutcome.failed:
-                        return "Failed"
+        elif attack_action_res == CombatOutcome.countered:
+            target.raid(player)
+            self.player_item_drop(player)
+            return "Countered"
 
-                    elif attack_action_res == CombatOutcome.hidden:
-                        return "Hidden"
+        elif attack_action_res == CombatOutcome.failed:
+            return "Failed"
 
-                    elif attack_action_res == CombatOutcome.success_protected:
-                        return "Protected from Attack"
+        elif attack_action_res == CombatOutcome.hidden:
+            return "Hidden"
 
-                    elif attack_action_res == CombatOutcome.countered_protected:
-                        return "Countered but Protected"
+        elif attack_action_res == CombatOutcome.success_protected:
+            return "Protected from Attack"
 
-            else: #using an item
-                if action.endswith("Serum"): #Drinking a serum
-                    available_serums = player.get_usable_items(action)
+        elif attack_action_res == CombatOutcome.countered_protected:
+            return "Countered but Protected"
 
-                    if available_serums:
-                        return player.drink_serum(available_serums[0])
-                    else:
-                        print ("{} tried to drink {}, but doesn't own one".format(player.name, action))
-                        return "Failed"
 
-                else: #Regular active item
-                    target = self.get_player_by_name(current_action["Target"])
-                    return player.perform_item_action(target, action)
 
+def load_game(filename = 'game', timestamp = None, directory = BACKUP_DIR):
+    """
+    Load a game from its latest snapshot, or the latest at or before a timestamp
+    Older games without snapshots are loaded from their pickle (or the backup from that minute)
+    """
+    store = snapshots.get_snapshot_store(directory, filename)
+    if timestamp is not None:
+        path = os.path.join(directory,'{}_{}-{}-{}-{}.dat'.format(filename, timestamp.month, timestamp.day, timestamp.hour, timestamp.minute))
+        if os.path.exists(path):
+            return unpickle_obj(path)
+        return store.load(timestamp)
+    if store.snapshots():
+        return store.load()
+    return unpickle_obj(os.path.join(directory,'{}.dat'.format(filename)))
+
+
+def load_player_from_store(store, name, players = None):
+    """
+    Load a single player from an SQLite GameStore
+    Action targets are resolved through players (name -> Player) where given, otherwise left as names
+    """
+    state = store.player_state(name)
+    state["action_bonus"] = defaultdict(getBlankDD, {phase : defaultdict(int, bonus) for phase, bonus in state["action_bonus"].items()})
+    state["actions"] = defaultdict(list, {phase : [(action, (players or {}).get(target, target)) for action, target in acts] for phase, acts in state["actions"].items()})
+    player = Player.__new__(Player)
+    player.__setstate__(state)
+    return player
 
 
-def load_game(filename = 'game', timestamp = None):
+def load_game_from_store(path):
     """
-    Load a game object from a pickle filename
+    Rebuild a game object from an SQLite database written by Game.open_store
     """
-    cwd = os.path.dirname(os.path.realpath(__file__))
-    sdir = "backup"
-    if timestamp is None:
-        return unpickle_obj(os.path.join(cwd,sdir,'{}.dat'.format(filename)))
-    else:
-        return unpickle_obj(os.path.join(cwd,sdir,'{}_{}-{}-{}-{}.dat'.format(filename, timestamp.month, timestamp.day, timestamp.hour, timestamp.minute)))
+    store = storage.GameStore(path)
+    state = store.game_state()
+    names = store.player_names()
+    players = {name : load_player_from_store(store, name) for name in names}
+    for player in players.values():
+        for phase, acts in player.actions.items():
+            player.actions[phase] = [(action, players.get(target, target)) for action, target in acts]
+    game_state = {"current_phase" : state["current_phase"],
+        "game_name" : state["game_name"],
+        "players" : players,
+        "kingpin" : players.get(state["kingpin"]),
+        "careers" : [players[name] for name in state["careers"]],
+        "night_actions" : {},
+        "dropped_items" : store.inventory()}
+    if "rng" in state: #Older databases didn't save these, so poison is rebuilt from statuses and phases reseeded
+        game_state["rng"] = random.Random()
+        game_state["rng"].setstate(state["rng"])
+        game_state["effects"] = effects.EffectQueue()
+        for kind, name, phase, night, order in store.effects():
+            game_state["effects"].schedule(kind, players[name], phase, night, order = order)
+    game = Game.__new__(Game)
+    game.__setstate__(game_state)
+    for row in store.results():
+        if row["Event"] == "Night":
+            game.night_actions.setdefault(row["Phase"], []).append({k : row[k] for k in ["Line", "Player", "Action", "Target", "Result"]})
+    store.mark_loaded(game)
+    game.store = store
+    game.results.listeners.append(store.add_results)
+    return game
 
 
 ###This is probably how I should be running the script...
@@ -0,0 +1,258 @@
+### montecarlo.py
+### Author: Liam Callaway
+### Runs many complete simulated games in parallel to answer balance questions
+### Run as: python montecarlo.py [games] [workers] [seed]
+
+import csv
+import os
+import random
+import shutil
+import sys
+import tempfile
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import journal
+import mafia
+import policies
+import replay
+import scheduler
+
+N_PLAYERS = 24
+N_CAREERS = 6 #Including the Kingpin
+MIN_CORNUCOPIA = 10 #Enough to take every Cornucopia item
+BATCH_SIZE = 25
+
+
+class SimulatedGame(mafia.Game):
+    """
+    A game played by synthetic players, who can die off faster than the item schedule was written for
+    """
+
+    def create_days_items(self, day):
+        """
+        Sponsors only give as many items as there are living players, any extras are left in the dropped items
+        """
+        day_items = super().create_days_items(day)
+        living = len(self.get_living_players())
+        if day > 0 and len(day_items) > living:
+            self.dropped_items += day_items[living:]
+            day_items = day_items[:living]
+        return day_items
+
+
+def synthetic_roster(rng, n_players = N_PLAYERS):
+    """
+    Create Responses.csv style rows with random stat preferences
+    """
+    rows = []
+    for i in range(n_players):
+        ranks = list(range(len(mafia.ATTRIBUTES)))
+        rng.shuffle(ranks)
+        row = {"Name" : "Player {}".format(i + 1), "Bonus" : "T" if rng.random() < 0.5 else "F"}
+        row.update(zip(mafia.ATTRIBUTES, map(str, ranks)))
+        rows.append(row)
+    return rows
+
+
+def write_roster(path, rows):
+    with open(path, 'w', newline='') as f:
+        wrt = csv.DictWriter(f, ["Name"] + mafia.ATTRIBUTES + ["Bonus"])
+        wrt.writeheader()
+        wrt.writerows(rows)
+
+
+def assign_policies(players, policy_names):
+    """
+    Give players policies from a policy name, or a list of names shared out in turn
+    """
+    if isinstance(policy_names, str):
+        policy_names = [policy_names]
+    return {p.name : policies.get_policy(policy_names[i % len(policy_names)]) for i, p in enumerate(players)}
+
+
+def choose_entrants(game, players, player_policies, rng, minimum, feast = False):
+    """
+    Ask each player's policy whether they enter the Cornucopia or Feast, everyone enters if too few would
+    """
+    entrants = []
+    for p in players:
+        view = policies.PlayerView(game, p)
+        policy = player_policies[p.name]
+        if policy.enter_feast(view, rng) if feast else policy.enter_cornucopia(view, rng):
+            entrants.append(p)
+    return entrants if len(entrants) >= minimum else list(players)
+
+
+def feast_possible(players):
+    """
+    Check the Feast's two fights can be made (four different players, no Career pairs)
+    """
+    return len(players) >= 4 and sum(not p.is_career for p in players) >= 2
+
+
+def cast_votes(game, day, player_policies, rng, knowledge = None):
+    """
+    Every living player votes as their policy chooses, ties are broken at random
+    """
+    for player in game.get_living_players():
+        target = player_policies[player.name].vote(policies.PlayerView(game, player, knowledge), rng)
+        if target is not None:
+            game.votes.vote(day, player.name, target)
+    leaders = game.votes.leaders(day)
+    if len(leaders) > 1:
+        game.votes.vote(day, "Tie-Breaker", rng.choice(leaders))
+
+
+def simulate_game(seed, index, n_players = N_PLAYERS, career_policy = "aggressive", tribute_policy = "items"):
+    """
+    Play one complete game in the current directory (which needs ItemDrops.csv)
+    career_policy and tribute_policy are policy names, or lists of names shared out between the players
+    Returns a summary record of the game
+    """
+    rng = random.Random("{}-{}".format(seed, index))
+    write_roster("Responses.csv", synthetic_roster(rng, n_players))
+
+    game = SimulatedGame("simulation")
+    game.seeds = [rng.getrandbits(63) for _ in mafia.SEEDS]
+    game.results.write = False
+    game.legacy_draws = False #Nothing to replay, so draw directly rather than reproducing the original raffle
+    received = defaultdict(set)
+    knowledge = policies.Knowledge()
+    game.results.listeners.append(lambda rows: [received[r["Player"]].add(r["Target"]) for r in rows if r.get("Action") == "receives"])
+    game.results.listeners.append(knowledge.record)
+
+    game.set_phase(0)
+    game.initial_setup(save = False)
+    others = [p.name for p in game.get_players() if p is not game.kingpin]
+    game.set_careers(game.kingpin.name, *rng.sample(others, N_CAREERS - 1))
+    player_policies = assign_policies(game.careers, career_policy)
+    player_policies.update(assign_policies([p for p in game.get_players() if not p.is_career], tribute_policy))
+    game.run_cornucopia(choose_entrants(game, game.get_players(), player_policies, rng, MIN_CORNUCOPIA))
+
+    survived = {p.name : 0 for p in game.get_players()}
+    length = 0
+    for phase in range(1, len(game.seeds) - 1):
+        living = game.get_living_players()
+        if len(living) <= 1:
+            break
+        game.set_phase(phase)
+        if phase == game.feast_phase:
+            entrants = choose_entrants(game, living, player_policies, rng, 4, feast = True)
+            if not feast_possible(entrants):
+                game.feast_phase = None
+            write_roster("Feast.csv", [{"Name" : p.name} for p in entrants])
+        cast_votes(game, phase, player_policies, rng, knowledge)
+        submitted = policies.night_actions(game, player_policies, rng, knowledge)
+        game.run_game_phase(plan = scheduler.plan_night(game, submitted, phase))
+        length = phase
+        for p in game.get_living_players():
+            survived[p.name] = phase
+
+    living = game.get_living_players()
+    winner = living[0] if len(living) == 1 else None
+    return {"length" : length,
+        "winner" : winner.name if winner else None,
+        "career_win" : winner.is_career if winner else None,
+        "careers" : [p.name for p in game.careers],
+        "policies" : {name : policy.name for name, policy in player_policies.items()},
+        "survived" : survived,
+        "received" : {name : sorted(items) for name, items in received.items()}}
+
+
+def _init_worker(data_dir, parent_dir):
+    """
+    Give each worker process its own directory for the game's input files, and silence the journal
+    """
+    work_dir = tempfile.mkdtemp(dir = parent_dir)
+    shutil.copy(os.path.join(data_dir, replay.INPUT_FILES["ItemDrops.csv"]), os.path.join(work_dir, "ItemDrops.csv"))
+    os.chdir(work_dir)
+    mafia.JOURNAL.set_level(journal.OFF)
+
+
+def run_batch(seed, indices, config):
+    """
+    Play a batch of games, recording failures rather than stopping
+    """
+    records = []
+    for index in indices:
+        try:
+            records.append(simulate_game(seed, index, **config))
+        except Exception as e:
+            records.append({"error" : "{}: {}".format(type(e).__name__, e)})
+    return records
+
+
+class Summary:
+    """
+    Aggregated results of many simulated games
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.errors = Counter()
+        self.wins = Counter() #"Career", "Tribute" or "None" (no single winner)
+        self.lengths = Counter()
+        self.item_survival = defaultdict(lambda: [0, 0]) #Item -> [total phases survived by holders, holders]
+        self.survival = [0, 0] #[total phases survived, players]
+
+
+    def add(self, record):
+        self.games += 1
+        if "error" in record:
+            self.errors[record["error"].split(":")[0]] += 1
+            return
+        self.wins["None" if record["career_win"] is None else "Career" if record["career_win"] else "Tribute"] += 1
+        self.lengths[record["length"]] += 1
+        for name, phases in record["survived"].items():
+            self.survival[0] += phases
+            self.survival[1] += 1
+            for item in record["received"].get(name, []):
+                self.item_survival[item][0] += phases
+                self.item_survival[item][1] += 1
+
+
+    def report(self):
+        finished = self.games - sum(self.errors.values())
+        lines = ["{} games ({} failed: {})".format(self.games, self.games - finished, dict(self.errors))]
+        if not finished:
+            return "\n".join(lines)
+        lines.append("Wins: " + ", ".join("{} {:.1%}".format(k, v / finished) for k, v in sorted(self.wins.items())))
+        lines.append("Game length: " + ", ".join("{}: {}".format(k, v) for k, v in sorted(self.lengths.items())))
+        average = self.survival[0] / self.survival[1]
+        lines.append("Average phases survived {:.2f}, by item held:".format(average))
+        for item, (total, holders) in sorted(self.item_survival.items(), key = lambda x: -x[1][0] / x[1][1]):
+            lines.append("\t{}: {:+.2f} ({} holders)".format(item, total / holders - average, holders))
+        return "\n".join(lines)
+
+
+def play_batches(jobs, workers = None, data_dir = replay.DATA_DIR):
+    """
+    Play games across a pool of processes
+    jobs is a list of (seed, game numbers, config), returns the records of each job's games in order
+    Each game's random numbers depend only on (seed, game number), so results don't depend on the number of workers
+    """
+    parent_dir = tempfile.mkdtemp(prefix = "montecarlo_")
+    try:
+        with ProcessPoolExecutor(max_workers = workers, initializer = _init_worker, initargs = (os.path.abspath(data_dir), parent_dir)) as pool:
+            batches = [[pool.submit(run_batch, seed, indices[i:i + BATCH_SIZE], config) for i in range(0, len(indices), BATCH_SIZE)] for seed, indices, config in jobs]
+            return [[record for batch in job for record in batch.result()] for job in batches]
+    finally:
+        shutil.rmtree(parent_dir, ignore_errors = True)
+
+
+def run_simulations(games, workers = None, seed = 0, data_dir = replay.DATA_DIR, **config):
+    """
+    Play many games across a pool of processes
+    """
+    summary = Summary()
+    records, = play_batches([(seed, list(range(games)), config)], workers, data_dir)
+    for record in records:
+        summary.add(record)
+    return summary
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    games, workers, seed = (args + [1000, None, 0][len(args):])[:3]
+    print(run_simulations(games, workers, seed).report())
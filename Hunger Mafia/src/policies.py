@@ -0,0 +1,222 @@
+### policies.py
+### Author: Liam Callaway
+### Scripted player policies, which choose night actions from what a player knows
+
+import actions
+
+
+class PlayerView:
+    """
+    Read-only snapshot of what a player knows at the start of a night
+    Their own stats and inventory, who is alive, who has died and when, their fellow Careers and what their items revealed
+    Building a view has no effect on the game or its journal
+    """
+
+    def __init__(self, game, player, knowledge = None):
+        self.name = player.name
+        self.phase = game.current_phase
+        self.is_career = player.is_career
+        self.is_kingpin = player.is_kingpin
+        self.stats = dict(player.stats)
+        self.inventory = tuple((item.name, item.ability, item.uses) for item in player.inventory)
+        self.living = tuple(p.name for p in game.get_living_players())
+        self.deaths = {p.name : p.death_phase for p in game.get_players() if not p.is_alive}
+        self.allies = tuple(p.name for p in game.careers if p is not player) if player.is_career else ()
+        self.findings = tuple(knowledge.get(player.name, ())) if knowledge else ()
+        self.cooldowns = frozenset(name for name, handler in actions.ACTIONS.items() if handler.cooldown and player.is_on_cooldown(name, handler.cooldown))
+
+
+    def can_use(self, action):
+        return action not in self.cooldowns
+
+
+    def opponents(self, careers = True):
+        """
+        Living players other than this player (and their allies), optionally leaving out known Careers
+        """
+        known_careers = set(self.allies) | {target for _, action, target, result in self.findings if result.endswith("Career")}
+        return [name for name in self.living if name != self.name and name not in self.allies and (careers or name not in known_careers)]
+
+
+    def usable_items(self):
+        """
+        Names of abilities of held active items with uses left
+        """
+        return [ability for name, ability, uses in self.inventory if ability is not None and uses]
+
+
+class Knowledge:
+    """
+    What each player has learnt from their own actions (investigations, follows), built from night results
+    Attach record to a game's ResultsSink listeners
+    """
+
+    LEARNING_ACTIONS = ("Investigate", "Follow")
+
+    def __init__(self):
+        self.findings = {}
+
+
+    def record(self, rows):
+        for row in rows:
+            if row.get("Event") == "Night" and row.get("Action") in self.LEARNING_ACTIONS and str(row.get("Result", "")).startswith("Success"):
+                self.findings.setdefault(row["Player"], []).append((row["Phase"], row["Action"], row["Target"], row["Result"]))
+
+
+    def get(self, name, default = None):
+        return self.findings.get(name, default)
+
+
+class Policy:
+    """
+    Chooses a player's actions from a PlayerView
+    night_action returns an action in the nightN.csv schema (Player, Action, Target)
+    """
+
+    name = "pass"
+    #Chance of entering the Cornucopia or Feast
+    entry_chance = 0.6
+
+    def night_action(self, view, rng):
+        return self.action(view, "Hide" if view.can_use("Hide") else "Guard")
+
+
+    def enter_cornucopia(self, view, rng):
+        return rng.random() < self.entry_chance
+
+
+    def enter_feast(self, view, rng):
+        return rng.random() < self.entry_chance
+
+
+    def vote(self, view, rng):
+        """
+        Name of the player to vote for, None to abstain
+        """
+        options = view.opponents(careers = not view.is_career)
+        return rng.choice(options) if options else None
+
+
+    @staticmethod
+    def action(view, action, target = ""):
+        return {"Player" : view.name, "Action" : action, "Target" : target or ""}
+
+
+    def attack(self, view, rng):
+        """
+        Kill a non-Career as a Career, otherwise attack anyone when off cooldown
+        """
+        if view.is_career:
+            targets = view.opponents(careers = False)
+            if targets:
+                return self.action(view, "Kill", rng.choice(targets))
+        targets = view.opponents()
+        if targets and view.can_use("Attack"):
+            return self.action(view, "Attack", rng.choice(targets))
+        return None
+
+
+    def defend(self, view):
+        """
+        Hide, or Guard when Hide is on cooldown, None when both are
+        """
+        for action in ("Hide", "Guard"):
+            if view.can_use(action):
+                return self.action(view, action)
+        return None
+
+
+    def fallback(self, view):
+        """
+        Defend when possible, otherwise pass the night (a Hide that fails on cooldown)
+        """
+        return self.defend(view) or self.action(view, "Hide")
+
+
+class AggressivePolicy(Policy):
+    """
+    Attack every night possible, hiding otherwise
+    """
+
+    name = "aggressive"
+
+    def night_action(self, view, rng):
+        return self.attack(view, rng) or self.fallback(view)
+
+
+class DefensivePolicy(Policy):
+    """
+    Hide, then Guard, falling back to attacking when both are on cooldown
+    """
+
+    name = "defensive"
+    entry_chance = 0.3
+
+    def night_action(self, view, rng):
+        return self.defend(view) or self.attack(view, rng) or self.fallback(view)
+
+
+class ItemPolicy(AggressivePolicy):
+    """
+    Use held active items as soon as possible, otherwise play aggressively
+    """
+
+    name = "items"
+    entry_chance = 0.8
+
+    def night_action(self, view, rng):
+        for ability in view.usable_items():
+            handler = actions.get_action(ability)
+            if isinstance(handler, actions.SerumAction) or ability == "Heal":
+                return self.action(view, ability, view.name)
+            targets = view.opponents(careers = ability not in ("Protect", "Investigate"))
+            if targets:
+                return self.action(view, ability, rng.choice(targets))
+        return super().night_action(view, rng)
+
+
+class RandomPolicy(Policy):
+    """
+    Pick any basic action that isn't on cooldown
+    """
+
+    name = "random"
+    entry_chance = 0.5
+
+    def night_action(self, view, rng):
+        choices = [a for a in ("Attack", "Hide", "Guard") if view.can_use(a)]
+        action = rng.choice(choices) if choices else "Hide"
+        if action == "Attack":
+            return self.attack(view, rng) or self.action(view, "Hide")
+        return self.action(view, action)
+
+
+POLICIES = {}
+
+def register(policy):
+    POLICIES[policy.name] = policy
+    return policy
+
+
+def get_policy(name):
+    try:
+        return POLICIES[name]
+    except KeyError:
+        raise ValueError("Unknown policy {} (known: {})".format(name, ", ".join(sorted(POLICIES))))
+
+
+for policy in (Policy(), AggressivePolicy(), DefensivePolicy(), ItemPolicy(), RandomPolicy()):
+    register(policy)
+
+
+def night_actions(game, player_policies, rng, knowledge = None):
+    """
+    Ask each living player's policy for their night action
+    Returns actions with submission lines, ready for scheduler.plan_night
+    """
+    submitted = []
+    for player in game.get_living_players():
+        action = player_policies[player.name].night_action(PlayerView(game, player, knowledge), rng)
+        if action is not None:
+            submitted.append(dict(action, Line = len(submitted)))
+    return submitted
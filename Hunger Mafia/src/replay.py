@@ -0,0 +1,222 @@
+### replay.py
+### Author: Liam Callaway
+### Rebuilds a game from its seeds and input files, checking each night against the results that were sent out
+### Run as: python replay.py [phase]
+
+import csv
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import journal
+import mafia
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")
+
+#Careers were chosen by the Kingpin after setup
+CAREERS = ["Ben Jelavic", "Caitlin Bell", "Evan Kohilas", "Rachel Alger", "Shane Arora", "Terry Watson"]
+#Players renamed during the game, by the phase the new name was first used
+RENAMES = {3 : {"Antonio Legovich" : "Maddie Mackey"}}
+#Phases the replay currently reproduces exactly
+#The Cornucopia was resolved by hand, so later nights drift from what was sent out once its items differ
+GOLDEN_MATCHES = ["Night 1", "Night 2", "Night 3"]
+FEAST_PHASE = 9
+LAST_PHASE = 11
+
+#Where each input file the game reads is kept in the game folder
+INPUT_FILES = {"Responses.csv" : os.path.join("Player Info", "Stat_Preferences.csv"),
+    "lynches.csv" : os.path.join("Updates", "lynches.csv"),
+    "ItemDrops.csv" : os.path.join("Updates", "ItemDrops.csv")}
+ACTIONS_DIR = "Night Actions"
+RESULT_COLUMNS = ["Player", "Action", "Target", "Result"]
+
+
+@contextmanager
+def working_directory(path):
+    """
+    Temporarily change directory, the game reads and writes its files relative to the current directory
+    """
+    old = os.getcwd()
+    os.chdir(path)
+    try:
+        yield path
+    finally:
+        os.chdir(old)
+
+
+def stage_inputs(data_dir, work_dir):
+    """
+    Copy the input files from a game folder into a working directory, named as the game expects
+    """
+    for name, path in INPUT_FILES.items():
+        shutil.copy(os.path.join(data_dir, path), os.path.join(work_dir, name))
+    actions_dir = os.path.join(data_dir, ACTIONS_DIR)
+    for name in os.listdir(actions_dir):
+        if name.endswith(".csv") and not name.endswith("_results.csv"):
+            shutil.copy(os.path.join(actions_dir, name), os.path.join(work_dir, name))
+
+
+def read_results(path):
+    """
+    Read the rows of a results file, keeping only the columns that were sent to players
+    """
+    with open(path) as f:
+        return [tuple(line.get(c) or "" for c in RESULT_COLUMNS) for line in csv.DictReader(f)]
+
+
+class PhaseCheck:
+    """
+    Comparison of a replayed phase's results against the stored results
+    """
+
+    def __init__(self, phase, name, expected, replayed, skipped = ()):
+        self.phase = phase
+        self.name = name
+        self.expected = expected
+        self.replayed = replayed
+        self.skipped = list(skipped) #Inputs left out as they no longer make sense in the replayed game (eg. dead Feast entrants)
+
+
+    @property
+    def matched(self):
+        return not self.skipped and self.expected == self.replayed
+
+
+    def mismatches(self):
+        """
+        List (row number, expected, replayed) for each differing row
+        """
+        rows = max(len(self.expected), len(self.replayed))
+        pad = lambda r, i: r[i] if i < len(r) else None
+        return [(i, pad(self.expected, i), pad(self.replayed, i)) for i in range(rows) if pad(self.expected, i) != pad(self.replayed, i)]
+
+
+    def __str__(self):
+        skipped = " (skipped {})".format(", ".join(self.skipped)) if self.skipped else ""
+        if self.matched:
+            return "{}: Matched ({} rows)".format(self.name, len(self.expected))
+        return "{}: {} of {} rows differ{}".format(self.name, len(self.mismatches()), len(self.expected), skipped)
+
+
+class Replay:
+    """
+    Replays a game phase by phase from its input files
+    Each phase is seeded from SEEDS, so the replay only depends on the inputs
+    """
+
+    def __init__(self, data_dir = DATA_DIR, work_dir = None, quiet = True):
+        self.data_dir = os.path.abspath(data_dir)
+        self.temporary = work_dir is None
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix = "replay_")
+        self.quiet = quiet
+        self.game = None
+        self.phase = None
+        self.checks = []
+        stage_inputs(self.data_dir, self.work_dir)
+
+
+    def close(self):
+        """
+        Remove the working directory, if the replay created it
+        """
+        if self.temporary:
+            shutil.rmtree(self.work_dir, ignore_errors = True)
+
+
+    @contextmanager
+    def _running(self):
+        level = mafia.JOURNAL.level
+        if self.quiet:
+            mafia.JOURNAL.set_level(journal.OFF) #Games fork the journal, so the replayed game starts silenced
+        try:
+            with working_directory(self.work_dir):
+                yield
+        finally:
+            mafia.JOURNAL.set_level(level)
+
+
+    def _check(self, phase, name, filename, skipped = ()):
+        expected = read_results(os.path.join(self.data_dir, ACTIONS_DIR, filename))
+        replayed = read_results(os.path.join(self.work_dir, filename)) if os.path.exists(os.path.join(self.work_dir, filename)) else []
+        check = PhaseCheck(phase, name, expected, replayed, skipped)
+        self.checks.append(check)
+        return check
+
+
+    def setup(self):
+        """
+        Create the players, choose the Kingpin and Careers and run the Cornucopia
+        """
+        with self._running():
+            self.game = mafia.Game()
+            self.game.set_phase(0)
+            self.game.initial_setup(save = False)
+            self.game.set_careers(*CAREERS)
+            self.game.run_pregame()
+        self.phase = 0
+        return self._check(0, "Cornucopia", "Cornucopia_results.csv")
+
+
+    def run_phase(self):
+        """
+        Replay the next phase (day then night), returning the checks made
+        """
+        phase = self.phase + 1
+        checks = []
+        with self._running():
+            for old, new in RENAMES.get(phase, {}).items():
+                self.game.rename_player(old, new)
+            skipped = self.stage_feast() if phase == FEAST_PHASE else []
+            self.game.set_phase(phase)
+            self.game.run_game_phase()
+        self.phase = phase
+        if phase == FEAST_PHASE:
+            checks.append(self._check(phase, "Feast", "Feast_results.csv", skipped))
+        checks.append(self._check(phase, "Night {}".format(phase), "night{}_results.csv".format(phase)))
+        return checks
+
+
+    def stage_feast(self):
+        """
+        Write the Feast entrants who are still alive in the replay to Feast.csv, as the replay may have drifted from the real game
+        Returns the names of entrants left out
+        """
+        with open(os.path.join(self.data_dir, ACTIONS_DIR, "Feast.csv")) as f:
+            names = [line["Name"] for line in csv.DictReader(f)]
+        skipped = [name for name in names if not self.game.get_player_by_name(name).is_alive]
+        with open(os.path.join(self.work_dir, "Feast.csv"), 'w', newline = '') as f:
+            wrt = csv.DictWriter(f, ["Name"])
+            wrt.writeheader()
+            wrt.writerows({"Name" : name} for name in names if name not in skipped)
+        return skipped
+
+
+    def run(self, until = LAST_PHASE):
+        """
+        Replay from setup through to a phase, returning every check made
+        Phases that differ from the stored results are reported, and the replay carries on from its own state
+        """
+        if self.game is None:
+            self.setup()
+        while self.phase < until:
+            self.run_phase()
+        return self.checks
+
+
+def replay_game(until = LAST_PHASE, data_dir = DATA_DIR):
+    """
+    Rebuild a game's state as of the end of a phase
+    """
+    replay = Replay(data_dir)
+    replay.run(until)
+    replay.close()
+    return replay.game
+
+
+if __name__ == "__main__":
+    replay = Replay()
+    for check in replay.run(int(sys.argv[1]) if len(sys.argv) > 1 else LAST_PHASE):
+        print(check)
+    replay.close()
@@ -0,0 +1,100 @@
+### results.py
+### Author: Liam Callaway
+### Collects results from every part of the game (Cornucopia, Feast, nights and sponsor drops)
+
+import csv
+import os
+
+RESULT_FIELDS = ["Phase", "Event", "Line", "Player", "Action", "Target", "Result"]
+
+
+def append_rows(path, fieldnames, rows, mode = 'a'):
+    """
+    Write rows to a csv file, adding a header if the file is new (or being overwritten)
+    Synced to disk before returning
+    """
+    new_file = mode == 'w' or not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, mode, newline='') as f:
+        wrt = csv.DictWriter(f, fieldnames)
+        if new_file:
+            wrt.writeheader()
+        wrt.writerows({field : row.get(field, "") for field in fieldnames} for row in rows)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class ResultsBatch:
+    """
+    Rows from one event in one phase, with the same interface as csv.DictWriter
+    Also written to an event specific file (eg. night3_results.csv) with its own columns
+    """
+
+    def __init__(self, event, phase, path, fieldnames, mode):
+        self.event = event
+        self.phase = phase
+        self.path = path
+        self.fieldnames = fieldnames
+        self.mode = mode
+        self.rows = []
+
+
+    def writerow(self, row):
+        self.rows.append(dict(row))
+
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+
+class ResultsSink:
+    """
+    Buffers results in memory and appends them to a single per-game file at phase boundaries
+    Every row shares the same columns (RESULT_FIELDS) regardless of which event produced it
+    """
+
+    #Set to False to only pass rows to listeners (eg. in simulations), without writing any files
+    write = True
+
+    def __init__(self, game_name):
+        self.path = "{}_results.csv".format(game_name)
+        self.pending = []
+        self.listeners = [] #Called with the unified rows on every flush, not saved with the game
+
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["listeners"] = []
+        return state
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.listeners = []
+
+
+    def writer(self, event, phase, path, fieldnames, mode = 'w'):
+        """
+        Start a batch of rows for an event, also written to path when flushed
+        mode 'w' replaces path each time, 'a' appends to it
+        """
+        batch = ResultsBatch(event, phase, path, fieldnames, mode)
+        self.pending.append(batch)
+        return batch
+
+
+    def flush(self):
+        """
+        Write all buffered rows to disk
+        """
+        if not self.pending:
+            return
+        rows = [dict(row, Phase = batch.phase, Event = batch.event) for batch in self.pending for row in batch.rows]
+        if self.write:
+            append_rows(self.path, RESULT_FIELDS, rows)
+        for listener in self.listeners:
+            listener(rows)
+        if self.write:
+            for batch in self.pending:
+                append_rows(batch.path, batch.fieldnames, batch.rows, batch.mode)
+        self.pending = []
@@ -0,0 +1,197 @@
+### rosters.py
+### Author: Liam Callaway
+### Bulk generation of large synthetic rosters, drawing every player's starting stats at once
+### Also gives the exact distribution of starting stats, for the rules documentation
+### Run as: python rosters.py (prints the starting stat distributions)
+
+import math
+from collections import defaultdict
+from fractions import Fraction
+
+import mafia
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ATTRIBUTES = mafia.ATTRIBUTES
+N_PREFERENCES = 3 #Stats a player ranks, the last stat gets no response points
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Bulk roster generation needs numpy (pip install numpy)")
+
+
+def random_preferences(n, rng):
+    """
+    Random preference orders for n players, as an (n, 3) matrix of ATTRIBUTES indexes, most preferred first
+    """
+    return np.argsort(rng.random((n, len(ATTRIBUTES))), axis = 1)[:, :N_PREFERENCES]
+
+
+def generate_stats(preferences, advantages, rng):
+    """
+    Draw starting stats for many players at once, following the same rules as Player._initialise_stats
+    preferences: (n, 3) ATTRIBUTES indexes, most preferred first; advantages: n booleans
+    Returns an (n, 4) matrix of stats, with columns in ATTRIBUTES order
+    The stats have the same distribution as creating each Player, but come from numpy's generator rather than the game's
+    """
+    _require_numpy()
+    preferences = np.asarray(preferences)
+    advantages = np.asarray(advantages, dtype = bool)
+    n = len(preferences)
+    stats = rng.multinomial(mafia.STAT_POINTS, [1 / len(ATTRIBUTES)] * len(ATTRIBUTES), size = n)
+    #Response points are sorted largest first, then given to the preferred stats in order
+    bonuses = -np.sort(-rng.multinomial(mafia.RESPONSE_POINTS, [1 / N_PREFERENCES] * N_PREFERENCES, size = n), axis = 1)
+    bonuses += np.where(advantages[:, None], mafia.RESPONSE_BONUSES[True], mafia.RESPONSE_BONUSES[False])
+    stats[np.arange(n)[:, None], preferences] += bonuses
+    return stats
+
+
+class Roster:
+    """
+    A generated roster, whose stats are held as a matrix
+    Player objects are only created when a player is first looked up
+    """
+
+    def __init__(self, names, preferences, advantages, stats, game = None):
+        self.names = list(names)
+        self.preferences = preferences
+        self.advantages = advantages
+        self.stats = stats
+        self.game = game
+        self._players = {}
+
+
+    @classmethod
+    def generate(cls, n, seed = None, game = None, advantage_chance = 0.5):
+        """
+        Create a roster of n players with random preferences
+        """
+        _require_numpy()
+        rng = np.random.default_rng(seed)
+        preferences = random_preferences(n, rng)
+        advantages = rng.random(n) < advantage_chance
+        stats = generate_stats(preferences, advantages, rng)
+        return cls(["Player {}".format(i + 1) for i in range(n)], preferences, advantages, stats, game)
+
+
+    def __len__(self):
+        return len(self.names)
+
+
+    def __getitem__(self, index):
+        if index not in self._players:
+            if not 0 <= index < len(self.names):
+                raise IndexError("Roster has no player {}".format(index))
+            if self.game is None:
+                self.game = mafia.Game()
+            player = mafia.Player(self.names[index], self.player_preferences(index), bool(self.advantages[index]),
+                game = self.game, stats = self.player_stats(index))
+            player.id = index
+            player.district = (index // 2) + 1
+            self._players[index] = player
+        return self._players[index]
+
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+    @property
+    def materialised(self):
+        """
+        Number of Player objects created so far
+        """
+        return len(self._players)
+
+
+    def player_preferences(self, index):
+        return {rank : ATTRIBUTES[a] for rank, a in enumerate(self.preferences[index])}
+
+
+    def player_stats(self, index):
+        """
+        A player's starting stats, without creating the player
+        """
+        return dict(zip(ATTRIBUTES, map(int, self.stats[index])))
+
+
+    def populate(self, game = None):
+        """
+        Add every player to a game, as Game.create_players_from_responses does
+        """
+        game = game or self.game
+        self.game = game
+        for player in self:
+            game.add_player(player)
+        return game
+
+
+### Exact starting stat distributions
+### A stat gets Binomial(20, 1/4) of the random points, plus (if preferred) the response points for its rank
+### The response points are a uniform allocation of 7 points between three stats, sorted largest first
+
+def point_distribution(points = mafia.STAT_POINTS, stats = len(ATTRIBUTES)):
+    """
+    Distribution of the random points one stat receives
+    """
+    return {k : Fraction(math.comb(points, k) * (stats - 1) ** (points - k), stats ** points) for k in range(points + 1)}
+
+
+def response_distribution(rank, advantage = False, points = mafia.RESPONSE_POINTS):
+    """
+    Distribution of the response points given to the stat of a preference rank
+    """
+    dist = defaultdict(Fraction)
+    for a in range(points + 1):
+        for b in range(points - a + 1):
+            c = points - a - b
+            chance = Fraction(math.factorial(points), math.factorial(a) * math.factorial(b) * math.factorial(c) * N_PREFERENCES ** points)
+            dist[sorted((a, b, c), reverse = True)[rank] + mafia.RESPONSE_BONUSES[advantage][rank]] += chance
+    return dict(dist)
+
+
+def starting_stat_distribution(rank = None, advantage = False):
+    """
+    Exact distribution of a starting stat, as {value : probability}
+    rank is the stat's preference rank (0 most preferred), None for the unranked stat
+    """
+    base = point_distribution()
+    if rank is None:
+        return base
+    dist = defaultdict(Fraction)
+    for bonus, p_bonus in response_distribution(rank, advantage).items():
+        for value, p_value in base.items():
+            dist[value + bonus] += p_bonus * p_value
+    return dict(sorted(dist.items()))
+
+
+def moments(dist):
+    """
+    Mean and standard deviation of a distribution
+    """
+    mean = sum(value * p for value, p in dist.items())
+    variance = sum((value - mean) ** 2 * p for value, p in dist.items())
+    return float(mean), math.sqrt(variance)
+
+
+def distribution_table():
+    """
+    Summary of each starting stat distribution, one line per rank and advantage
+    """
+    lines = []
+    for advantage in (False, True):
+        for rank in (0, 1, 2, None):
+            dist = starting_stat_distribution(rank, advantage)
+            mean, sd = moments(dist)
+            lines.append("{}, {}: mean {:.3f}, sd {:.3f}, range {}-{}".format("Advantage" if advantage else "No advantage",
+                "unranked" if rank is None else "preference {}".format(rank + 1), mean, sd, min(dist), max(dist)))
+    return lines
+
+
+if __name__ == "__main__":
+    print("\n".join(distribution_table()))
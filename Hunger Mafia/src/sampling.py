@@ -0,0 +1,160 @@
+### sampling.py
+### Author: Liam Callaway
+### Weighted sampling without replacement, used for stat based selections
+
+import random
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import accumulate
+
+
+class FenwickTree:
+    """
+    Running totals of integer weights
+    Supports updating a weight and locating a cumulative position in O(log n)
+    """
+
+    def __init__(self, weights):
+        """
+        Build the tree from a list of weights in O(n)
+        """
+        self.size = len(weights)
+        self.tree = [0] + list(weights)
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+        self.total = sum(weights)
+        self.top = 1 << self.size.bit_length() >> 1 if self.size else 0
+
+
+    def add(self, index, amount):
+        """
+        Adjust the weight at an index (0 based)
+        """
+        self.total += amount
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += amount
+            i += i & -i
+
+
+    def weight(self, index):
+        """
+        Retrieve the current weight at an index (0 based)
+        """
+        i = index + 1
+        weight = self.tree[i]
+        lower = i - (i & -i)
+        i -= 1
+        while i > lower:
+            weight -= self.tree[i]
+            i -= i & -i
+        return weight
+
+
+    def find(self, position):
+        """
+        Find the index whose span of weight contains a position in [0, total)
+        """
+        index = 0
+        bit = self.top
+        while bit:
+            step = index + bit
+            if step <= self.size and self.tree[step] <= position:
+                index = step
+                position -= self.tree[step]
+            bit >>= 1
+        return index
+
+
+class WeightedSampler:
+    """
+    Select items with odds proportional to integer weights, without replacement
+    Equivalent to a raffle with one entry per point of weight, but never builds the raffle
+    """
+
+    def __init__(self, population, weights, rng = random):
+        """
+        Prepare to sample from a population, negative weights count as zero
+        """
+        self.population = list(population)
+        self.weights = [max(w, 0) for w in weights]
+        self.rng = rng
+
+
+    def sample(self, n, unique = True):
+        """
+        Draw n items
+        With unique, a selected item loses all its entries so each draw is a new item
+        Otherwise a single entry is removed per draw and items can repeat
+        """
+        tree = FenwickTree(self.weights)
+        if n > (sum(1 for w in self.weights if w) if unique else tree.total):
+            raise ValueError("Unable to select {} {}from a pool of {} weighted entries".format(n, "unique items " if unique else "", tree.total))
+
+        selected = []
+        for _ in range(n):
+            index = tree.find(self.rng.randrange(tree.total))
+            tree.add(index, -tree.weight(index) if unique else -1)
+            selected.append(self.population[index])
+        return selected
+
+
+    def legacy_sample(self, n, unique = True):
+        """
+        Draw n items exactly as the original raffle list did for the same random state
+        The raffle drew single entries (random.choice, removing each) until n unique items appeared,
+        or used random.sample over the entries when items could repeat
+        """
+        tree = FenwickTree(self.weights)
+        if not unique:
+            return [self.population[tree.find(position)] for position in self.rng.sample(range(tree.total), n)]
+
+        chosen = set()
+        selected = []
+        while len(selected) < n:
+            if not tree.total:
+                raise IndexError("Cannot choose from an empty sequence")
+            #random.choice on a list of this length draws the same index
+            index = tree.find(self.rng.randrange(tree.total))
+            tree.add(index, -1)
+            if index not in chosen:
+                chosen.add(index)
+                selected.append(self.population[index])
+        return selected
+
+
+    def sample_pair(self, groups, excluded = ()):
+        """
+        Draw two different items, never both from the same group and never an excluded item, without redrawing
+        groups gives each item's group, or None for items that can be paired with anyone
+        excluded gives the indexes of items that can't be drawn, but whose weight still counts towards the odds
+        Each valid pair has the same odds as drawing two unique items from the whole population and redrawing until the pair is valid
+        Work is linear in the population, raises ValueError if no valid pair can be drawn
+        """
+        excluded = set(excluded)
+        total = sum(self.weights)
+        available = total - sum(self.weights[i] for i in excluded)
+        group_totals = defaultdict(int)
+        for i, (weight, group) in enumerate(zip(self.weights, groups)):
+            if group is not None and i not in excluded:
+                group_totals[group] += weight
+
+        #Odds of each item being drawn first, then any valid partner second
+        firsts = []
+        for i, (weight, group) in enumerate(zip(self.weights, groups)):
+            partners = available - weight - (group_totals[group] - weight if group is not None else 0)
+            firsts.append(weight * partners / (total - weight) if weight and partners and i not in excluded else 0)
+        cumulative = list(accumulate(firsts))
+        if not cumulative or not cumulative[-1]:
+            raise ValueError("No valid pair can be drawn from {} items".format(len(self.population)))
+        first = bisect_right(cumulative, self.rng.random() * cumulative[-1])
+        if first == len(firsts): #Rounding can land exactly on the total
+            first = max(i for i, odds in enumerate(firsts) if odds)
+
+        #Then a partner from outside the first item's group, by weight
+        group = groups[first]
+        partners = [0 if i == first or i in excluded or group is not None and g == group else w for i, (w, g) in enumerate(zip(self.weights, groups))]
+        second = bisect_right(list(accumulate(partners)), self.rng.randrange(sum(partners)))
+        return self.population[first], self.population[second]
@@ -0,0 +1,54 @@
+### scheduler.py
+### Author: Liam Callaway
+### Resolves the order night actions are performed in
+
+from collections import defaultdict
+
+
+class NightPlan:
+    """
+    The resolved order of a night's actions, which can be inspected before it is performed
+    Each entry is (priority, agility, line, action)
+    """
+
+    def __init__(self, phase, entries):
+        """
+        Create a plan from entries already in resolution order
+        """
+        self.phase = phase
+        self.entries = entries
+
+
+    def __iter__(self):
+        return (entry[-1] for entry in self.entries)
+
+
+    def __len__(self):
+        return len(self.entries)
+
+
+    def __str__(self):
+        lines = ["Night {} plan:".format(self.phase)]
+        for priority, agility, line, action in self.entries:
+            lines.append("\tPriority: {}, Agility: {}, Line: {}, {} {} {}".format(priority, agility, line, action["Player"], action["Action"], action.get("Target") or ""))
+        return "\n".join(lines)
+
+
+def plan_night(game, actions, phase = None):
+    """
+    Order actions by priority, then agility (highest first), then submission line
+    Each action's agility is rolled exactly once, in submission order
+    """
+    if phase is None:
+        phase = game.current_phase
+
+    buckets = defaultdict(list)
+    for action in sorted(actions, key = lambda x: x["Line"]):
+        agility = game.get_player_by_name(action["Player"]).get_stat("Agility")
+        priority = game.get_action_priority(action["Action"])
+        buckets[priority].append((priority, agility, action["Line"], action))
+
+    entries = []
+    for priority in sorted(buckets):
+        entries += sorted(buckets[priority], key = lambda x: (-x[1], x[2]))
+    return NightPlan(phase, entries)
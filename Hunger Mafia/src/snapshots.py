@@ -0,0 +1,247 @@
+### snapshots.py
+### Author: Liam Callaway
+### Timestamped game backups, stored as a full base snapshot followed by deltas of what changed in each save
+
+import os
+import pickle
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import effects
+
+TIMESTAMP_FORMAT = "%Y%m%d-%H%M%S-%f"
+DEBUG_CHANGES = False #Compare every part of the game against the previous save, to find changes the game never noted
+
+
+class RetentionPolicy:
+    """
+    How often to write a full base and how many to keep
+    base_every: number of deltas written after a base before the next base
+    keep_chains: number of most recent base (plus deltas) chains kept, None keeps everything
+    """
+
+    def __init__(self, base_every = 10, keep_chains = None):
+        self.base_every = base_every
+        self.keep_chains = keep_chains
+
+
+def player_state(player):
+    """
+    A player's state with references to other players replaced by names, so players can be saved separately
+    """
+    state = dict(player.__dict__)
+    state.pop("game", None)
+    state["actions"] = type(player.actions)(list, {phase : [(action, getattr(target, "name", target)) for action, target in acts] for phase, acts in player.actions.items()})
+    return state
+
+
+def game_state(game):
+    """
+    The game's own state, without its players or effect queue
+    """
+    state = game.__getstate__()
+    for key in ("players", "effects"):
+        state.pop(key, None)
+    state["kingpin"] = getattr(game.kingpin, "name", None)
+    state["careers"] = [p.name for p in game.careers]
+    return state
+
+
+def effect_entries(game):
+    """
+    Effects still waiting to resolve, in the order they were scheduled
+    """
+    return game.effects.entries()
+
+
+def settled(value):
+    """
+    A copy of a value without the empty entries reading a defaultdict leaves behind, as those aren't changes
+    """
+    if isinstance(value, defaultdict):
+        entries = {key : settled(v) for key, v in value.items()}
+        return {key : v for key, v in entries.items() if v or not isinstance(v, (int, dict, list))}
+    if isinstance(value, dict):
+        return {key : settled(v) for key, v in value.items()}
+    return value
+
+
+def signatures(game):
+    """
+    Pickled form of each part of a game, only used by DEBUG_CHANGES to check the changes the game noted
+    """
+    sigs = {("player", name) : pickle.dumps(settled(player_state(p))) for name, p in game.players.items()}
+    sigs.update({("game", key) : pickle.dumps(value) for key, value in game_state(game).items()})
+    sigs[("game", "effects")] = pickle.dumps(effect_entries(game))
+    return sigs
+
+
+def delta_of(game, changes):
+    """
+    The parts of a game named in changes (see Game.changed), as saved in a delta
+    """
+    state = game_state(game)
+    return {"players" : {name : player_state(game.players[name]) for kind, name in changes if kind == "player" and name in game.players},
+        "game" : {key : state[key] for kind, key in changes if kind == "game" and key in state},
+        "effects" : effect_entries(game) if ("game", "effects") in changes else None,
+        "removed" : [(kind, name) for kind, name in changes if name not in (game.players if kind == "player" else game.__dict__)]} #eg. players renamed
+
+
+class SnapshotStore:
+    """
+    Snapshots of one game in a directory, as files named <game>_<timestamp>.base and <game>_<timestamp>.delta
+    Every delta only holds the players, game values and effects the game noted as changed since the previous snapshot
+    """
+
+    def __init__(self, directory, game_name, policy = None):
+        self.directory = directory
+        self.game_name = game_name
+        self.policy = policy or RetentionPolicy()
+        self.pattern = re.compile(r"^{}_(\d{{8}}-\d{{6}}-\d{{6}})\.(base|delta)$".format(re.escape(game_name)))
+        self.last = None #(path, signatures) of the most recent save, only kept for DEBUG_CHANGES
+
+
+    def snapshots(self):
+        """
+        List (timestamp, kind, path) for every snapshot, oldest first
+        """
+        found = []
+        if not os.path.isdir(self.directory):
+            return found
+        for filename in os.listdir(self.directory):
+            m = self.pattern.match(filename)
+            if m:
+                found.append((datetime.strptime(m.group(1), TIMESTAMP_FORMAT), m.group(2), os.path.join(self.directory, filename)))
+        return sorted(found)
+
+
+    def _path(self, timestamp, kind):
+        return os.path.join(self.directory, "{}_{}.{}".format(self.game_name, timestamp.strftime(TIMESTAMP_FORMAT), kind))
+
+
+    def save(self, game, timestamp = None):
+        """
+        Save a snapshot of the game, returning its timestamp
+        Timestamps are kept unique and increasing, even for saves made within the same microsecond
+        Deltas are only written for a game saved to or loaded from the latest snapshot, anything else (eg. a new game reusing the name) starts a new base
+        """
+        timestamp = timestamp or datetime.now()
+        existing = self.snapshots()
+        if existing and timestamp <= existing[-1][0]:
+            timestamp = existing[-1][0] + timedelta(microseconds = 1)
+        deltas_since_base = 0
+        for _, kind, _ in reversed(existing):
+            if kind == "base":
+                break
+            deltas_since_base += 1
+
+        changes = game.changes | {("game", "rng")} #Every random draw changes the random state
+        if not existing or game.last_snapshot != existing[-1][2] or deltas_since_base >= self.policy.base_every:
+            path = self._path(timestamp, "base")
+            with open(path, 'wb') as f:
+                pickle.dump(game, f)
+        else:
+            path = self._path(timestamp, "delta")
+            if DEBUG_CHANGES:
+                self._check_changes(game, changes)
+            with open(path, 'wb') as f:
+                pickle.dump(delta_of(game, changes), f)
+        if DEBUG_CHANGES:
+            self.last = (path, signatures(game))
+        game.changes.clear()
+        game.last_snapshot = path
+        self.compact()
+        return timestamp
+
+
+    def _check_changes(self, game, changes):
+        """
+        Confirm every part of the game that differs from the previous save was noted as changed
+        """
+        if self.last is None or self.last[0] != game.last_snapshot:
+            return
+        missed = sorted(key for key, sig in signatures(game).items() if self.last[1].get(key) != sig and key not in changes)
+        if missed:
+            raise RuntimeError("{} changed since the last snapshot without being noted".format(missed))
+
+
+    def load(self, timestamp = None):
+        """
+        Rebuild the game as of the latest snapshot at or before timestamp (default the latest snapshot)
+        """
+        chain = []
+        for snapshot in self.snapshots():
+            if timestamp is not None and snapshot[0] > timestamp:
+                break
+            chain = [snapshot] if snapshot[1] == "base" else chain + [snapshot]
+        if not chain:
+            raise ValueError("No snapshots of {} at or before {}".format(self.game_name, timestamp))
+        with open(chain[0][2], 'rb') as f:
+            game = pickle.load(f)
+        for _, _, path in chain[1:]:
+            with open(path, 'rb') as f:
+                apply_delta(game, pickle.load(f))
+        game.changes.clear() #Rebuilding isn't a change, the next save can be a delta of this snapshot
+        game.last_snapshot = chain[-1][2]
+        return game
+
+
+    def compact(self):
+        """
+        Remove the oldest chains beyond the retention policy
+        """
+        if self.policy.keep_chains is None:
+            return
+        existing = self.snapshots()
+        bases = [i for i, (_, kind, _) in enumerate(existing) if kind == "base"]
+        if len(bases) > self.policy.keep_chains:
+            for _, _, path in existing[:bases[-self.policy.keep_chains]]:
+                os.remove(path)
+
+
+def apply_delta(game, delta):
+    """
+    Update a game with the changes recorded in a delta
+    """
+    player_class = type(next(iter(game.players.values()))) if game.players else None
+    for kind, name in delta.get("removed", ()):
+        if kind == "player":
+            game.players.pop(name, None)
+        else:
+            game.__dict__.pop(name, None)
+    for name, state in delta["players"].items():
+        if name not in game.players:
+            game.players[name] = player_class.__new__(player_class)
+        game.players[name].__dict__.update(state)
+    for name in delta["players"]:
+        player = game.players[name]
+        for phase, acts in player.actions.items():
+            player.actions[phase] = [(action, game.players.get(target, target)) for action, target in acts]
+        player.game = game
+    for key, value in delta["game"].items():
+        if key == "kingpin":
+            value = game.players.get(value)
+        elif key == "careers":
+            value = [game.players[name] for name in value]
+        setattr(game, key, value)
+    if delta["effects"] is not None:
+        game.effects = effects.EffectQueue()
+        for kind, name, phase, night, order in delta["effects"]:
+            game.effects.schedule(kind, game.players[name], phase, night, order = order)
+    game.index_players() #Players were updated in place
+    return game
+
+
+_stores = {}
+
+def get_snapshot_store(directory, game_name, policy = None):
+    """
+    Retrieve the snapshot store for a game, reusing it between saves
+    """
+    key = (os.path.abspath(directory), game_name)
+    if key not in _stores:
+        _stores[key] = SnapshotStore(directory, game_name, policy)
+    elif policy is not None:
+        _stores[key].policy = policy
+    return _stores[key]
@@ -0,0 +1,174 @@
+### statuses.py
+### Author: Liam Callaway
+### Compact per-phase storage of player status effects (Protected, Trapped, Poisoned...)
+
+from array import array
+
+#Each status is one bit, new statuses are given the next free bit when first used
+#Only these built in statuses keep the same bit between sessions, so stores pickle the bits they were saved with
+STATUS_FLAGS = {"Protected" : 1, "Trapped" : 2, "Poisoned" : 4}
+MAX_STATUSES = 16 #Bits in each array('H') entry
+
+
+def status_flag(name):
+    """
+    Retrieve the bit flag for a status, registering it if it is new
+    """
+    try:
+        return STATUS_FLAGS[name]
+    except KeyError:
+        if len(STATUS_FLAGS) >= MAX_STATUSES:
+            raise ValueError("Too many statuses to register {}".format(name))
+        flag = STATUS_FLAGS[name] = 1 << len(STATUS_FLAGS)
+        return flag
+
+
+class StatusStore:
+    """
+    Statuses held by a player in each phase, as an array of bit flags indexed by phase
+    Indexing by phase gives a list-like view, so older code using lists of strings still works
+    """
+
+    def __init__(self):
+        self.flags = array('H')
+
+
+    def __getstate__(self):
+        return {"flags" : self.flags, "bits" : dict(STATUS_FLAGS)}
+
+
+    def __setstate__(self, state):
+        """
+        Restore a pickled store, translating its flags if this session gave the statuses different bits
+        """
+        bits = state.get("bits", {})
+        self.flags = state["flags"]
+        if any(status_flag(name) != flag for name, flag in bits.items()):
+            saved = self.flags
+            self.flags = array('H')
+            for phase, flags in enumerate(saved):
+                for name, flag in bits.items():
+                    if flags & flag:
+                        self.add(phase, name)
+
+
+    @classmethod
+    def from_lists(cls, lists):
+        """
+        Create a store from a dictionary of phase -> list of status names
+        """
+        store = cls()
+        for phase, names in lists.items():
+            for name in names:
+                store.add(phase, name)
+        return store
+
+
+    def get_flags(self, phase):
+        """
+        Retrieve the combined flags for a phase
+        """
+        return self.flags[phase] if 0 <= phase < len(self.flags) else 0
+
+
+    def set_flags(self, phase, flags):
+        """
+        Replace the combined flags for a phase
+        """
+        if phase < 0:
+            raise ValueError("Cannot set statuses for phase {}".format(phase))
+        if phase >= len(self.flags):
+            if not flags:
+                return
+            self.flags.extend([0] * (phase + 1 - len(self.flags)))
+        self.flags[phase] = flags
+
+
+    def add(self, phase, name):
+        """
+        Give a status in a phase
+        """
+        self.set_flags(phase, self.get_flags(phase) | status_flag(name))
+
+
+    def discard(self, phase, name):
+        """
+        Remove a status from a phase, if held
+        """
+        self.set_flags(phase, self.get_flags(phase) & ~status_flag(name))
+
+
+    def has(self, phase, name):
+        """
+        Check if a status is held in a phase
+        """
+        return bool(self.get_flags(phase) & STATUS_FLAGS.get(name, 0))
+
+
+    def names(self, phase):
+        """
+        List the statuses held in a phase
+        """
+        flags = self.get_flags(phase)
+        return [name for name, flag in STATUS_FLAGS.items() if flags & flag]
+
+
+    def phases(self):
+        """
+        List the phases in which any status is held
+        """
+        return [phase for phase, flags in enumerate(self.flags) if flags]
+
+
+    def __getitem__(self, phase):
+        return StatusView(self, phase)
+
+
+    def __setitem__(self, phase, names):
+        self.set_flags(phase, 0)
+        for name in names:
+            self.add(phase, name)
+
+
+    def __repr__(self):
+        return repr({phase : self.names(phase) for phase in self.phases()})
+
+
+class StatusView:
+    """
+    List-like view of the statuses held in one phase
+    """
+
+    def __init__(self, store, phase):
+        self.store = store
+        self.phase = phase
+
+
+    def __contains__(self, name):
+        return self.store.has(self.phase, name)
+
+
+    def __iter__(self):
+        return iter(self.store.names(self.phase))
+
+
+    def __len__(self):
+        return len(self.store.names(self.phase))
+
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+    def append(self, name):
+        self.store.add(self.phase, name)
+
+
+    def remove(self, name):
+        if name not in self:
+            raise ValueError("{} not in statuses".format(name))
+        self.store.discard(self.phase, name)
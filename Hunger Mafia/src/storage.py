@@ -0,0 +1,211 @@
+### storage.py
+### Author: Liam Callaway
+### Optional SQLite storage of game state, saved one phase at a time
+### Players, inventories, statuses, actions and results are kept as tables, so they can be queried without unpickling
+
+import json
+import sqlite3
+from collections import defaultdict
+
+import items
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS game (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS players (name TEXT PRIMARY KEY, id INTEGER, district INTEGER,
+    is_alive INTEGER, is_career INTEGER, is_kingpin INTEGER, death_text TEXT,
+    Strength INTEGER, Defence INTEGER, Agility INTEGER, Luck INTEGER,
+    preferences TEXT, response_bonus TEXT, death_phase INTEGER);
+CREATE TABLE IF NOT EXISTS inventories (owner TEXT, slot INTEGER, item TEXT, name TEXT, uses INTEGER, PRIMARY KEY (owner, slot));
+CREATE TABLE IF NOT EXISTS statuses (player TEXT, phase INTEGER, status TEXT, PRIMARY KEY (player, phase, status));
+CREATE TABLE IF NOT EXISTS action_bonuses (player TEXT, phase INTEGER, stat TEXT, value INTEGER, PRIMARY KEY (player, phase, stat));
+CREATE TABLE IF NOT EXISTS actions (player TEXT, phase INTEGER, seq INTEGER, action TEXT, target TEXT, PRIMARY KEY (player, phase, seq));
+CREATE TABLE IF NOT EXISTS effects (seq INTEGER PRIMARY KEY, effect TEXT, target TEXT, phase INTEGER, due INTEGER, position INTEGER);
+CREATE TABLE IF NOT EXISTS results (Phase INTEGER, Event TEXT, Line TEXT, Player TEXT, Action TEXT, Target TEXT, Result TEXT);
+CREATE INDEX IF NOT EXISTS results_phase ON results (Phase);
+CREATE INDEX IF NOT EXISTS results_player ON results (Player);
+"""
+
+ATTRIBUTES = ["Strength", "Defence", "Agility", "Luck"]
+RESULT_FIELDS = ["Phase", "Event", "Line", "Player", "Action", "Target", "Result"]
+#Columns added since the first version of the schema, added to older databases when opened
+ADDED_COLUMNS = {"players" : [("death_phase", "INTEGER")]}
+DROPPED = "" #Owner of items in the dropped item pool
+
+
+def _name(obj):
+    return obj if obj is None or isinstance(obj, str) else obj.name
+
+
+def item_rows(owner, inventory):
+    return [(owner, slot, type(item).__name__, item.name, item.uses) for slot, item in enumerate(inventory)]
+
+
+def player_rows(player):
+    """
+    Convert a player to the rows stored for them in each table
+    """
+    return {
+        "players" : [(player.name, player.id, player.district, int(player.is_alive), int(player.is_career), int(player.is_kingpin), player.death_text)
+            + tuple(player.stats[a] for a in ATTRIBUTES) + (json.dumps(player.preferences, sort_keys = True), json.dumps(player.response_bonus), player.death_phase)],
+        "inventories" : item_rows(player.name, player.inventory),
+        "statuses" : [(player.name, p, status) for p in player.status.phases() for status in player.status.names(p)],
+        "action_bonuses" : [(player.name, p, stat, value) for p, bonus in sorted(player.action_bonus.items()) for stat, value in sorted(bonus.items()) if value],
+        "actions" : [(player.name, p, seq, action, _name(target)) for p, acts in sorted(player.actions.items()) for seq, (action, target) in enumerate(acts)],
+    }
+
+
+def _load_item(item_class, uses):
+    item = items.create_item(item_class)
+    item.uses = uses
+    return item
+
+
+class GameStore:
+    """
+    A game saved in an SQLite database
+    Each save only rewrites the rows of players who have changed since the last save or load
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {row[1] for row in self.connection.execute("PRAGMA table_info({})".format(table))}
+            for column, kind in columns:
+                if column not in existing:
+                    self.connection.execute("ALTER TABLE {} ADD COLUMN {} {}".format(table, column, kind))
+        self.saved = {} #Player name -> rows at last save, used to skip unchanged players
+        self.pending_results = []
+
+
+    def close(self):
+        self.connection.close()
+
+
+    def add_results(self, rows):
+        """
+        Queue result rows to be written with the next save (used as a ResultsSink listener)
+        """
+        self.pending_results += [tuple(row.get(field, "") for field in RESULT_FIELDS) for row in rows]
+
+
+    def save_phase(self, game):
+        """
+        Save the current state of a game in a single transaction
+        Returns the names of players whose rows were rewritten
+        """
+        changed = []
+        with self.connection as db:
+            db.executemany("INSERT OR REPLACE INTO game VALUES (?, ?)", [
+                ("game_name", game.game_name),
+                ("current_phase", json.dumps(game.current_phase)),
+                ("kingpin", json.dumps(_name(game.kingpin))),
+                ("careers", json.dumps([_name(p) for p in game.careers])),
+                ("rng", json.dumps(game.rng.getstate()))])
+            for player in game.get_players():
+                rows = player_rows(player)
+                if rows == self.saved.get(player.name):
+                    continue
+                for table, table_rows in rows.items():
+                    key = "name" if table == "players" else "owner" if table == "inventories" else "player"
+                    db.execute("DELETE FROM {} WHERE {} = ?".format(table, key), (player.name,))
+                    if table_rows:
+                        db.executemany("INSERT INTO {} VALUES ({})".format(table, ", ".join("?" * len(table_rows[0]))), table_rows)
+                self.saved[player.name] = rows
+                changed.append(player.name)
+            db.execute("DELETE FROM inventories WHERE owner = ?", (DROPPED,))
+            db.executemany("INSERT INTO inventories VALUES (?, ?, ?, ?, ?)", item_rows(DROPPED, game.dropped_items))
+            db.execute("DELETE FROM effects")
+            db.executemany("INSERT INTO effects (effect, target, phase, due, position) VALUES (?, ?, ?, ?, ?)", game.effects.entries())
+            db.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)", self.pending_results)
+        self.pending_results = []
+        return changed
+
+
+    def game_state(self):
+        """
+        Retrieve the game level values (game_name, current_phase, kingpin and careers by name, and the random state if saved)
+        """
+        state = {key : value for key, value in self.connection.execute("SELECT key, value FROM game")}
+        for key in ("current_phase", "kingpin", "careers"):
+            state[key] = json.loads(state[key])
+        if "rng" in state:
+            version, internal, gauss = json.loads(state["rng"])
+            state["rng"] = (version, tuple(internal), gauss)
+        return state
+
+
+    def effects(self):
+        """
+        Retrieve the effects waiting to resolve, in the order they were scheduled, as (effect, target name, phase, due night, order)
+        """
+        return self.connection.execute("SELECT effect, target, phase, due, position FROM effects ORDER BY seq").fetchall()
+
+
+    def player_names(self):
+        return [name for name, in self.connection.execute("SELECT name FROM players ORDER BY id")]
+
+
+    def player_state(self, name):
+        """
+        Retrieve the saved state of a single player, in the form used by Player.__setstate__
+        Action targets are given by name, and nested defaultdicts are left to the caller
+        """
+        row = self.connection.execute("SELECT * FROM players WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise ValueError("Player {} doesn't exist".format(name))
+        name, player_id, district, is_alive, is_career, is_kingpin, death_text = row[:7]
+        stats = dict(zip(ATTRIBUTES, row[7:11]))
+        preferences, response_bonus, death_phase = json.loads(row[11]), json.loads(row[12]), row[13]
+        status = defaultdict(list)
+        for phase, s in self.connection.execute("SELECT phase, status FROM statuses WHERE player = ? ORDER BY phase", (name,)):
+            status[phase].append(s)
+        action_bonus = defaultdict(dict)
+        for phase, stat, value in self.connection.execute("SELECT phase, stat, value FROM action_bonuses WHERE player = ?", (name,)):
+            action_bonus[phase][stat] = value
+        actions = defaultdict(list)
+        for phase, action, target in self.connection.execute("SELECT phase, action, target FROM actions WHERE player = ? ORDER BY phase, seq", (name,)):
+            actions[phase].append((action, target))
+        return {"name" : name, "id" : player_id, "district" : district,
+            "is_alive" : bool(is_alive), "is_career" : bool(is_career), "is_kingpin" : bool(is_kingpin), "death_text" : death_text, "death_phase" : death_phase,
+            "stats" : stats, "preferences" : {int(k) : v for k, v in preferences.items()}, "response_bonus" : response_bonus,
+            "inventory" : self.inventory(name), "status" : dict(status), "action_bonus" : dict(action_bonus), "actions" : dict(actions)}
+
+
+    def inventory(self, owner = DROPPED):
+        """
+        Retrieve the items held by a player, or the dropped item pool
+        """
+        return [_load_item(item, uses) for item, uses in self.connection.execute("SELECT item, uses FROM inventories WHERE owner = ? ORDER BY slot", (owner,))]
+
+
+    def results(self, phase = None, player = None):
+        """
+        Retrieve result rows, optionally only those from one phase or involving one player
+        """
+        query, args = "SELECT * FROM results WHERE 1", []
+        if phase is not None:
+            query += " AND Phase = ?"
+            args.append(phase)
+        if player is not None:
+            query += " AND Player = ?"
+            args.append(player)
+        return [dict(zip(RESULT_FIELDS, row)) for row in self.connection.execute(query + " ORDER BY rowid", args)]
+
+
+    def phase(self, phase):
+        """
+        Retrieve everything recorded in a single phase: actions chosen, statuses held and results
+        """
+        return {"actions" : self.connection.execute("SELECT player, action, target FROM actions WHERE phase = ? ORDER BY player, seq", (phase,)).fetchall(),
+            "statuses" : self.connection.execute("SELECT player, status FROM statuses WHERE phase = ? ORDER BY player", (phase,)).fetchall(),
+            "results" : self.results(phase)}
+
+
+    def mark_loaded(self, game):
+        """
+        Remember the rows of a loaded game, so the next save only writes changes
+        """
+        for player in game.get_players():
+            self.saved[player.name] = player_rows(player)
@@ -0,0 +1,45 @@
+### test_actions.py
+### Author: Liam Callaway
+### Tests for the night action registry
+### Run as: python -m pytest
+
+import pytest
+
+import actions
+import items
+import mafia
+
+def test_actions_must_resolve():
+    with pytest.raises(TypeError):
+        actions.Action("Wait")
+
+
+def test_unknown_actions_fall_back_to_items():
+    assert isinstance(actions.get_action("Mystery Serum"), actions.SerumAction)
+    assert isinstance(actions.get_action("Mystery"), actions.ItemAction)
+    assert actions.get_action("Mystery").priority == 0
+
+
+def test_self_targeted_item_is_refused_after_use(make_player):
+    game = mafia.Game()
+    player = make_player("A", game)
+    game.add_player(player)
+    game.current_phase = 1
+    player.add_item(items.create_item("PoisonDart"))
+    assert not actions.get_action("Poison").self_target
+    assert game.perform_action({"Player" : "A", "Action" : "Poison", "Target" : "A"}) == "Failed: Self Target"
+    assert not player.status.has(1, "Poisoned")
+    assert not player.inventory
+
+
+def test_new_items_are_declared_by_their_action(make_player, monkeypatch):
+    game = mafia.Game()
+    player = make_player("A", game)
+    game.add_player(player)
+    game.current_phase = 1
+    monkeypatch.setitem(actions.ACTIONS, "Protect", actions.ItemAction("Protect", method = "protect", consumes_item = False))
+    player.add_item(items.create_item("Medpack"))
+    uses = player.inventory[0].uses
+    assert game.perform_action({"Player" : "A", "Action" : "Protect", "Target" : "A"}) == "Success"
+    assert player.is_protected()
+    assert player.inventory[0].uses == uses
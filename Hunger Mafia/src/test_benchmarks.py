@@ -0,0 +1,20 @@
+### test_benchmarks.py
+### Author: Liam Callaway
+### Smoke tests for the benchmarks
+### Run as: python -m pytest
+
+import json
+
+import benchmarks
+
+def test_scaling_appends_a_record_per_stage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    output = tmp_path / "results.jsonl"
+    for _ in range(2):
+        benchmarks.bench_scaling(sizes = (24,), output = str(output))
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    stages = ["create_players_from_responses", "run_cornucopia", "stat_based_selection", "run_game_phase", "save_game", "load_game"]
+    assert [r["stage"] for r in records] == stages * 2
+    assert all(r["players"] == 24 and r["seconds"] >= 0 and r["peak_bytes"] > 0 for r in records)
+    assert [r["draws"] for r in records[:6]] == [r["draws"] for r in records[6:]]
+    assert list(tmp_path.iterdir()) == [output]
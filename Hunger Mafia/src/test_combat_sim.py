@@ -0,0 +1,27 @@
+### test_combat_sim.py
+### Author: Liam Callaway
+### Tests for the vectorised combat simulation
+### Run as: python -m pytest
+
+import pytest
+
+import combat_sim
+import mafia
+
+TRIALS = 200000
+
+
+@pytest.mark.parametrize("phase, career_kill, protected", [(1, False, False), (2, True, True), (mafia.FATIGUE_PHASE + 1, False, False)])
+def test_outcome_rates_match_exact_odds(make_game, phase, career_kill, protected):
+    game = make_game("A", "B")
+    game.current_phase = phase
+    attacker, defender = game.get_player_by_name("A"), game.get_player_by_name("B")
+    attacker.stats = {"Strength" : 9, "Defence" : 4, "Agility" : 6, "Luck" : 3}
+    defender.stats = {"Strength" : 5, "Defence" : 7, "Agility" : 8, "Luck" : 6}
+    if protected:
+        defender.apply_status("Protected")
+    rates = combat_sim.outcome_rates(combat_sim.simulate_players(attacker, defender, TRIALS, career_kill = career_kill, rng = 1))
+    odds = attacker.combat_odds(defender, career_kill = career_kill)
+    assert set(rates) == set(odds)
+    for outcome, p in odds.items():
+        assert rates[outcome] == pytest.approx(p, abs = 0.01), outcome
@@ -0,0 +1,40 @@
+### test_drops.py
+### Author: Liam Callaway
+### Tests for loading the item drop schedule
+### Run as: python -m pytest
+
+import os
+
+import pytest
+
+import drops
+
+def write_schedule(path, rows, mtime = None):
+    path.write_text("Day,Items\n" + "".join("{},{}\n".format(day, names) for day, names in rows))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_unknown_items_are_rejected(tmp_path):
+    path = write_schedule(tmp_path / "ItemDrops.csv", [(0, "Dagger"), (1, "Dagger Excalibur")])
+    with pytest.raises(ValueError, match = "line 3: Unknown item Excalibur for Day 1"):
+        drops.load_item_schedule(path)
+
+
+def test_repeated_days_are_rejected(tmp_path):
+    path = write_schedule(tmp_path / "ItemDrops.csv", [(1, "Dagger"), (1, "Medicine")])
+    with pytest.raises(ValueError, match = "More than one entry for Day 1"):
+        drops.load_item_schedule(path)
+
+
+def test_schedule_reloads_when_modified(tmp_path):
+    path = write_schedule(tmp_path / "ItemDrops.csv", [(1, "Dagger")], mtime = 1000000)
+    schedule = drops.load_item_schedule(path)
+    assert drops.load_item_schedule(path) is schedule
+    assert [i.name for i in schedule.create_items(1)] == ["Dagger"]
+    write_schedule(tmp_path / "ItemDrops.csv", [(1, "Medicine Dagger")], mtime = 2000000)
+    reloaded = drops.load_item_schedule(path)
+    assert reloaded is not schedule
+    assert [i.name for i in reloaded.create_items(1)] == ["Medicine", "Dagger"]
+    assert reloaded.create_items(2) == []
@@ -0,0 +1,35 @@
+### test_effects.py
+### Author: Liam Callaway
+### Tests for the delayed effect queue
+### Run as: python -m pytest
+
+import effects
+
+def test_cancel_before_keeps_later_effects(make_game):
+    game = make_game("A", "B")
+    a, b = game.get_player_by_name("A"), game.get_player_by_name("B")
+    queue = effects.EffectQueue()
+    old = queue.schedule("Poison", a, 2, 5)
+    new = queue.schedule("Poison", a, 4, 7)
+    other = queue.schedule("Poison", b, 2, 5)
+    assert queue.cancel("Poison", a, before = 4) == [old]
+    assert queue.pending("Poison", a) == [new]
+    assert len(queue) == 2
+    assert queue.pop_due(7) == [other, new]
+    assert queue.cancel("Poison", a) == []
+
+
+def test_pop_due_resolves_in_night_then_order(make_game):
+    game = make_game("A", "B", "C")
+    a, b, c = (game.get_player_by_name(name) for name in "ABC")
+    queue = effects.EffectQueue()
+    late = queue.schedule("Poison", a, 3, 6, order = 0)
+    second = queue.schedule("Poison", c, 1, 4, order = 2)
+    first = queue.schedule("Poison", b, 1, 4, order = 1)
+    missed = queue.schedule("Poison", a, 1, 3, order = 0)
+    assert queue.pop_due(2) == []
+    assert queue.pop_due(4) == [missed, first, second]
+    assert queue.pending("Poison", b) == [] and queue.pending("Poison", a) == [late]
+    assert [(kind, name, night) for kind, name, _, night, _ in queue.entries()] == [("Poison", "A", 6)]
+    assert queue.pop_due(6) == [late]
+    assert len(queue) == 0 and not queue.heap
@@ -0,0 +1,35 @@
+### test_journal.py
+### Author: Liam Callaway
+### Tests for the structured event journal
+### Run as: python -m pytest
+
+import journal
+import mafia
+
+
+def test_events_below_level_are_dropped():
+    j = journal.Journal(level = journal.INFO)
+    j.debug(journal.ROLL, "{}", 1)
+    j.info(journal.ACTION, "{} hides", "A", player = "A")
+    assert [e.message for e in j.events()] == ["A hides"]
+    assert j.events()[0].get_dict()["player"] == "A"
+
+
+def test_roll_threshold_has_its_own_field():
+    j = journal.Journal(level = journal.DEBUG)
+    mafia.print_roll_results("Search", 0.25, 0.5, j)
+    fields = j.events(journal.ROLL)[0].fields
+    assert fields["threshold"] == 0.25
+    assert "target" not in fields
+
+
+class Unformattable:
+    def __format__(self, spec):
+        raise AssertionError("Formatted a disabled event")
+
+
+def test_disabled_events_are_never_formatted():
+    j = journal.Journal(level = journal.OFF)
+    j.info(journal.ACTION, "{}", Unformattable())
+    j.debug(journal.ROLL, "{}", Unformattable())
+    assert j.events() == []
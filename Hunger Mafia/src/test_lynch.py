@@ -0,0 +1,70 @@
+### test_lynch.py
+### Author: Liam Callaway
+### Tests for the lynch schedule and vote tallies
+### Run as: python -m pytest
+
+import pytest
+
+import lynch
+
+NAMES = ["James Curran", "Maddie Mackey", "Michael Cui", "Terry Lee"]
+
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_match_name():
+    assert lynch.match_name("maddie mackey", NAMES) == "Maddie Mackey"
+    assert lynch.match_name("Terry ", NAMES) == "Terry Lee"
+    assert lynch.match_name("Michael Cui (2/11/9/8)", NAMES) == "Michael Cui"
+    assert lynch.match_name("Abstain", NAMES) is None
+    with pytest.raises(ValueError):
+        lynch.match_name("M", NAMES)
+
+
+def test_vote_log_follows_changed_votes(tmp_path):
+    path = write(tmp_path / "votes.csv", "Day,Voter,Vote\n"
+        "1,A,VOTE: James Curran\n"
+        "1,B,VOTE: terry\n"
+        "1,C,vote: James Curran\n"
+        "1,A,UNVOTE: James Curran\n"
+        "1,A,VOTE: Terry Lee\n"
+        "1,D,VOTE: ABSTAIN\n"
+        "2,A,VOTE: Michael Cui\n")
+    tally = lynch.VoteTally()
+    tally.ingest_vote_log(path, NAMES)
+    assert tally.result(1) == "Terry Lee"
+    assert tally.result(2) == "Michael Cui"
+    assert tally.result(3) is None
+
+
+def test_ties_must_be_broken():
+    tally = lynch.VoteTally()
+    tally.vote(1, "A", "James Curran")
+    tally.vote(1, "B", "Terry Lee")
+    assert tally.is_tie(1)
+    with pytest.raises(ValueError):
+        tally.result(1)
+    tally.unvote(1, "A")
+    assert tally.leaders(1) == ["Terry Lee"]
+    tally.unvote(1, "B")
+    assert tally.leaders(1) == []
+
+
+def test_form_responses_keep_latest_vote(tmp_path):
+    path = write(tmp_path / "form.csv", "Timestamp,Who are you?,Who do you wish to vote for?\n"
+        "1,A ,Maddie\n"
+        "2,B,Michael Cui\n"
+        "3,A,Michael\n")
+    tally = lynch.VoteTally()
+    tally.ingest_form_responses(path, 9, NAMES)
+    assert tally.days[9].counts == {"Michael Cui" : 2}
+
+
+def test_schedule_rejects_repeated_days(tmp_path):
+    schedule = lynch.load_lynch_schedule(write(tmp_path / "lynches.csv", "Day,Name\n1,Terry Lee\n"))
+    assert schedule.get(1) == "Terry Lee" and schedule.get(2) is None
+    with pytest.raises(ValueError):
+        lynch.LynchSchedule(write(tmp_path / "repeated.csv", "Day,Name\n1,Terry Lee\n1,Michael Cui\n"))
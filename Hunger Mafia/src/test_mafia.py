@@ -0,0 +1,132 @@
+### test_mafia.py
+### Author: Liam Callaway
+### Tests for the game engine
+### Run as: python -m pytest
+
+import pickle
+import threading
+from collections import Counter
+
+import pytest
+
+import journal
+import mafia
+import snapshots
+
+def test_new_game_has_no_kingpin():
+    game = mafia.Game()
+    assert game.kingpin is None
+    assert snapshots.game_state(game)["kingpin"] is None
+
+
+def test_add_player_assigns_ids_in_order(make_game):
+    game = make_game("A", "B", "C")
+    assert [p.id for p in game.get_players()] == [0, 1, 2]
+    assert [p.name for p in game.get_players()] == ["A", "B", "C"]
+    assert [p.district for p in game.get_players()] == [1, 1, 2]
+
+
+def test_deaths_update_living_players(make_game):
+    game = make_game("A", "B", "C", "D")
+    game.get_player_by_name("B").set_dead()
+    game.lynch_player("D")
+    assert [p.name for p in game.get_living_players()] == ["A", "C"]
+    assert len(game.get_players()) == 4
+
+
+def test_indexes_rebuilt_after_pickling_and_renaming(make_game):
+    game = make_game("A", "B", "C")
+    game.get_player_by_name("A").set_dead()
+    game.rename_player("B", "Z")
+    loaded = pickle.loads(pickle.dumps(game))
+    assert "_living" not in game.__getstate__()
+    assert [p.name for p in loaded.get_living_players()] == ["Z", "C"]
+
+
+def test_players_added_directly_are_indexed(make_game, make_player):
+    game = make_game("A")
+    player = make_player("B", game)
+    game.players["B"] = player
+    assert game.get_players()[-1] is player
+    assert player in game.get_living_players()
+
+
+def test_threshold_tables_match_invnormalcdf():
+    for check, params in mafia.CHECK_PARAMS.items():
+        for fatigue in (False, True):
+            mu, sigma = params[fatigue]
+            for delta in range(-60, 61): #Includes deltas outside the table
+                assert mafia.check_target(check, delta, fatigue) == mafia.invnormalcdf(delta, mu, sigma)
+    for luck in range(0, 41):
+        assert mafia.luck_target(luck) == mafia.invnormalcdf(luck, *mafia.LUCK_PARAMS)
+
+
+def test_check_odds_match_rolled_attacks(make_game):
+    game = make_game("A", "B")
+    game.journal.set_level(journal.OFF)
+    game.current_phase = 1
+    a, b = game.get_player_by_name("A"), game.get_player_by_name("B")
+    a.stats = {"Strength" : 9, "Defence" : 4, "Agility" : 5, "Luck" : 8}
+    b.stats = {"Strength" : 6, "Defence" : 7, "Agility" : 6, "Luck" : 3}
+    odds = a.check_odds(b)
+    assert abs(sum(odds) - 1) < 1e-12
+    rolls = 40000
+    counts = Counter(a.attack_check(b) for _ in range(rolls))
+    rolled = [counts[outcome] / rolls for outcome in (mafia.CombatOutcome.success, mafia.CombatOutcome.failed, mafia.CombatOutcome.countered)]
+    for p, expected in zip(rolled, odds):
+        assert abs(p - expected) < 0.01
+
+
+def test_combat_odds_cover_every_outcome(make_game):
+    game = make_game("A", "B")
+    game.current_phase = 1
+    a, b = game.get_player_by_name("A"), game.get_player_by_name("B")
+    odds = a.combat_odds(b, career_kill = True)
+    assert abs(sum(odds.values()) - 1) < 1e-12
+    assert a.action_bonus[1]["Strength"] == 0 #Career kill bonus removed again
+    b.apply_status("Protected")
+    assert a.combat_odds(b)["success"] == 0.0
+
+
+def test_battle_win_chance():
+    assert mafia.battle_win_chance((1, 0, 0), (1, 0, 0), 1, 1) == 1.0
+    assert mafia.battle_win_chance((0.5, 0, 0.5), (0.5, 0, 0.5), 1, 1) == 0.5
+    assert mafia.battle_win_chance((0.4, 0.2, 0.4), (0.4, 0.2, 0.4), 2, 2) == pytest.approx(0.5)
+    assert mafia.battle_win_chance((0.6, 0.2, 0.2), (0.2, 0.2, 0.6), 2, 2) > 0.5
+
+
+def play_checks(game, checks = 300):
+    a, b = game.get_players()[:2]
+    return [a.attack_check(b) for _ in range(checks)]
+
+
+def test_interleaved_games_keep_their_own_seeds_and_journals(make_game):
+    games = [make_game("A", "B"), make_game("X", "Y")]
+    for phase, game in enumerate(games, 1):
+        game.journal.sinks = []
+        game.journal.set_level(journal.DEBUG)
+        game.set_phase(phase)
+    expected = []
+    for game in games:
+        game.rng.seed(game.seeds[game.current_phase])
+        expected.append(play_checks(game))
+        game.rng.seed(game.seeds[game.current_phase])
+        game.journal.recent.clear()
+
+    barrier = threading.Barrier(2)
+    results = [None, None]
+
+    def run(i):
+        barrier.wait()
+        results[i] = play_checks(games[i])
+
+    threads = [threading.Thread(target = run, args = (i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == expected
+    for phase, (game, names) in enumerate(zip(games, [{"A", "B"}, {"X", "Y"}]), 1):
+        events = game.journal.events()
+        assert events and all(e.phase == phase for e in events)
+        assert {e.fields["player"] for e in events if "player" in e.fields} <= names
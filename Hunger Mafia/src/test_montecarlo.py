@@ -0,0 +1,54 @@
+### test_montecarlo.py
+### Author: Liam Callaway
+### Tests for simulated games
+### Run as: python -m pytest
+
+import os
+import shutil
+
+import pytest
+
+import journal
+import mafia
+import montecarlo
+import replay
+
+
+@pytest.fixture
+def item_drops(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "ItemDrops.csv").write_text("Day,Items\n1,StrengthSerum Medicine Dagger\n")
+
+
+@pytest.fixture
+def real_item_drops(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(mafia.JOURNAL, "level", journal.OFF)
+    shutil.copy(os.path.join(replay.DATA_DIR, replay.INPUT_FILES["ItemDrops.csv"]), tmp_path / "ItemDrops.csv")
+
+
+def add_players(game, make_player, *names):
+    for name in names:
+        game.add_player(make_player(name, game))
+    game.set_phase(1)
+    game.results.write = False
+    return game
+
+
+def test_real_games_refuse_more_sponsor_items_than_players(item_drops, make_player):
+    game = add_players(mafia.Game(), make_player, "A", "B")
+    with pytest.raises(ValueError):
+        game.distribute_sponsor_items(1)
+
+
+def test_simulated_games_leave_extra_sponsor_items_dropped(item_drops, make_player):
+    game = add_players(montecarlo.SimulatedGame(), make_player, "A", "B")
+    game.distribute_sponsor_items(1)
+    assert sorted(len(p.inventory) for p in game.get_players()) == [1, 1]
+    assert len(game.dropped_items) == 1
+
+
+def test_simulated_games_are_determined_by_seed_and_index(real_item_drops):
+    first = montecarlo.simulate_game(3, 5, n_players = 12)
+    assert montecarlo.simulate_game(3, 5, n_players = 12) == first
+    assert montecarlo.simulate_game(3, 6, n_players = 12) != first
@@ -0,0 +1,46 @@
+### test_policies.py
+### Author: Liam Callaway
+### Tests for scripted player policies
+### Run as: python -m pytest
+
+import journal
+import mafia
+import policies
+
+def test_view_shows_deaths_without_killers(make_game):
+    game = make_game("A", "B", "C")
+    game.current_phase = 2
+    b = game.get_player_by_name("B")
+    b.set_dead(killer = game.get_player_by_name("A"))
+    b.death_text = "Killed by A on Night 2"
+    view = policies.PlayerView(game, game.get_player_by_name("C"))
+    assert view.deaths == {"B" : 2}
+    assert view.living == ("A", "C")
+
+
+def test_view_does_not_journal_cooldowns(make_game):
+    game = make_game("A", "B")
+    j = game.journal
+    j.set_level(journal.DEBUG)
+    game.current_phase = 1
+    player = game.get_player_by_name("A")
+    player.hide()
+    game.current_phase = 2
+    before = len(j.events())
+    view = policies.PlayerView(game, player)
+    assert not view.can_use("Hide") and view.can_use("Guard")
+    assert len(j.events()) == before
+
+
+def test_policies_fall_back_to_defending_then_passing(make_game):
+    game = make_game("A", "B")
+    game.current_phase = 1
+    player = game.get_player_by_name("A")
+    player.record_action("Attack", game.get_player_by_name("B"))
+    game.current_phase = 2
+    chosen = lambda name: policies.get_policy(name).night_action(policies.PlayerView(game, player), None)["Action"]
+    assert chosen("aggressive") == chosen("items") == "Hide"
+    player.record_action("Hide")
+    assert chosen("aggressive") == chosen("defensive") == "Guard"
+    player.record_action("Guard")
+    assert chosen("aggressive") == chosen("defensive") == chosen("items") == "Hide"
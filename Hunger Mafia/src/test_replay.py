@@ -0,0 +1,30 @@
+### test_replay.py
+### Author: Liam Callaway
+### Golden regression test, replaying the real game from its input files
+### Run as: python -m pytest
+
+import pytest
+
+import replay
+
+
+@pytest.fixture(scope = "module")
+def replayed():
+    r = replay.Replay()
+    checks = r.run()
+    r.close()
+    return r, checks
+
+
+def test_golden_phases_still_match(replayed):
+    _, checks = replayed
+    matched = [c.name for c in checks if c.matched]
+    assert [name for name in replay.GOLDEN_MATCHES if name not in matched] == []
+
+
+def test_replay_reaches_the_last_phase(replayed):
+    r, checks = replayed
+    assert r.phase == replay.LAST_PHASE
+    assert [c.name for c in checks][-1] == "Night {}".format(replay.LAST_PHASE)
+    feast = [c for c in checks if c.name == "Feast"][0]
+    assert all(not r.game.get_player_by_name(name).is_alive for name in feast.skipped)
@@ -0,0 +1,39 @@
+### test_results.py
+### Author: Liam Callaway
+### Tests for the per-game results file
+### Run as: python -m pytest
+
+import csv
+
+import results
+
+def read_rows(path):
+    with open(path) as f:
+        return list(csv.DictReader(f))
+
+
+def test_flushes_append_to_game_results(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sink = results.ResultsSink("test")
+    for phase in (1, 2):
+        sink.writer("Night", phase, "night_results.csv", ["Player", "Result"]).writerow({"Player" : "A", "Result" : "Success"})
+        sink.writer("Sponsor", phase, "Item_Assignments.csv", ["Player", "Item"], mode = 'a').writerow({"Player" : "A", "Item" : "Dagger"})
+        sink.flush()
+    rows = read_rows("test_results.csv")
+    assert [(r["Phase"], r["Event"]) for r in rows] == [("1", "Night"), ("1", "Sponsor"), ("2", "Night"), ("2", "Sponsor")]
+    assert list(rows[0]) == results.RESULT_FIELDS
+    assert len(read_rows("night_results.csv")) == 1 #Replaced by each flush
+    assert len(read_rows("Item_Assignments.csv")) == 2 #Appended to by each flush
+
+
+def test_write_false_only_notifies_listeners(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sink = results.ResultsSink("test")
+    sink.write = False
+    received = []
+    sink.listeners.append(received.extend)
+    sink.writer("Night", 1, "night1_results.csv", ["Player", "Result"]).writerow({"Player" : "A", "Result" : "Success"})
+    sink.flush()
+    assert received == [{"Player" : "A", "Result" : "Success", "Phase" : 1, "Event" : "Night"}]
+    assert not sink.pending
+    assert list(tmp_path.iterdir()) == []
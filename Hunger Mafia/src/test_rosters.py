@@ -0,0 +1,59 @@
+### test_rosters.py
+### Author: Liam Callaway
+### Tests for bulk roster generation and the exact starting stat distributions
+### Run as: python -m pytest
+
+from fractions import Fraction
+
+import pytest
+
+import mafia
+import rosters
+
+np = pytest.importorskip("numpy")
+
+
+def test_distributions_sum_to_one():
+    for advantage in (False, True):
+        for rank in (0, 1, 2, None):
+            assert sum(rosters.starting_stat_distribution(rank, advantage).values()) == Fraction(1)
+
+
+def test_generated_stats_follow_the_rules():
+    rng = np.random.default_rng(0)
+    n = 2000
+    preferences = rosters.random_preferences(n, rng)
+    advantages = rng.random(n) < 0.5
+    stats = rosters.generate_stats(preferences, advantages, rng)
+    assert stats.shape == (n, len(mafia.ATTRIBUTES))
+    bonus = np.where(advantages, sum(mafia.RESPONSE_BONUSES[True]), sum(mafia.RESPONSE_BONUSES[False]))
+    assert (stats.sum(axis = 1) == mafia.STAT_POINTS + mafia.RESPONSE_POINTS + bonus).all()
+    #Most preferred stats are never given fewer response points than the next
+    ranked = stats[np.arange(n)[:, None], preferences]
+    assert ranked[:, 0].mean() > ranked[:, 1].mean() > ranked[:, 2].mean()
+
+
+def test_generated_stats_match_exact_distribution():
+    rng = np.random.default_rng(1)
+    n = 40000
+    preferences = np.tile(np.arange(3), (n, 1))
+    stats = rosters.generate_stats(preferences, np.zeros(n, dtype = bool), rng)
+    for rank in (0, 1, 2, None):
+        column = stats[:, 3 if rank is None else rank]
+        exact = rosters.starting_stat_distribution(rank)
+        assert column.mean() == pytest.approx(rosters.moments(exact)[0], abs = 0.05)
+        for value, p in exact.items():
+            assert (column == value).mean() == pytest.approx(float(p), abs = 0.01)
+
+
+def test_roster_creates_players_lazily():
+    roster = rosters.Roster.generate(50, seed = 2)
+    assert roster.materialised == 0
+    player = roster[10]
+    assert roster.materialised == 1
+    assert player.stats == roster.player_stats(10)
+    assert player.game is roster[11].game
+    with pytest.raises(IndexError):
+        roster[50]
+    game = roster.populate()
+    assert len(game.get_players()) == 50 and game.get_players()[10] is player
@@ -0,0 +1,75 @@
+### test_sampling.py
+### Author: Liam Callaway
+### Tests for weighted sampling without replacement
+### Run as: python -m pytest
+
+import random
+from collections import Counter
+
+import pytest
+
+import sampling
+
+
+def test_fenwick_tree_tracks_weights():
+    weights = [3, 0, 5, 1, 2, 7, 0, 4]
+    tree = sampling.FenwickTree(weights)
+    assert [tree.weight(i) for i in range(len(weights))] == weights
+    tree.add(2, -5)
+    weights[2] = 0
+    assert tree.total == sum(weights)
+    positions = [i for i, w in enumerate(weights) for _ in range(w)]
+    assert [tree.find(p) for p in range(tree.total)] == positions
+
+
+def test_legacy_sample_matches_raffle():
+    population, weights = ["A", "B", "C", "D", "E"], [4, 1, 6, 2, 3]
+    raffle = [p for p, w in zip(population, weights) for _ in range(w)]
+    rng = random.Random(11)
+    expected = []
+    while len(expected) < 3:
+        name = raffle.pop(raffle.index(rng.choice(raffle)))
+        if name not in expected:
+            expected.append(name)
+    assert sampling.WeightedSampler(population, weights, random.Random(11)).legacy_sample(3) == expected
+
+
+def test_sample_is_unique():
+    sampler = sampling.WeightedSampler(range(10), [1, 5, 0, 2, 8, 1, 1, 3, 0, 2], random.Random(3))
+    selected = sampler.sample(8)
+    assert len(set(selected)) == 8 and 2 not in selected and 8 not in selected
+    with pytest.raises(ValueError):
+        sampler.sample(9)
+
+
+def rejection_odds(weights, groups, excluded):
+    """
+    Odds of each unordered pair when drawing two unique items and redrawing until the pair is valid
+    """
+    total = sum(weights)
+    odds = Counter()
+    for i, wi in enumerate(weights):
+        for j, wj in enumerate(weights):
+            if i != j and i not in excluded and j not in excluded and (groups[i] is None or groups[i] != groups[j]):
+                odds[frozenset((i, j))] += wi * wj / (total - wi)
+    scale = sum(odds.values())
+    return {pair : p / scale for pair, p in odds.items()}
+
+
+def test_sample_pair_matches_redrawing_with_exclusions():
+    weights = [5, 1, 3, 20, 2, 4]
+    groups = ["Career", None, "Career", None, "Career", None]
+    excluded = {3}
+    sampler = sampling.WeightedSampler(range(len(weights)), weights, random.Random(5))
+    draws = 40000
+    counts = Counter(frozenset(sampler.sample_pair(groups, excluded)) for _ in range(draws))
+    expected = rejection_odds(weights, groups, excluded)
+    assert set(counts) <= set(expected)
+    for pair, p in expected.items():
+        assert abs(counts[pair] / draws - p) < 0.006
+
+
+def test_sample_pair_without_valid_pair():
+    sampler = sampling.WeightedSampler("ABC", [1, 2, 3])
+    with pytest.raises(ValueError):
+        sampler.sample_pair(["Career", "Career", None], excluded = [2])
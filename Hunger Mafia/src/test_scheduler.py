@@ -0,0 +1,39 @@
+### test_scheduler.py
+### Author: Liam Callaway
+### Tests for night action ordering
+### Run as: python -m pytest
+
+import scheduler
+
+NIGHT = [("A", "Attack", "B"), ("B", "Hide", ""), ("C", "Trap", "A"), ("D", "Follow", "A"), ("E", "Guard", ""),
+    ("F", "Attack", "C"), ("G", "Investigate", "F"), ("H", "Hide", ""), ("A", "Poison", "E"), ("C", "Kill", "H")]
+
+
+def night_game(make_game):
+    game = make_game(*sorted({player for player, _, _ in NIGHT}))
+    for name in "BEH": #Equal agility, so ties fall back to submission line
+        game.get_player_by_name(name).stats["Agility"] = 5
+    game.set_phase(1)
+    return game
+
+
+def triple_sort(game, actions):
+    """
+    How run_game_phase ordered actions before plan_night
+    """
+    actions = list(actions)
+    actions.sort(key = lambda x: x["Line"])
+    actions.sort(key = lambda x: game.get_player_by_name(x["Player"]).get_stat("Agility"), reverse = True)
+    actions.sort(key = lambda x: game.get_action_priority(x["Action"]))
+    return actions
+
+
+def test_plan_matches_triple_sort(make_game):
+    actions = [{"Line" : line, "Player" : player, "Action" : action, "Target" : target} for line, (player, action, target) in enumerate(NIGHT)]
+    submitted = actions[5:] + actions[:5] #Rows aren't always read in line order
+    old, new = night_game(make_game), night_game(make_game)
+    expected = triple_sort(old, submitted)
+    plan = scheduler.plan_night(new, submitted)
+    assert list(plan) == expected
+    assert new.rng.getstate() == old.rng.getstate()
+    assert [priority for priority, _, _, _ in plan.entries] == sorted(priority for priority, _, _, _ in plan.entries)
@@ -0,0 +1,104 @@
+### test_snapshots.py
+### Author: Liam Callaway
+### Tests for base and delta snapshots of games
+### Run as: python -m pytest
+
+import pickle
+
+import pytest
+
+import items
+import mafia
+import snapshots
+
+def kinds(store):
+    return [kind for _, kind, _ in store.snapshots()]
+
+
+def test_delta_rebuilds_changes(tmp_path, make_game):
+    store = snapshots.SnapshotStore(str(tmp_path), "test")
+    game = make_game("A", "B", "C")
+    store.save(game)
+    game.get_player_by_name("B").set_dead()
+    game.set_careers("C")
+    game.current_phase = 2
+    store.save(game)
+    assert kinds(store) == ["base", "delta"]
+    loaded = store.load()
+    assert [p.name for p in loaded.get_living_players()] == ["A", "C"]
+    assert [p.name for p in loaded.careers] == ["C"]
+    assert loaded.careers[0] is loaded.players["C"]
+    assert loaded.current_phase == 2
+
+
+def test_delta_removes_renamed_players(tmp_path, make_game):
+    store = snapshots.SnapshotStore(str(tmp_path), "test")
+    game = make_game("A", "B", "C")
+    store.save(game)
+    game.rename_player("A", "Z")
+    store.save(game)
+    loaded = store.load()
+    assert sorted(loaded.players) == ["B", "C", "Z"]
+    assert [p.name for p in loaded.get_players()] == ["Z", "B", "C"]
+
+
+def test_new_game_with_same_name_starts_a_base(tmp_path, make_game):
+    snapshots.SnapshotStore(str(tmp_path), "test").save(make_game("A", "B", "C"))
+    store = snapshots.SnapshotStore(str(tmp_path), "test") #As if in a new process
+    store.save(make_game("X", "Y"))
+    assert kinds(store) == ["base", "base"]
+    assert sorted(store.load().players) == ["X", "Y"]
+
+
+def test_delta_only_holds_noted_changes(tmp_path, make_game):
+    store = snapshots.SnapshotStore(str(tmp_path), "test")
+    game = make_game("A", "B", "C")
+    store.save(game)
+    game.get_player_by_name("B").add_item(items.Dagger())
+    store.save(game)
+    with open(store.snapshots()[-1][2], 'rb') as f:
+        delta = pickle.load(f)
+    assert list(delta["players"]) == ["B"]
+    assert list(delta["game"]) == ["rng"]
+    assert delta["effects"] is None
+    assert [i.name for i in store.load().players["B"].inventory] == ["Dagger"]
+
+
+def test_loaded_game_continues_with_deltas(tmp_path, make_game):
+    game = make_game("A", "B", "C")
+    snapshots.SnapshotStore(str(tmp_path), "test").save(game)
+    store = snapshots.SnapshotStore(str(tmp_path), "test") #As if in a new process
+    loaded = store.load()
+    loaded.get_player_by_name("A").apply_status("Protected")
+    store.save(loaded)
+    assert kinds(store) == ["base", "delta"]
+    assert store.load().players["A"].is_protected()
+
+
+def test_unnoted_changes_are_caught(tmp_path, monkeypatch, make_game):
+    monkeypatch.setattr(snapshots, "DEBUG_CHANGES", True)
+    store = snapshots.SnapshotStore(str(tmp_path), "test")
+    game = make_game("A", "B")
+    store.save(game)
+    game.get_player_by_name("A").stats["Luck"] += 1 #Changed in place without Player.changed
+    with pytest.raises(RuntimeError):
+        store.save(game)
+
+
+def test_bases_follow_retention_policy(tmp_path, make_game):
+    store = snapshots.SnapshotStore(str(tmp_path), "test", snapshots.RetentionPolicy(base_every = 2, keep_chains = 1))
+    game = make_game("A", "B")
+    for phase in range(5):
+        game.current_phase = phase
+        store.save(game)
+    assert kinds(store) == ["base", "delta"]
+    assert store.load().current_phase == 4
+
+
+def test_save_game_writes_snapshots_only(tmp_path, monkeypatch, make_game):
+    monkeypatch.chdir(tmp_path) #save_game also writes Players.csv
+    game = make_game("A", "B", name = "test")
+    game.backup_dir = str(tmp_path)
+    game.save_game()
+    assert not (tmp_path / "test.dat").exists()
+    assert sorted(mafia.load_game("test", directory = str(tmp_path)).players) == ["A", "B"]
@@ -0,0 +1,45 @@
+### test_statuses.py
+### Author: Liam Callaway
+### Tests for per-phase status flags
+### Run as: python -m pytest
+
+import pickle
+
+import pytest
+
+import statuses
+
+
+def test_list_view_matches_old_lists():
+    store = statuses.StatusStore.from_lists({1 : ["Protected"], 3 : ["Trapped", "Poisoned"]})
+    assert store[3] == ["Trapped", "Poisoned"]
+    assert "Protected" in store[1]
+    assert store.phases() == [1, 3]
+    store[3].remove("Trapped")
+    assert store.names(3) == ["Poisoned"]
+
+
+def test_negative_phase_is_rejected():
+    with pytest.raises(ValueError):
+        statuses.StatusStore().add(-1, "Trapped")
+
+
+def test_pickle_keeps_statuses_registered_in_another_order(monkeypatch):
+    monkeypatch.setattr(statuses, "STATUS_FLAGS", dict(statuses.STATUS_FLAGS))
+    store = statuses.StatusStore()
+    store.add(2, "Blinded")
+    store.add(2, "Trapped")
+    data = pickle.dumps(store)
+    #A new session which registered another status first
+    monkeypatch.setattr(statuses, "STATUS_FLAGS", {"Protected" : 1, "Trapped" : 2, "Poisoned" : 4, "Burning" : 8})
+    loaded = pickle.loads(data)
+    assert sorted(loaded.names(2)) == ["Blinded", "Trapped"]
+    assert not loaded.has(2, "Burning")
+
+
+def test_status_limit(monkeypatch):
+    monkeypatch.setattr(statuses, "STATUS_FLAGS", dict(statuses.STATUS_FLAGS))
+    for i in range(statuses.MAX_STATUSES - len(statuses.STATUS_FLAGS)):
+        statuses.status_flag("Status {}".format(i))
+    with pytest.raises(ValueError):
+        statuses.status_flag("One too many")
@@ -0,0 +1,48 @@
+### test_storage.py
+### Author: Liam Callaway
+### Tests for the SQLite game store
+### Run as: python -m pytest
+
+import pickle
+
+import mafia
+
+def summary(game):
+    return [(p.name, p.is_alive, p.death_phase, p.death_text, p.stats, p.status.phases(), dict(p.last_used)) for p in game.get_players()]
+
+
+def test_store_round_trip_matches_pickle(tmp_path, make_game):
+    game = make_game("A", "B", "C")
+    game.set_phase(1)
+    a, b, c = game.get_players()
+    c.set_dead()
+    a.hide()
+    a.poison(b)
+    game.rng.random()
+    store = game.open_store(str(tmp_path / "game.db"))
+    store.save_phase(game)
+    store.close()
+
+    pickled = pickle.loads(pickle.dumps(game))
+    stored = mafia.load_game_from_store(str(tmp_path / "game.db"))
+    assert summary(stored) == summary(pickled)
+    assert stored.effects.entries() == pickled.effects.entries() == [("Poison", "B", 1, 1 + mafia.POISON_DELAY, 1)]
+    assert stored.rng.getstate() == pickled.rng.getstate()
+
+    #Both die of poison on the same night and keep drawing the same numbers
+    for loaded in (pickled, stored):
+        loaded.current_phase = 1 + mafia.POISON_DELAY
+        for effect in loaded.effects.pop_due(loaded.current_phase):
+            loaded.resolve_effect(effect)
+    assert summary(stored) == summary(pickled)
+    assert not stored.get_player_by_name("B").is_alive
+    assert stored.rng.random() == pickled.rng.random()
+
+
+def test_store_only_rewrites_changed_players(tmp_path, make_game):
+    game = make_game("A", "B")
+    store = game.open_store(str(tmp_path / "game.db"))
+    assert sorted(store.save_phase(game)) == ["A", "B"]
+    game.get_player_by_name("A").set_dead()
+    assert store.save_phase(game) == ["A"]
+    assert store.player_state("A")["is_alive"] is False
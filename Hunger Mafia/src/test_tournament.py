@@ -0,0 +1,33 @@
+### test_tournament.py
+### Author: Liam Callaway
+### Tests for tournament results and their cache
+### Run as: python -m pytest
+
+import os
+
+import tournament
+
+
+def test_wilson_interval_stays_in_range():
+    assert tournament.wilson_interval(0, 0) == (0.0, 1.0)
+    low, high = tournament.wilson_interval(10, 10)
+    assert 0.6 < low < 1.0 and high == 1.0
+    low, high = tournament.wilson_interval(50, 100)
+    assert low < 0.5 < high
+
+
+def test_cache_skips_failed_games(tmp_path):
+    cache = tournament.ResultCache(str(tmp_path), source = "abc")
+    mix = tournament.Mix("aggressive", "items")
+    cache.save(mix, 0, 8, {0 : {"winner" : None}, 1 : {"error" : "ValueError: no pair"}})
+    assert cache.load(mix, 0, 8) == {0 : {"winner" : None}}
+
+
+def test_cache_is_keyed_by_source(tmp_path):
+    mix = tournament.Mix("aggressive", "items")
+    tournament.ResultCache(str(tmp_path), source = "abc").save(mix, 0, 8, {0 : {"winner" : None}})
+    assert tournament.ResultCache(str(tmp_path), source = "def").load(mix, 0, 8) == {}
+
+
+def test_cache_lives_outside_the_repository():
+    assert not os.path.realpath(tournament.CACHE_DIR).startswith(os.path.realpath(os.path.join(tournament.SRC_DIR, "..", "..")))
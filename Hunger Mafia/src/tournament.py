@@ -0,0 +1,173 @@
+### tournament.py
+### Author: Liam Callaway
+### Plays policy mixes against each other over the same seeded games, reporting win rates with confidence intervals
+### Run as: python tournament.py games [workers] [seed] careers/tributes ...
+### eg. python tournament.py 500 4 0 aggressive/items aggressive/items+defensive
+
+import glob
+import hashlib
+import json
+import math
+import os
+import sys
+from collections import Counter
+
+import montecarlo
+import policies
+import replay
+
+SRC_DIR = os.path.dirname(os.path.realpath(__file__))
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "hunger-mafia", "tournaments")
+Z_95 = 1.96
+
+
+def source_hash(directory = SRC_DIR):
+    """
+    Hash of the game's source files, so results cached under older rules aren't reused
+    """
+    digest = hashlib.sha1()
+    for path in sorted(glob.glob(os.path.join(directory, "*.py"))):
+        with open(path, 'rb') as f:
+            digest.update(os.path.basename(path).encode() + b"\0" + f.read())
+    return digest.hexdigest()
+
+
+def wilson_interval(successes, trials, z = Z_95):
+    """
+    Confidence interval for a proportion (Wilson score interval), which behaves near 0% and 100%
+    """
+    if not trials:
+        return 0.0, 1.0
+    p = successes / trials
+    centre = (p + z * z / (2 * trials)) / (1 + z * z / trials)
+    spread = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / (1 + z * z / trials)
+    return max(0.0, centre - spread), min(1.0, centre + spread)
+
+
+class Mix:
+    """
+    The policies played by the Careers and by the Tributes, shared out in turn when a side has several
+    """
+
+    def __init__(self, careers, tributes):
+        self.careers = tuple([careers] if isinstance(careers, str) else careers)
+        self.tributes = tuple([tributes] if isinstance(tributes, str) else tributes)
+        for name in self.careers + self.tributes:
+            policies.get_policy(name)
+
+
+    @classmethod
+    def parse(cls, text):
+        """
+        Read a mix written as careers/tributes, with several policies on a side joined by +
+        """
+        try:
+            careers, tributes = text.split("/")
+        except ValueError:
+            raise ValueError("Policy mix {} should be written as careers/tributes".format(text))
+        return cls(careers.split("+"), tributes.split("+"))
+
+
+    def config(self):
+        return {"career_policy" : list(self.careers), "tribute_policy" : list(self.tributes)}
+
+
+    def __str__(self):
+        return "{}/{}".format("+".join(self.careers), "+".join(self.tributes))
+
+
+class ResultCache:
+    """
+    Game records saved per (policy mix, seed) and version of the source, so games already played are never replayed
+    Games that raised an error aren't saved, so they are played again next time
+    """
+
+    def __init__(self, directory = CACHE_DIR, source = None):
+        self.directory = directory
+        self.source = source or source_hash()
+
+
+    def _path(self, mix, seed, n_players):
+        key = json.dumps({"source" : self.source, "mix" : mix.config(), "seed" : seed, "players" : n_players}, sort_keys = True)
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+
+    def load(self, mix, seed, n_players):
+        """
+        Retrieve the cached records as {game number : record}
+        """
+        path = self._path(mix, seed, n_players)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return {int(index) : record for index, record in json.load(f)["games"].items()}
+
+
+    def save(self, mix, seed, n_players, records):
+        os.makedirs(self.directory, exist_ok = True)
+        path = self._path(mix, seed, n_players)
+        records = {index : record for index, record in records.items() if "error" not in record}
+        with open(path + ".tmp", 'w') as f:
+            json.dump({"mix" : str(mix), "seed" : seed, "players" : n_players, "games" : records}, f)
+        os.replace(path + ".tmp", path)
+
+
+class Standing:
+    """
+    How often each (side, policy) won the games played with a mix
+    """
+
+    def __init__(self, mix, records):
+        self.mix = mix
+        self.games = len(records)
+        self.errors = Counter(r["error"].split(":")[0] for r in records if "error" in r)
+        self.finished = self.games - sum(self.errors.values())
+        self.wins = Counter()
+        for record in records:
+            if "error" in record:
+                continue
+            if record["winner"] is None:
+                self.wins["No winner"] += 1
+            else:
+                side = "Career" if record["career_win"] else "Tribute"
+                self.wins["{} {}".format(side, record["policies"][record["winner"]])] += 1
+
+
+    def win_rate(self, key, z = Z_95):
+        """
+        Share of finished games won, with its confidence interval
+        """
+        return (self.wins[key] / self.finished if self.finished else 0.0,) + wilson_interval(self.wins[key], self.finished, z)
+
+
+    def report(self):
+        lines = ["{} ({} games, {} failed{})".format(self.mix, self.games, self.games - self.finished, ": {}".format(dict(self.errors)) if self.errors else "")]
+        for key in sorted(self.wins, key = lambda k: -self.wins[k]):
+            lines.append("\t{}: {:.1%} ({:.1%} - {:.1%})".format(key, *self.win_rate(key)))
+        return "\n".join(lines)
+
+
+def run_tournament(mixes, games, workers = None, seed = 0, n_players = montecarlo.N_PLAYERS, cache = None, data_dir = replay.DATA_DIR):
+    """
+    Play every mix over the same seeded games in one pool of processes, only playing games missing from the cache
+    Returns a Standing for each mix
+    """
+    cache = cache or ResultCache()
+    mixes = [Mix.parse(m) if isinstance(m, str) else m for m in mixes]
+    cached = [cache.load(mix, seed, n_players) for mix in mixes]
+    jobs = [(seed, [i for i in range(games) if i not in known], dict(mix.config(), n_players = n_players)) for mix, known in zip(mixes, cached)]
+    if any(indices for _, indices, _ in jobs):
+        played = montecarlo.play_batches(jobs, workers, data_dir)
+        for mix, known, (_, indices, _), records in zip(mixes, cached, jobs, played):
+            if records:
+                known.update(zip(indices, records))
+                cache.save(mix, seed, n_players, known)
+    return [Standing(mix, [known[i] for i in range(games)]) for mix, known in zip(mixes, cached)]
+
+
+if __name__ == "__main__":
+    numbers = [a for a in sys.argv[1:] if a.isdigit()]
+    names = [a for a in sys.argv[1:] if not a.isdigit()] or ["aggressive/items", "aggressive/defensive", "defensive/items"]
+    games, workers, seed = ([int(n) for n in numbers] + [200, None, 0][len(numbers):])[:3]
+    for standing in run_tournament(names, games, workers, seed):
+        print(standing.report())